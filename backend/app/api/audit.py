@@ -1,19 +1,162 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator, Tuple
 
-from ..core.merkle_audit import AuditLog
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 
-router = APIRouter(prefix="/audit", tags=["audit"])
+from ..core.merkle_audit import DEFAULT_EVENT_PAGE_SIZE, MAX_EVENT_PAGE_SIZE, AuditLog
+from ..models.schemas import AuditEventRead, BatchProofRequest
+from .deps import get_audit_log
 
-audit_log = AuditLog()
+router = APIRouter(prefix="/audit", tags=["audit"])
 
 
 @router.get("/proof")
-async def get_proof(event_id: int) -> dict:
-    proof = await audit_log.get_inclusion_proof(event_id)
+async def get_proof(
+    event_id: int, tree_size: int | None = Query(default=None, ge=1), audit_log: AuditLog = Depends(get_audit_log)
+) -> dict:
+    try:
+        proof = await audit_log.get_inclusion_proof(event_id, tree_size)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     if not proof:
         raise HTTPException(status_code=404, detail="Event not found")
     return proof
 
 
+@router.post("/proofs")
+async def get_batch_proof(request: BatchProofRequest, audit_log: AuditLog = Depends(get_audit_log)) -> dict:
+    try:
+        return await audit_log.get_batch_proof(
+            event_ids=request.event_ids,
+            start_id=request.start_id,
+            end_id=request.end_id,
+            tree_size=request.tree_size,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.get("/proofs/stream")
+async def stream_batch_proof(
+    start_id: int | None = None,
+    end_id: int | None = None,
+    tree_size: int | None = Query(default=None, ge=1),
+    chunk_size: int | None = Query(default=None, ge=1),
+    audit_log: AuditLog = Depends(get_audit_log),
+) -> StreamingResponse:
+    parts = audit_log.stream_batch_proof(
+        start_id=start_id, end_id=end_id, tree_size=tree_size, chunk_size=chunk_size
+    )
+    try:
+        # Pull the head before responding so a bad tree_size is still a 400
+        head = await parts.__anext__()
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    async def ndjson() -> AsyncIterator[str]:
+        yield json.dumps(head, separators=(",", ":")) + "\n"
+        async for part in parts:
+            yield json.dumps(part, separators=(",", ":")) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.get("/tree-head")
+async def get_tree_head(
+    tree_size: int | None = Query(default=None, ge=1), audit_log: AuditLog = Depends(get_audit_log)
+) -> dict:
+    head = await audit_log.get_tree_head(tree_size)
+    if not head:
+        raise HTTPException(status_code=404, detail="Tree head not found")
+    return head
+
+
+@router.get("/consistency")
+async def get_consistency(
+    first: int = Query(ge=1), second: int = Query(ge=1), audit_log: AuditLog = Depends(get_audit_log)
+) -> dict:
+    try:
+        return await audit_log.get_consistency_proof(first, second)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def _encode_cursor(event: AuditEventRead) -> str:
+    raw = f"{event.created_at.isoformat()}|{event.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, event_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(event_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+def _naive_utc(value: datetime | None) -> datetime | None:
+    # created_at is stored as naive UTC
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@router.get("/events", response_model=list[AuditEventRead])
+async def list_events(
+    response: Response,
+    actor_id: str | None = None,
+    action: str | None = None,
+    scope: str | None = None,
+    since: datetime | None = Query(default=None, description="Inclusive lower bound on created_at"),
+    until: datetime | None = Query(default=None, description="Exclusive upper bound on created_at"),
+    cursor: str | None = Query(default=None, description="Opaque X-Next-Cursor value of the previous page"),
+    limit: int = Query(default=DEFAULT_EVENT_PAGE_SIZE, ge=1, le=MAX_EVENT_PAGE_SIZE),
+    audit_log: AuditLog = Depends(get_audit_log),
+) -> list[AuditEventRead]:
+    page = await audit_log.list_events(
+        actor_id=actor_id,
+        action=action,
+        scope=scope,
+        since=_naive_utc(since),
+        until=_naive_utc(until),
+        before=_decode_cursor(cursor) if cursor else None,
+        limit=limit,
+    )
+    if len(page) == limit:
+        response.headers["X-Next-Cursor"] = _encode_cursor(page[-1])
+    return page
+
+
+@router.get("/events/export")
+async def export_events(
+    actor_id: str | None = None,
+    action: str | None = None,
+    scope: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    audit_log: AuditLog = Depends(get_audit_log),
+) -> StreamingResponse:
+    events = audit_log.stream_events(
+        actor_id=actor_id, action=action, scope=scope, since=_naive_utc(since), until=_naive_utc(until)
+    )
+
+    async def ndjson() -> AsyncIterator[str]:
+        async for event in events:
+            yield event.model_dump_json() + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.get("/events/{event_id}", response_model=AuditEventRead)
+async def get_event(event_id: int, audit_log: AuditLog = Depends(get_audit_log)) -> AuditEventRead:
+    event = await audit_log.get_event(event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return event
@@ -1,49 +1,189 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, Query
+from typing import Any, AsyncIterator, Literal
 
-from ..core.consent_service import ConsentService
-from ..models.schemas import ConsentCreate, ConsentRead, ConsentUpdate
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
-router = APIRouter(prefix="/consents", tags=["consent"])
+from ..core.bulk_io import batched, iter_records
+from ..core import consent_feed
+from ..core.consent_feed import parse_cursor
+from ..core.consent_service import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, ConsentService
+from ..models.schemas import ConsentChangeBatch, ConsentCreate, ConsentRead, ConsentUpdate
+from .deps import get_consent_service
 
-service = ConsentService()
+router = APIRouter(prefix="/consents", tags=["consent"])
 
 
 @router.post("", response_model=ConsentRead)
-async def create_consent(payload: ConsentCreate) -> ConsentRead:
+async def create_consent(payload: ConsentCreate, service: ConsentService = Depends(get_consent_service)) -> ConsentRead:
     consent = await service.create_consent(payload)
     return consent
 
 
+def _consent_from_row(row: dict[str, Any]) -> ConsentCreate:
+    # CSV cells are strings: scope is ';'-separated and an empty expires_at means no expiry
+    scope = row.get("scope")
+    if isinstance(scope, str):
+        row["scope"] = [s.strip() for s in scope.split(";") if s.strip()]
+    if row.get("expires_at") == "":
+        row["expires_at"] = None
+    return ConsentCreate.model_validate(row)
+
+
+def _consent_id_from_row(row: dict[str, Any]) -> int:
+    value = row.get("consent_id", row.get("id"))
+    if value is None:
+        raise ValueError("row is missing consent_id")
+    return int(value)
+
+
+@router.post("/bulk")
+async def bulk_create_consents(
+    request: Request, service: ConsentService = Depends(get_consent_service)
+) -> dict[str, int]:
+    """Create consents from an NDJSON or CSV body; each batch is committed as it is read."""
+    created = 0
+    rows = iter_records(request.stream(), request.headers.get("content-type", ""))
+    try:
+        async for batch in batched(rows, service.bulk_batch_size):
+            created += len(await service.bulk_create([_consent_from_row(row) for row in batch]))
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail={"error": str(exc), "created": created}) from exc
+    return {"created": created}
+
+
+@router.post("/bulk-withdraw")
+async def bulk_withdraw_consents(
+    request: Request, service: ConsentService = Depends(get_consent_service)
+) -> dict[str, int]:
+    """Withdraw consents listed by ``consent_id`` in an NDJSON or CSV body."""
+    withdrawn = 0
+    rows = iter_records(request.stream(), request.headers.get("content-type", ""))
+    try:
+        async for batch in batched(rows, service.bulk_batch_size):
+            withdrawn += await service.bulk_withdraw([_consent_id_from_row(row) for row in batch])
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail={"error": str(exc), "withdrawn": withdrawn}) from exc
+    return {"withdrawn": withdrawn}
+
+
+def _json_response(consent: ConsentRead) -> Response:
+    # Serialised once here; a returned Response skips FastAPI's second validation against response_model
+    return Response(consent.model_dump_json(), media_type="application/json")
+
+
 @router.get("", response_model=list[ConsentRead])
 async def list_consents(
     data_principal_id: str | None = Query(default=None, alias="dpid"),
     purpose: str | None = None,
-) -> list[ConsentRead]:
-    return await service.list_consents(data_principal_id=data_principal_id, purpose=purpose)
+    after: int | None = Query(default=None, description="Keyset cursor: last consent id of the previous page"),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    scope: list[str] = Query(default=[], description="Only consents whose scope includes all of these fields"),
+    service: ConsentService = Depends(get_consent_service),
+) -> Response:
+    # Rows are rendered straight into the body; response_model only documents its shape
+    body, next_cursor = await service.list_consents_json(
+        data_principal_id=data_principal_id, purpose=purpose, after_id=after, limit=limit, scope=scope
+    )
+    response = Response(body, media_type="application/json")
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return response
+
+
+@router.get("/export")
+async def export_consents(
+    data_principal_id: str | None = Query(default=None, alias="dpid"),
+    purpose: str | None = None,
+    format: Literal["ndjson", "json"] = "ndjson",
+    scope: list[str] = Query(default=[], description="Only consents whose scope includes all of these fields"),
+    service: ConsentService = Depends(get_consent_service),
+) -> StreamingResponse:
+    rows = service.stream_consents_json(data_principal_id=data_principal_id, purpose=purpose, scope=scope)
+
+    async def ndjson() -> AsyncIterator[str]:
+        async for consent in rows:
+            yield consent + "\n"
+
+    async def json_array() -> AsyncIterator[str]:
+        yield "["
+        first = True
+        async for consent in rows:
+            yield ("" if first else ",") + consent
+            first = False
+        yield "]"
+
+    if format == "json":
+        return StreamingResponse(json_array(), media_type="application/json")
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+def _feed_cursor(service: ConsentService, since: str | None) -> list[int]:
+    try:
+        return parse_cursor(since, service.router.shards)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.get("/changes", response_model=ConsentChangeBatch)
+async def consent_changes(
+    since: str | None = Query(default=None, description="Cursor of the previous batch; omit to start at the beginning"),
+    limit: int = Query(default=consent_feed.DEFAULT_BATCH_SIZE, ge=1, le=consent_feed.MAX_BATCH_SIZE),
+    wait: float = Query(default=0, ge=0, le=consent_feed.MAX_WAIT_SECONDS, description="Long-poll for up to this long"),
+    service: ConsentService = Depends(get_consent_service),
+) -> ConsentChangeBatch:
+    """Consent changes after ``since``, oldest first; an empty batch keeps the cursor where it was."""
+    return await service.changes.wait(_feed_cursor(service, since), limit, wait)
+
+
+@router.get("/changes/head")
+async def consent_changes_head(service: ConsentService = Depends(get_consent_service)) -> dict[str, str]:
+    """Cursor of the latest change: take it before an export to follow on from that snapshot."""
+    return {"cursor": await service.changes.head()}
+
+
+@router.get("/changes/stream")
+async def stream_consent_changes(
+    since: str | None = None,
+    limit: int = Query(default=consent_feed.DEFAULT_BATCH_SIZE, ge=1, le=consent_feed.MAX_BATCH_SIZE),
+    last_event_id: str | None = Header(default=None),
+    service: ConsentService = Depends(get_consent_service),
+) -> StreamingResponse:
+    """Server-sent events: one "changes" event per batch, its id the cursor, so reconnecting resumes."""
+    batches = service.changes.stream(_feed_cursor(service, last_event_id or since), limit)
+
+    async def events() -> AsyncIterator[str]:
+        async for batch in batches:
+            if not batch.changes:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {batch.cursor}\nevent: changes\ndata: {batch.model_dump_json()}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 
 @router.get("/{consent_id}", response_model=ConsentRead)
-async def get_consent(consent_id: int) -> ConsentRead:
+async def get_consent(consent_id: int, service: ConsentService = Depends(get_consent_service)) -> Response:
     consent = await service.get_consent(consent_id)
     if not consent:
         raise HTTPException(status_code=404, detail="Consent not found")
-    return consent
+    return _json_response(consent)
 
 
 @router.patch("/{consent_id}", response_model=ConsentRead)
-async def update_consent(consent_id: int, payload: ConsentUpdate) -> ConsentRead:
+async def update_consent(
+    consent_id: int, payload: ConsentUpdate, service: ConsentService = Depends(get_consent_service)
+) -> Response:
     updated = await service.update_consent(consent_id, payload)
     if not updated:
         raise HTTPException(status_code=404, detail="Consent not found")
-    return updated
+    return _json_response(updated)
+
 
 @router.delete("/{consent_id}")
-async def delete_consent(consent_id: int) -> dict[str, str]:
+async def delete_consent(consent_id: int, service: ConsentService = Depends(get_consent_service)) -> dict[str, str]:
     deleted = await service.withdraw_consent(consent_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Consent not found")
     return {"status": "deleted"}
-
-
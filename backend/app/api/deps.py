@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from fastapi import Depends, FastAPI, Request
+
+from ..core.consent_service import ConsentService
+from ..core.container import Services
+from ..core.dsar import DsarExporter
+from ..core.erasure import ErasureService
+from ..core.ingest_pipeline import IngestPipeline
+from ..core.merkle_audit import AuditLog
+
+
+def app_services(app: FastAPI) -> Services:
+    """The app's services, normally created by the lifespan; created on first use when it has not run."""
+    services = getattr(app.state, "services", None)
+    if services is None:
+        services = app.state.services = Services.create()
+    return services
+
+
+def get_services(request: Request) -> Services:
+    return app_services(request.app)
+
+
+def get_consent_service(services: Services = Depends(get_services)) -> ConsentService:
+    return services.consents
+
+
+def get_pipeline(services: Services = Depends(get_services)) -> IngestPipeline:
+    return services.pipeline
+
+
+def get_audit_log(services: Services = Depends(get_services)) -> AuditLog:
+    return services.audit
+
+
+def get_erasure(services: Services = Depends(get_services)) -> ErasureService:
+    return services.erasure
+
+
+def get_exporter(services: Services = Depends(get_services)) -> DsarExporter:
+    return services.exporter
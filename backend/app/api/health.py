@@ -1,6 +1,12 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from ..core.circuit_breaker import CLOSED, CircuitBreaker
+from ..core.container import Services
+from .deps import get_services
 
 router = APIRouter(tags=["health"])
 
@@ -11,7 +17,13 @@ async def liveness() -> dict[str, str]:
 
 
 @router.get("/health/ready")
-async def readiness() -> dict[str, str]:
-    return {"status": "ready"}
-
-
+async def readiness(services: Services = Depends(get_services)) -> dict[str, Any]:
+    """Ready while serving; "degraded" when a dependency's circuit is not closed and fallbacks are in use."""
+    breakers: list[CircuitBreaker] = []
+    if services.cache.redis is not None:
+        breakers.extend((services.cache.breaker, services.cache.bulk_breaker))
+    if services.pipeline.policy.use_opa:
+        breakers.append(services.pipeline.policy.breaker)
+    dependencies = {breaker.name: breaker.snapshot() for breaker in breakers}
+    degraded = any(dependency["state"] != CLOSED for dependency in dependencies.values())
+    return {"status": "degraded" if degraded else "ready", "dependencies": dependencies}
@@ -1,20 +1,30 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 
 from ..core.ingest_pipeline import IngestPipeline
 from ..models.schemas import IngestRequest, IngestResponse
+from .deps import get_pipeline
 
 router = APIRouter(prefix="/ingest", tags=["ingest"])
 
-pipeline = IngestPipeline()
-
 
 @router.post("", response_model=IngestResponse)
-async def ingest(payload: IngestRequest) -> IngestResponse:
-    allowed, decision, stored_record_id = await pipeline.run(payload)
+async def ingest(
+    payload: IngestRequest,
+    response: Response,
+    idempotency_key: str | None = Header(default=None, max_length=255),
+    pipeline: IngestPipeline = Depends(get_pipeline),
+) -> IngestResponse:
+    allowed, decision, stored_record_id = await pipeline.run(payload, idempotency_key)
     if not allowed:
         raise HTTPException(status_code=403, detail=decision)
+    if decision == "accepted":
+        # WAL mode: durable locally, written to the database by the background drainer
+        response.status_code = 202
+        return IngestResponse(status="accepted")
+    if decision == "duplicate":
+        return IngestResponse(status="duplicate", record_id=stored_record_id)
     return IngestResponse(status="stored", record_id=stored_record_id)
 
 
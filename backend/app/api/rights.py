@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+
+from ..auth.security import Principal, auth_dependency
+from ..core.dsar import DsarExporter
+from ..core.erasure import ErasureService
+from ..models.schemas import ErasureJobRead, ErasureRequest
+from .deps import get_erasure, get_exporter
+
+router = APIRouter(prefix="/rights", tags=["rights"])
+
+
+@router.get("/export")
+async def export_principal_data(
+    data_principal_id: str = Query(alias="dpid", min_length=1),
+    format: Literal["ndjson", "zip"] = "ndjson",
+    principal: Principal = Depends(auth_dependency),
+    exporter: DsarExporter = Depends(get_exporter),
+) -> StreamingResponse:
+    """Everything held about one data principal: consents, decoded ingest records and audit events."""
+    if principal.role == "data_principal" and principal.subject != data_principal_id:
+        raise HTTPException(status_code=403, detail="Data principals can only export their own data")
+    if exporter.busy:
+        raise HTTPException(status_code=503, detail="Too many exports in progress", headers={"Retry-After": "30"})
+    if format == "zip":
+        return StreamingResponse(
+            exporter.zip(data_principal_id),
+            media_type="application/zip",
+            headers={"Content-Disposition": 'attachment; filename="dsar-export.zip"'},
+        )
+    return StreamingResponse(exporter.ndjson(data_principal_id), media_type="application/x-ndjson")
+
+
+@router.post("/erasure", response_model=ErasureJobRead, status_code=202)
+async def request_erasure(
+    payload: ErasureRequest,
+    response: Response,
+    principal: Principal = Depends(auth_dependency),
+    erasure: ErasureService = Depends(get_erasure),
+) -> ErasureJobRead:
+    if principal.role == "data_principal" and principal.subject != payload.data_principal_id:
+        raise HTTPException(status_code=403, detail="Data principals can only erase their own data")
+    job = await erasure.start(payload.data_principal_id, requested_by=principal.subject)
+    response.headers["Location"] = f"/api/rights/erasure/{job.id}"
+    return job
+
+
+@router.get("/erasure/{job_id}", response_model=ErasureJobRead)
+async def get_erasure_job(
+    job_id: int,
+    principal: Principal = Depends(auth_dependency),
+    erasure: ErasureService = Depends(get_erasure),
+) -> ErasureJobRead:
+    job = await erasure.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Erasure job not found")
+    # A job names the principal it erases, so only whoever requested it may follow it
+    if job.requested_by != principal.subject:
+        raise HTTPException(status_code=403, detail="Erasure jobs can only be read by their requester")
+    return job
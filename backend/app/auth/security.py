@@ -3,12 +3,17 @@ from __future__ import annotations
 import os
 import time
 from dataclasses import dataclass
-from typing import Optional
+from functools import lru_cache, partial
+from typing import Any, Dict, Optional
 
 import jwt
-from fastapi import Depends, HTTPException
+from cryptography.hazmat.primitives import serialization
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
+from ..core.executor import CpuExecutor
+from ..db.routing import session_key
+
 JWT_PRIVATE_KEY_PATH = os.getenv("JWT_PRIVATE_KEY_PATH", "backend/app/auth/keys/dev_rsa_private.pem")
 JWT_PUBLIC_KEY_PATH = os.getenv("JWT_PUBLIC_KEY_PATH", "backend/app/auth/keys/dev_rsa_public.pem")
 JWT_ISSUER = os.getenv("JWT_ISSUER", "nss.local")
@@ -24,6 +29,23 @@ def _read_key(path: str) -> str:
         return ""
 
 
+@lru_cache(maxsize=4)
+def _load_public_key(path: str, mtime_ns: int) -> Any:
+    # Keyed on mtime so a rotated key file is picked up without a restart
+    pem = _read_key(path)
+    if not pem:
+        return ""
+    return serialization.load_pem_public_key(pem.encode("utf-8"))
+
+
+def _public_key() -> Any:
+    try:
+        mtime_ns = os.stat(JWT_PUBLIC_KEY_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return ""
+    return _load_public_key(JWT_PUBLIC_KEY_PATH, mtime_ns)
+
+
 def issue_dev_token(role: str, sub: str) -> str:
     private_key = _read_key(JWT_PRIVATE_KEY_PATH)
     if not private_key:
@@ -40,6 +62,18 @@ def issue_dev_token(role: str, sub: str) -> str:
     return jwt.encode(payload, private_key, algorithm=JWT_ALG)
 
 
+def sign_payload(payload: Dict[str, Any]) -> str:
+    """Sign service statements (e.g. audit tree heads) as a compact JWS with the service key."""
+    private_key = _read_key(JWT_PRIVATE_KEY_PATH)
+    if not private_key:
+        raise RuntimeError("Private key not found. Run make gen-keys.")
+    return jwt.encode(payload, private_key, algorithm=JWT_ALG)
+
+
+def verify_signed_payload(token: str) -> Dict[str, Any]:
+    return jwt.decode(token, _public_key(), algorithms=[JWT_ALG])
+
+
 security = HTTPBearer(auto_error=False)
 
 
@@ -49,16 +83,29 @@ class Principal:
     role: str
 
 
-async def auth_dependency(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> Principal:
+async def verify_token(token: str, executor: Optional[CpuExecutor] = None) -> Dict[str, Any]:
+    """Claims of a valid token; verified on ``executor``'s threads when given, else inline."""
+    decode = partial(
+        jwt.decode, token, _public_key(), algorithms=[JWT_ALG], audience=JWT_AUDIENCE, issuer=JWT_ISSUER
+    )
+    return await executor.offload(decode) if executor is not None else decode()
+
+
+async def auth_dependency(
+    request: Request, credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+) -> Principal:
     if not credentials:
         raise HTTPException(status_code=401, detail="Missing authorization")
-    token = credentials.credentials
-    public_key = _read_key(JWT_PUBLIC_KEY_PATH)
+    # The app's services, once created; looked up on app.state since the container imports this module
+    services = getattr(request.app.state, "services", None)
+    executor = services.executor if services is not None and services.jwt_verify_offload else None
     try:
-        claims = jwt.decode(token, public_key, algorithms=[JWT_ALG], audience=JWT_AUDIENCE, issuer=JWT_ISSUER)
+        claims = await verify_token(credentials.credentials, executor)
     except jwt.PyJWTError as exc:  # type: ignore[attr-defined]
         raise HTTPException(status_code=401, detail="Invalid token") from exc
     role = claims.get("role", "data_principal")
+    # Lets consent reads after this caller's own writes skip lagging replicas
+    session_key.set(f"sub:{claims.get('sub', 'unknown')}")
     return Principal(subject=str(claims.get("sub", "unknown")), role=str(role))
 
 
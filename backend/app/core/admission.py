@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+from starlette.responses import JSONResponse
+
+# Never queued or shed: liveness/readiness, metrics scrapes and consent withdrawal
+PRIORITY_ROUTES: Tuple[Tuple[str, str], ...] = (
+    ("GET", "/api/health/"),
+    ("GET", "/metrics"),
+    ("DELETE", "/api/consents/"),
+    ("POST", "/api/consents/bulk-withdraw"),
+)
+# (method, path) -> route class with its own adaptive limit; numeric path segments are matched by "{id}".
+# The consent change feed is left out: its long-polls are slow by design and would only drive a limit down.
+LIMITED_ROUTES: Dict[Tuple[str, str], str] = {
+    ("POST", "/api/ingest"): "ingest",
+    ("POST", "/api/consents/bulk"): "bulk_import",
+    ("GET", "/api/rights/export"): "export",
+    ("GET", "/api/consents/export"): "export",
+    ("GET", "/api/consents"): "consent_read",
+    ("GET", "/api/consents/{id}"): "consent_read",
+}
+# Route class -> (target latency in ms, initial limit); imports and exports are whole streams, so their
+# target is the time one of them may take, not a per-request budget
+ROUTE_CLASS_DEFAULTS: Dict[str, Tuple[int, int]] = {
+    "ingest": (250, 32),
+    "consent_read": (250, 64),
+    "bulk_import": (30_000, 4),
+    "export": (30_000, 4),
+}
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+INFLIGHT = Gauge("admission_inflight_requests", "Requests being served per route class", ["route_class"])
+LIMIT = Gauge("admission_concurrency_limit", "Current adaptive concurrency limit per route class", ["route_class"])
+QUEUE_DEPTH = Gauge("admission_queue_depth", "Requests waiting for a slot per route class", ["route_class"])
+SHED = Counter("admission_shed_total", "Requests rejected with 503 per route class", ["route_class", "reason"])
+
+
+class AdaptiveLimit:
+    """AIMD concurrency limit driven by observed latency.
+
+    A request that finishes within ``target_latency`` grows the limit by ``1 / limit`` (about +1 per
+    limit's worth of completions) while the limit is what is holding requests back; one that takes
+    longer multiplies it by ``backoff``, at most once per ``target_latency`` so a single slow burst
+    does not collapse it. Requests over the limit wait in a FIFO of at most ``max_queue`` entries for
+    up to ``queue_timeout`` seconds, and are shed after that.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        target_latency: float,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 1024,
+        max_queue: int = 64,
+        queue_timeout: float = 0.1,
+        backoff: float = 0.9,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.target_latency = target_latency
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.backoff = backoff
+        self.inflight = 0
+        self._clock = clock
+        self._last_decrease = float("-inf")
+        self._waiters: Deque[asyncio.Future[None]] = deque()
+        LIMIT.labels(route_class=name).set(self.limit)
+
+    @classmethod
+    def from_env(cls, name: str) -> "AdaptiveLimit":
+        prefix = f"{name.upper()}_ADMISSION"
+        target_ms, initial = ROUTE_CLASS_DEFAULTS.get(name, (250, 32))
+        return cls(
+            name,
+            target_latency=float(os.getenv(f"{prefix}_TARGET_MS", str(target_ms))) / 1000,
+            initial=int(os.getenv(f"{prefix}_INITIAL_LIMIT", str(initial))),
+            min_limit=int(os.getenv(f"{prefix}_MIN_LIMIT", "1")),
+            max_limit=int(os.getenv(f"{prefix}_MAX_LIMIT", "1024")),
+            max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", "64")),
+            queue_timeout=float(os.getenv(f"{prefix}_QUEUE_TIMEOUT_MS", "100")) / 1000,
+        )
+
+    def _update_gauges(self) -> None:
+        INFLIGHT.labels(route_class=self.name).set(self.inflight)
+        QUEUE_DEPTH.labels(route_class=self.name).set(len(self._waiters))
+
+    async def acquire(self) -> Optional[str]:
+        """Take a slot; returns None when admitted, else why the request should be shed."""
+        if self.inflight < int(self.limit) and not self._waiters:
+            self.inflight += 1
+            self._update_gauges()
+            return None
+        if len(self._waiters) >= self.max_queue:
+            return "queue_full"
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._update_gauges()
+        try:
+            # release() hands its slot over by resolving the future, leaving ``inflight`` unchanged
+            await asyncio.wait_for(waiter, self.queue_timeout)
+            return None
+        except asyncio.TimeoutError:
+            return "queue_timeout"
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Handed a slot just as the client went away: pass it on
+                self._free()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._update_gauges()
+
+    def release(self, latency: float) -> None:
+        self._adjust(latency)
+        self._free()
+
+    def _free(self) -> None:
+        while self._waiters and self.inflight <= int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._update_gauges()
+                return
+        self.inflight -= 1
+        self._update_gauges()
+
+    def _adjust(self, latency: float) -> None:
+        if latency > self.target_latency:
+            now = self._clock()
+            if now - self._last_decrease >= self.target_latency:
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._last_decrease = now
+        elif self.inflight >= int(self.limit):
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+        LIMIT.labels(route_class=self.name).set(self.limit)
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """Class of a request: "priority" (never shed), a limited class name, or None (not controlled)."""
+    for priority_method, prefix in PRIORITY_ROUTES:
+        if method == priority_method and path.startswith(prefix):
+            return "priority"
+    return LIMITED_ROUTES.get((method, _ID_SEGMENT.sub("/{id}", path.rstrip("/"))))
+
+
+class AdmissionController:
+    """ASGI middleware bounding in-flight requests per route class and shedding the excess with 503."""
+
+    def __init__(self, app, limits: Optional[Dict[str, AdaptiveLimit]] = None):
+        self.app = app
+        self.enabled = os.getenv("ADMISSION_CONTROL", "true").lower() == "true"
+        self.retry_after = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+        self.limits = limits if limits is not None else {
+            name: AdaptiveLimit.from_env(name) for name in set(LIMITED_ROUTES.values())
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+        limit = self.limits.get(route_class(scope["method"], scope["path"]) or "")
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        reason = await limit.acquire()
+        if reason is not None:
+            SHED.labels(route_class=limit.name, reason=reason).inc()
+            response = JSONResponse(
+                {"detail": "Server is overloaded, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.release(time.perf_counter() - start)
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import zlib
+from bisect import bisect_right
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, cast
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.orm import AuditSegment
+
+# Segment file layout (little-endian), immutable once written:
+#   header   magic, level, events per block, first leaf, section offsets, subtree root
+#   nodes    every node of the perfect subtree, level 0 first, as raw 32-byte digests
+#   ids      (event_id u64, leaf offset u32) sorted by event_id, for binary search
+#   blocks   (block count + 1) u64 offsets, then zlib-compressed NDJSON blocks of events in leaf order
+SEGMENT_MAGIC = b"NSSAUDS1"
+_HEADER = struct.Struct("<8sBxxxIQQQQQQ32s")
+_ID_ENTRY = struct.Struct("<QI")
+_OFFSET = struct.Struct("<Q")
+_DIGEST_SIZE = 32
+
+DEFAULT_ARCHIVE_DIR = "archive/audit"
+DEFAULT_BLOCK_EVENTS = 256
+
+
+class LeafRow(NamedTuple):
+    id: int
+    leaf_index: int
+    hash: str
+
+
+def segment_name(first_leaf: int, level: int) -> str:
+    return f"{first_leaf:015d}-{level:02d}.seg"
+
+
+def write_segment(
+    directory: Path,
+    first_leaf: int,
+    levels: Sequence[Sequence[str]],
+    records: Sequence[Dict[str, Any]],
+    block_events: int = DEFAULT_BLOCK_EVENTS,
+) -> Path:
+    """Write one sealed subtree: ``levels`` are its hex node hashes from the leaves up, ``records``
+    its events in leaf order. The file is fsynced under a temporary name, then renamed into place."""
+    level = len(levels) - 1
+    if len(records) != 1 << level or any(len(nodes) != 1 << (level - i) for i, nodes in enumerate(levels)):
+        raise ValueError("segment must hold one complete subtree")
+    nodes = b"".join(bytes.fromhex(node) for nodes in levels for node in nodes)
+    ids = b"".join(
+        _ID_ENTRY.pack(event_id, offset)
+        for event_id, offset in sorted((record["id"], offset) for offset, record in enumerate(records))
+    )
+    blocks: List[bytes] = []
+    for start in range(0, len(records), block_events):
+        lines = (json.dumps(record, separators=(",", ":")) for record in records[start : start + block_events])
+        blocks.append(zlib.compress("\n".join(lines).encode("utf-8"), 6))
+    offsets = [0]
+    for block in blocks:
+        offsets.append(offsets[-1] + len(block))
+
+    nodes_offset = _HEADER.size
+    ids_offset = nodes_offset + len(nodes)
+    blocks_offset = ids_offset + len(ids)
+    header = _HEADER.pack(
+        SEGMENT_MAGIC,
+        level,
+        block_events,
+        first_leaf,
+        nodes_offset,
+        ids_offset,
+        blocks_offset,
+        len(blocks),
+        len(records),
+        bytes.fromhex(levels[-1][0]),
+    )
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / segment_name(first_leaf, level)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(header)
+        fh.write(nodes)
+        fh.write(ids)
+        fh.write(b"".join(_OFFSET.pack(offset) for offset in offsets))
+        for block in blocks:
+            fh.write(block)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+    return path
+
+
+class Segment:
+    """Read-only, mmap-backed view of a segment file; nothing is loaded until it is touched."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            self.level,
+            self.block_events,
+            self.first_leaf,
+            self._nodes_offset,
+            self._ids_offset,
+            self._blocks_offset,
+            self._block_count,
+            self.size,
+            root,
+        ) = _HEADER.unpack_from(self._map, 0)
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"{path} is not an audit segment")
+        self.root = root.hex()
+        self._level_offsets = []
+        offset = self._nodes_offset
+        for level in range(self.level + 1):
+            self._level_offsets.append(offset)
+            offset += (self.size >> level) * _DIGEST_SIZE
+        self._block_data = self._blocks_offset + (self._block_count + 1) * _OFFSET.size
+        self._cached_block: Optional[tuple[int, List[bytes]]] = None
+        self.min_id = self._id_entry(0)[0]
+        self.max_id = self._id_entry(self.size - 1)[0]
+
+    def covers(self, leaf_index: int) -> bool:
+        return self.first_leaf <= leaf_index < self.first_leaf + self.size
+
+    def node(self, level: int, idx: int) -> str:
+        offset = self._level_offsets[level] + (idx - (self.first_leaf >> level)) * _DIGEST_SIZE
+        return self._map[offset : offset + _DIGEST_SIZE].hex()
+
+    def level_hashes(self, level: int) -> List[str]:
+        start = self._level_offsets[level]
+        data = self._map[start : start + (self.size >> level) * _DIGEST_SIZE]
+        return [data[i : i + _DIGEST_SIZE].hex() for i in range(0, len(data), _DIGEST_SIZE)]
+
+    def _id_entry(self, position: int) -> tuple[int, int]:
+        return _ID_ENTRY.unpack_from(self._map, self._ids_offset + position * _ID_ENTRY.size)
+
+    def leaf_offset(self, event_id: int) -> Optional[int]:
+        if not self.min_id <= event_id <= self.max_id:
+            return None
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._id_entry(mid)[0] < event_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.size:
+            found, offset = self._id_entry(lo)
+            if found == event_id:
+                return offset
+        return None
+
+    def leaf_offsets(self, start_id: Optional[int], end_id: Optional[int]) -> List[tuple[int, int]]:
+        """(leaf offset, event id) of events whose id lies in ``[start_id, end_id]``, in leaf order."""
+        lo, hi = 0, self.size
+        if start_id is not None:
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._id_entry(mid)[0] < start_id:
+                    lo = mid + 1
+                else:
+                    hi = mid
+        offsets = []
+        for position in range(lo, self.size):
+            event_id, offset = self._id_entry(position)
+            if end_id is not None and event_id > end_id:
+                break
+            offsets.append((offset, event_id))
+        return sorted(offsets)
+
+    def _block(self, number: int) -> List[bytes]:
+        if self._cached_block is None or self._cached_block[0] != number:
+            start, end = struct.unpack_from("<QQ", self._map, self._blocks_offset + number * _OFFSET.size)
+            raw = self._map[self._block_data + start : self._block_data + end]
+            self._cached_block = (number, zlib.decompress(raw).split(b"\n"))
+        return self._cached_block[1]
+
+    def record(self, offset: int) -> Dict[str, Any]:
+        return json.loads(self._block(offset // self.block_events)[offset % self.block_events])
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        for number in range(self._block_count):
+            for line in self._block(number):
+                yield json.loads(line)
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+class AuditArchive:
+    """Catalog of archived segments (rows of ``audit_segments``) with their files mapped on demand."""
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = Path(directory or os.getenv("AUDIT_ARCHIVE_DIR") or DEFAULT_ARCHIVE_DIR)
+        # Events per compressed block in segments written from here
+        self.block_events = int(os.getenv("AUDIT_ARCHIVE_BLOCK_EVENTS", str(DEFAULT_BLOCK_EVENTS)))
+        self._segments: List[Segment] = []
+        self._firsts: List[int] = []
+
+    @property
+    def next_leaf(self) -> int:
+        return self._segments[-1].first_leaf + self._segments[-1].size if self._segments else 0
+
+    async def refresh(self, session: AsyncSession) -> None:
+        rows = (await session.execute(select(AuditSegment).order_by(AuditSegment.first_leaf))).scalars().all()
+        opened: Dict[str, Optional[Segment]] = {segment.path.name: segment for segment in self._segments}
+        segments = [opened.pop(row.path, None) or Segment(self.directory / row.path) for row in rows]
+        for stale in opened.values():
+            if stale is not None:
+                stale.close()
+        self._segments = segments
+        self._firsts = [segment.first_leaf for segment in segments]
+
+    def segment_for_leaf(self, leaf_index: int) -> Optional[Segment]:
+        position = bisect_right(self._firsts, leaf_index) - 1
+        if position >= 0 and self._segments[position].covers(leaf_index):
+            return self._segments[position]
+        return None
+
+    def node(self, level: int, idx: int) -> Optional[str]:
+        segment = self.segment_for_leaf(idx << level)
+        if segment is None or level > segment.level:
+            return None
+        return segment.node(level, idx)
+
+    def event(self, event_id: int) -> Optional[Dict[str, Any]]:
+        leaf_index = self.leaf_index(event_id)
+        if leaf_index is None:
+            return None
+        segment = cast(Segment, self.segment_for_leaf(leaf_index))
+        return segment.record(leaf_index - segment.first_leaf)
+
+    def leaf_index(self, event_id: int) -> Optional[int]:
+        for segment in self._segments:
+            offset = segment.leaf_offset(event_id)
+            if offset is not None:
+                return segment.first_leaf + offset
+        return None
+
+    def leaf_rows(self, start_id: Optional[int], end_id: Optional[int], size: int) -> Iterator[LeafRow]:
+        for segment in self._segments:
+            for offset, event_id in segment.leaf_offsets(start_id, end_id):
+                leaf_index = segment.first_leaf + offset
+                if leaf_index >= size:
+                    return
+                yield LeafRow(event_id, leaf_index, segment.node(0, leaf_index))
+
+    def close(self) -> None:
+        for segment in self._segments:
+            segment.close()
+        self._segments, self._firsts = [], []
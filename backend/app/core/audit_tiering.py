@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+
+from .merkle_audit import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+async def run_once(audit: AuditLog) -> int:
+    """Archive every sealed segment currently due; returns how many were written."""
+    written = 0
+    while (segment := await audit.archive_sealed_segment()) is not None:
+        logger.info("archived audit segment", extra=segment)
+        written += 1
+    return written
+
+
+async def main() -> None:
+    audit = AuditLog()
+    poll_seconds = int(os.getenv("AUDIT_ARCHIVE_POLL_SECONDS", "300"))
+    while True:
+        await run_once(audit)
+        await asyncio.sleep(poll_seconds)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, TypeVar
+
+T = TypeVar("T")
+
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+CSV_TYPES = {"text/csv", "application/csv"}
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r").decode("utf-8")
+    if buffer.strip():
+        yield buffer.rstrip(b"\r").decode("utf-8")
+
+
+async def iter_records(chunks: AsyncIterator[bytes], content_type: str) -> AsyncIterator[Dict[str, Any]]:
+    """Parse a streamed NDJSON or CSV body into dict rows without buffering the whole body.
+
+    CSV input needs a header row; quoted fields must not span lines.
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type not in NDJSON_TYPES | CSV_TYPES:
+        raise ValueError(f"unsupported content type {media_type!r}; use NDJSON or CSV")
+    header: List[str] | None = None
+    line_no = 0
+    async for line in iter_lines(chunks):
+        line_no += 1
+        if not line.strip():
+            continue
+        if media_type in NDJSON_TYPES:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"line {line_no}: invalid JSON") from exc
+            if not isinstance(row, dict):
+                raise ValueError(f"line {line_no}: expected a JSON object")
+            yield row
+            continue
+        fields = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in fields]
+            continue
+        if len(fields) != len(header):
+            raise ValueError(f"line {line_no}: expected {len(header)} fields, got {len(fields)}")
+        yield dict(zip(header, fields))
+
+
+async def batched(rows: AsyncIterator[T], size: int) -> AsyncIterator[List[T]]:
+    batch: List[T] = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
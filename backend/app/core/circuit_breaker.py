@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from prometheus_client import Counter, Gauge
+
+T = TypeVar("T")
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+BREAKER_STATE = Gauge(
+    "dependency_circuit_state", "Circuit breaker state per dependency (0 closed, 1 half-open, 2 open)", ["dependency"]
+)
+BREAKER_CALLS = Counter(
+    "dependency_calls_total", "Calls through a dependency's circuit breaker", ["dependency", "result"]
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a per-call deadline.
+
+    ``failure_threshold`` failures or timeouts in a row open the circuit; calls are then rejected
+    without touching the dependency until ``reset_seconds`` have passed. The circuit then goes
+    half-open and lets ``half_open_max_calls`` probes through: a success closes it, a failure opens
+    it again. Settings default to ``<NAME>_BREAKER_FAILURE_THRESHOLD``, ``<NAME>_BREAKER_RESET_SECONDS``,
+    ``<NAME>_BREAKER_HALF_OPEN_CALLS`` and ``<NAME>_CALL_TIMEOUT_SECONDS`` from the environment.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: Optional[int] = None,
+        reset_seconds: Optional[float] = None,
+        half_open_max_calls: Optional[int] = None,
+        timeout: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        prefix = name.upper()
+        self.name = name
+        # Explicit arguments win even when zero (e.g. ``reset_seconds=0`` to probe again at once)
+        if failure_threshold is None:
+            failure_threshold = int(os.getenv(f"{prefix}_BREAKER_FAILURE_THRESHOLD", "5"))
+        if reset_seconds is None:
+            reset_seconds = float(os.getenv(f"{prefix}_BREAKER_RESET_SECONDS", "10"))
+        if half_open_max_calls is None:
+            half_open_max_calls = int(os.getenv(f"{prefix}_BREAKER_HALF_OPEN_CALLS", "1"))
+        if timeout is None:
+            timeout = float(os.getenv(f"{prefix}_CALL_TIMEOUT_SECONDS", "0.25"))
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.timeout = timeout
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        BREAKER_STATE.labels(dependency=name).set(_STATE_VALUES[CLOSED])
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    def _transition(self, state: str) -> None:
+        self._state = state
+        self._probes = 0
+        if state == OPEN:
+            self._opened_at = self._clock()
+        elif state == CLOSED:
+            self._failures = 0
+        BREAKER_STATE.labels(dependency=self.name).set(_STATE_VALUES[state])
+
+    def allow(self) -> bool:
+        """Whether a call may go to the dependency now; counts a probe while half-open."""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._probes < self.half_open_max_calls:
+            self._probes += 1
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self._state != CLOSED:
+            self._transition(CLOSED)
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._transition(OPEN)
+
+    async def call(self, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """Await ``fn(*args, **kwargs)`` within the deadline; raises ``CircuitOpenError`` while open."""
+        if not self.allow():
+            BREAKER_CALLS.labels(dependency=self.name, result="rejected").inc()
+            raise CircuitOpenError(self.name)
+        try:
+            result = await asyncio.wait_for(fn(*args, **kwargs), self.timeout)
+        except asyncio.TimeoutError:
+            BREAKER_CALLS.labels(dependency=self.name, result="timeout").inc()
+            self.record_failure()
+            raise
+        except Exception:
+            BREAKER_CALLS.labels(dependency=self.name, result="failure").inc()
+            self.record_failure()
+            raise
+        except BaseException:
+            # Cancelled by the caller: says nothing about the dependency, but frees the probe slot
+            if self._state == HALF_OPEN and self._probes:
+                self._probes -= 1
+            raise
+        BREAKER_CALLS.labels(dependency=self.name, result="success").inc()
+        self.record_success()
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self._failures}
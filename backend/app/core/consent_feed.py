@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, cast
+
+from sqlalchemy import Table, delete, func, insert, select
+
+from ..db.routing import ShardRouter, to_global_id
+from ..models.orm import ConsentChange, PendingConsentChange
+from ..models.schemas import ConsentChangeBatch, ConsentChangeRead
+
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 5000
+MAX_WAIT_SECONDS = 60
+# pg_advisory_xact_lock key ("nssfeed") serialising change sequencing across worker processes
+_SEQUENCE_LOCK_KEY = 0x6E737366656564
+_CHANGE_COLUMNS = [
+    "consent_id",
+    "data_principal_id",
+    "change",
+    "purpose",
+    "previous_purpose",
+    "scope",
+    "expires_at",
+    "active",
+    "created_at",
+]
+
+logger = logging.getLogger(__name__)
+
+
+def parse_cursor(cursor: Optional[str], shards: int) -> List[int]:
+    """Per-shard versions of a feed cursor: one integer per shard, joined by "."; empty means the start."""
+    if not cursor:
+        return [0] * shards
+    try:
+        versions = [int(part) for part in cursor.split(".")]
+    except ValueError:
+        raise ValueError("invalid change feed cursor") from None
+    if len(versions) != shards or min(versions) < 0:
+        raise ValueError("change feed cursor does not match the shard layout")
+    return versions
+
+
+def format_cursor(versions: Sequence[int]) -> str:
+    return ".".join(str(version) for version in versions)
+
+
+class ConsentChangeFeed:
+    """Reads ``consent_changes`` after a cursor, for long-polls, event streams and cache followers.
+
+    Versions grow per shard, so a cursor holds one version per shard; with a single shard it is just
+    the last version seen. Versions are given by ``sequence`` after the write has committed, one
+    sequencing transaction at a time, so they become visible in order: a reader never skips a late
+    commit, however long its transaction took. Gaps only come from erasure.
+    """
+
+    def __init__(
+        self,
+        router: ShardRouter,
+        *,
+        poll_seconds: Optional[float] = None,
+        keepalive: Optional[float] = None,
+    ) -> None:
+        self.router = router
+        # Waiting readers re-query this often for writes made by other processes; local writes wake them at once
+        self.poll_seconds = (
+            float(os.getenv("CONSENT_CHANGE_FEED_POLL_SECONDS", "1")) if poll_seconds is None else poll_seconds
+        )
+        # An idle server-sent event stream sends a comment this often so proxies keep it open
+        self.keepalive = (
+            float(os.getenv("CONSENT_CHANGE_FEED_KEEPALIVE_SECONDS", "15")) if keepalive is None else keepalive
+        )
+        self._changed = asyncio.Event()
+        self._locks: Dict[int, Tuple[asyncio.AbstractEventLoop, asyncio.Lock]] = {}
+
+    def _lock(self, shard: int) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        held = self._locks.get(shard)
+        if held is None or held[0] is not loop:
+            held = self._locks[shard] = (loop, asyncio.Lock())
+        return held[1]
+
+    async def sequence(self, *shards: int) -> int:
+        """Give committed changes staged in ``pending_consent_changes`` their versions; returns how many.
+
+        Called after a consent write commits, for the shards it wrote (all of them when none are
+        given). Changes left staged by a process that stopped in between go out with the next call.
+        """
+        moved = 0
+        for shard in shards or self.router.shard_ids():
+            async with self.router.write(shard) as session:
+                if await session.scalar(select(PendingConsentChange.id).limit(1)) is None:
+                    continue
+            async with self._lock(shard), self.router.write(shard) as session:
+                if session.bind.dialect.name == "postgresql":
+                    # Held only while this short transaction moves the rows, never across a consent write
+                    await session.execute(select(func.pg_advisory_xact_lock(_SEQUENCE_LOCK_KEY)))
+                # One statement takes the rows, so a change committing meanwhile is left for the next call
+                taken = (
+                    await session.execute(
+                        delete(PendingConsentChange).returning(
+                            PendingConsentChange.id, *(getattr(PendingConsentChange, c) for c in _CHANGE_COLUMNS)
+                        )
+                    )
+                ).all()
+                if taken:
+                    rows = [dict(zip(_CHANGE_COLUMNS, row[1:])) for row in sorted(taken, key=lambda row: row[0])]
+                    await session.execute(insert(cast(Table, ConsentChange.__table__)), rows)
+                moved += len(taken)
+        return moved
+
+    def notify(self) -> None:
+        """Wake readers waiting in this process; called after consent writes commit."""
+        # Waiters hold the event they started waiting on, so swapping in a fresh one wakes each exactly once
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def head(self) -> str:
+        """Cursor of the latest change on every shard, for readers that start from a snapshot."""
+
+        async def shard_head(shard: int) -> int:
+            async with self.router.read(shard) as session:
+                return int(await session.scalar(select(func.max(ConsentChange.id))) or 0)
+
+        return format_cursor(await asyncio.gather(*(shard_head(shard) for shard in self.router.shard_ids())))
+
+    def _to_read(self, row: ConsentChange, shard: int) -> ConsentChangeRead:
+        shards = self.router.shards
+        return ConsentChangeRead(
+            version=to_global_id(row.id, shard, shards),
+            change=row.change,
+            consent_id=None if row.consent_id is None else to_global_id(row.consent_id, shard, shards),
+            data_principal_id=row.data_principal_id,
+            purpose=row.purpose,
+            previous_purpose=row.previous_purpose,
+            scope=row.scope,
+            expires_at=row.expires_at,
+            active=row.active,
+            changed_at=row.created_at,
+        )
+
+    async def read(self, cursor: Sequence[int], limit: int = DEFAULT_BATCH_SIZE) -> ConsentChangeBatch:
+        """Up to ``limit`` changes after ``cursor`` (per-shard versions), oldest first."""
+
+        async def shard_changes(shard: int) -> List[ConsentChange]:
+            async with self.router.read(shard) as session:
+                stmt = (
+                    select(ConsentChange)
+                    .where(ConsentChange.id > cursor[shard])
+                    .order_by(ConsentChange.id)
+                    .limit(limit)
+                )
+                return list((await session.execute(stmt)).scalars())
+
+        shard_ids = list(self.router.shard_ids())
+        per_shard = await asyncio.gather(*(shard_changes(shard) for shard in shard_ids))
+        # Interleave shards by time but keep each shard's version order, so the batch is a prefix of every shard
+        merged = heapq.merge(
+            *([(shard, row) for row in rows] for shard, rows in zip(shard_ids, per_shard)),
+            key=lambda item: item[1].created_at,
+        )
+        batch = list(itertools.islice(merged, limit))
+        versions = list(cursor)
+        for shard, row in batch:
+            versions[shard] = row.id
+        return ConsentChangeBatch(
+            changes=[self._to_read(row, shard) for shard, row in batch], cursor=format_cursor(versions)
+        )
+
+    async def wait(
+        self, cursor: Sequence[int], limit: int = DEFAULT_BATCH_SIZE, timeout: float = 0
+    ) -> ConsentChangeBatch:
+        """Like ``read``, but wait up to ``timeout`` seconds for a change when there is none yet (long-poll)."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            # Taken before reading, so a write committed during the read still wakes this wait
+            changed = self._changed
+            batch = await self.read(cursor, limit)
+            remaining = deadline - loop.time()
+            if batch.changes or remaining <= 0:
+                return batch
+            try:
+                await asyncio.wait_for(changed.wait(), min(remaining, self.poll_seconds))
+            except asyncio.TimeoutError:
+                pass
+
+    async def stream(
+        self, cursor: Sequence[int], limit: int = DEFAULT_BATCH_SIZE, keepalive: Optional[float] = None
+    ) -> AsyncIterator[ConsentChangeBatch]:
+        """Batches as changes arrive, forever; an empty batch after ``keepalive`` idle seconds."""
+        keepalive = self.keepalive if keepalive is None else keepalive
+        while True:
+            batch = await self.wait(cursor, limit, keepalive)
+            yield batch
+            cursor = parse_cursor(batch.cursor, self.router.shards)
+
+
+async def follow_changes(
+    feed: ConsentChangeFeed,
+    apply: Callable[[List[ConsentChangeRead]], Awaitable[None]],
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> None:
+    """Pass every change committed from now on to ``apply``, batch by batch, until cancelled.
+
+    A batch that fails is retried, so ``apply`` must be idempotent (cache invalidation is).
+    """
+    cursor: Optional[List[int]] = None
+    while True:
+        try:
+            if cursor is None:
+                cursor = parse_cursor(await feed.head(), feed.router.shards)
+            batch = await feed.wait(cursor, batch_size, feed.keepalive)
+            if batch.changes:
+                await apply(batch.changes)
+            cursor = parse_cursor(batch.cursor, feed.router.shards)
+        except Exception:  # noqa: BLE001
+            logger.exception("failed to follow consent changes")
+            await asyncio.sleep(feed.poll_seconds)
@@ -1,43 +1,223 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
 import json
 import os
-from typing import Optional, List
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import datetime
+from json.encoder import encode_basestring
+from typing import Any, AsyncIterator, Dict, FrozenSet, Mapping, Optional, List, Sequence, Tuple, cast
 
 import redis.asyncio as aioredis
+from prometheus_client import Counter
+from pydantic import TypeAdapter
+from sqlalchemy import (
+    ColumnElement,
+    DateTime,
+    String,
+    Table,
+    and_,
+    delete,
+    exists,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    text,
+    type_coerce,
+    update,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..db.routing import ShardRouter, from_global_id, shard_for, to_global_id
 from ..db.session import get_session
-from ..models.orm import Consent
-from ..models.schemas import ConsentCreate, ConsentRead, ConsentUpdate
+from ..models.orm import Consent, ConsentChange, PendingConsentChange
+from ..models.schemas import ConsentChangeRead, ConsentCreate, ConsentRead, ConsentUpdate
+from .circuit_breaker import CircuitBreaker
+from .consent_feed import ConsentChangeFeed
 from .merkle_audit import AuditLog
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Rough per-key bookkeeping cost in Redis (dict entry, robj headers, expiry) used for warm-up budgeting
+CACHE_ENTRY_OVERHEAD_BYTES = 64
+
+CACHE_HITS = Counter("consent_cache_hits_total", "Consent checks answered from the cache")
+CACHE_MISSES = Counter("consent_cache_misses_total", "Consent checks that fell back to the database")
+
+_CONSENT_COLUMNS = (
+    Consent.id,
+    Consent.data_principal_id,
+    Consent.purpose,
+    Consent.scope,
+    Consent.expires_at,
+    Consent.active,
+)
+# pydantic's own datetime rendering, for offsets other than UTC
+_dump_datetime = TypeAdapter(datetime).dump_json
+
+
+def _datetime_json(value: datetime) -> str:
+    offset = value.utcoffset()
+    if offset is None:
+        return f'"{value.isoformat()}"'
+    if not offset:
+        # pydantic writes UTC as "Z", not "+00:00"
+        return f'"{value.replace(tzinfo=None).isoformat()}Z"'
+    return _dump_datetime(value).decode()
+
+
+def consent_json(row: Any, consent_id: int) -> str:
+    """JSON of a ``ConsentRead`` from a ``_CONSENT_COLUMNS`` row, without building or validating the model.
+
+    Byte-identical to ``ConsentRead.model_dump_json()``: same keys in the same order, strings not
+    ASCII-escaped. At ~2 us a row it is under half the cost of constructing the model and having
+    FastAPI validate and serialise it again.
+    """
+    expires_at = "null" if row.expires_at is None else _datetime_json(row.expires_at)
+    return (
+        f'{{"data_principal_id":{encode_basestring(row.data_principal_id)},'
+        f'"purpose":{encode_basestring(row.purpose)},'
+        f'"scope":[{",".join(map(encode_basestring, row.scope))}],"expires_at":{expires_at},"id":{consent_id},'
+        f'"active":{"true" if row.active else "false"}}}'
+    )
+
+
+def scope_includes(fields: Sequence[str], dialect: str) -> ColumnElement[bool]:
+    """Consents whose scope contains every one of ``fields``, evaluated in the database."""
+    if dialect == "postgresql":
+        # JSONB containment, answered from the GIN index
+        return type_coerce(Consent.scope, JSONB).contains(list(fields))
+    clauses = []
+    for field in fields:
+        element = func.json_each(Consent.scope).table_valued("value")
+        clauses.append(exists(select(1).select_from(element).where(element.c.value == field)))
+    return and_(*clauses)
+
+
+# Every cached key of a principal is listed in this set, so erasure can drop them without a SCAN
+_PRINCIPAL_INDEX_PREFIX = "consent-index:"
+# Deletes the indexed keys and the index itself in one atomic round trip. The keys are not passed
+# in KEYS, so on Redis Cluster this needs the index and consent keys in one slot (a shared hash tag)
+_PURGE_PRINCIPAL_SCRIPT = """
+local keys = redis.call('SMEMBERS', KEYS[1])
+for i = 1, #keys, 1000 do
+    redis.call('DEL', unpack(keys, i, math.min(i + 999, #keys)))
+end
+redis.call('DEL', KEYS[1])
+return #keys
+"""
+
+
+def principal_index_key(data_principal_id: str) -> str:
+    return f"{_PRINCIPAL_INDEX_PREFIX}{data_principal_id}"
+
+
+CACHE_FORMAT_VERSION = 1
+_ACTIVE_FLAG = 0x01
+_SCOPE_SEP = "\x1f"
+
+
+@dataclass(frozen=True, slots=True)
+class CachedConsent:
+    active: bool
+    scope: Tuple[str, ...]
+
+
+def encode_cached_consent(active: bool, scope: Sequence[str]) -> bytes:
+    # [version][flags][scope fields joined by \x1f] -- ~11 bytes for a two-field scope vs ~42 as JSON
+    header = bytes((CACHE_FORMAT_VERSION, _ACTIVE_FLAG if active else 0))
+    return header + _SCOPE_SEP.join(scope).encode("utf-8")
+
+
+def decode_cached_consent(raw: bytes | str) -> Optional[CachedConsent]:
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    if raw[:1] == b"{":
+        # Entries written by the previous JSON encoding stay readable until their TTL runs out
+        try:
+            info = json.loads(raw)
+        except ValueError:
+            return None
+        return CachedConsent(active=bool(info.get("active")), scope=tuple(info.get("scope", ())))
+    if len(raw) < 2 or raw[0] != CACHE_FORMAT_VERSION:
+        return None
+    body = raw[2:].decode("utf-8")
+    return CachedConsent(active=bool(raw[1] & _ACTIVE_FLAG), scope=tuple(body.split(_SCOPE_SEP)) if body else ())
+
+
+def cached_consent_active(raw: bytes | str) -> bool:
+    # Hot path for has_valid_consent: only the flags byte is inspected, the scope is never decoded
+    if isinstance(raw, bytes) and len(raw) >= 2 and raw[0] == CACHE_FORMAT_VERSION:
+        return bool(raw[1] & _ACTIVE_FLAG)
+    entry = decode_cached_consent(raw)
+    return entry is not None and entry.active
+
+
+def compile_scope(raw: bytes | str) -> Optional[FrozenSet[str]]:
+    """Fields covered by an encoded cache entry, or None if its consent is not active.
+
+    ``ConsentService.compiled_scope`` memoises this by the entry bytes, so the scope is decoded and
+    frozen once and shared by every principal and request with the same scope; checking a payload
+    against it is then one set operation.
+    """
+    entry = decode_cached_consent(raw)
+    if entry is None or not entry.active:
+        return None
+    return frozenset(entry.scope)
+
 
 class ConsentCache:
     def __init__(self) -> None:
         url = os.getenv("REDIS_URL")
         self.allow_fallback = os.getenv("ALLOW_INMEMORY_CACHE_FALLBACK", "false").lower() == "true"
-        self.memory_cache: dict[str, str] = {}
+        self.memory_cache: dict[str, bytes] = {}
+        self.memory_index: dict[str, set[str]] = {}
         self.redis: Optional[aioredis.Redis] = None
+        # Deadline and breaker on every Redis call, so a slow or dead Redis costs microseconds, not timeouts
+        self.breaker = CircuitBreaker("redis")
+        # Multi-key pipelines and the purge script legitimately take longer than one command; their own
+        # breaker keeps them from tripping (or being tripped by) the per-request one
+        self.bulk_breaker = CircuitBreaker(
+            "redis_bulk", timeout=float(os.getenv("REDIS_BULK_CALL_TIMEOUT_SECONDS", "2"))
+        )
+        # Multi-key cache calls are split into pipelines of this many keys, each under the bulk deadline
+        self.pipeline_chunk_size = int(os.getenv("REDIS_PIPELINE_CHUNK_SIZE", "1000"))
         if url:
             try:
-                self.redis = aioredis.from_url(url, decode_responses=True)
+                # A blocking pool makes bursts wait for a free connection instead of opening unbounded sockets
+                pool = aioredis.BlockingConnectionPool.from_url(
+                    url,
+                    max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+                    timeout=float(os.getenv("REDIS_POOL_TIMEOUT_SECONDS", "5")),
+                )
+                self.redis = aioredis.Redis(connection_pool=pool)
             except Exception:  # noqa: BLE001
                 self.redis = None
 
-    async def get(self, key: str) -> Optional[str]:
+    async def get(self, key: str) -> Optional[bytes]:
         if self.redis is not None:
             try:
-                return await self.redis.get(key)
+                return await self.breaker.call(self.redis.get, key)
             except Exception:  # noqa: BLE001
                 pass
         if self.allow_fallback:
             return self.memory_cache.get(key)
         return None
 
-    async def set(self, key: str, value: str, ttl_seconds: int = 300) -> None:
+    async def set(self, key: str, value: bytes, ttl_seconds: int = 300, *, principal: Optional[str] = None) -> None:
+        if principal is not None:
+            await self.set_many({key: value}, ttl_seconds, principals={key: principal})
+            return
         if self.redis is not None:
             try:
-                await self.redis.set(key, value, ex=ttl_seconds)
+                await self.breaker.call(self.redis.set, key, value, ex=ttl_seconds)
                 return
             except Exception:  # noqa: BLE001
                 pass
@@ -47,162 +227,754 @@ class ConsentCache:
     async def delete(self, key: str) -> None:
         if self.redis is not None:
             try:
-                await self.redis.delete(key)
+                await self.breaker.call(self.redis.delete, key)
                 return
             except Exception:  # noqa: BLE001
                 pass
         if self.allow_fallback:
             self.memory_cache.pop(key, None)
 
+    def _breaker_for(self, keys: int) -> CircuitBreaker:
+        return self.breaker if keys == 1 else self.bulk_breaker
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+        if self.redis is not None:
+            try:
+                values: List[Optional[bytes]] = []
+                for start in range(0, len(keys), self.pipeline_chunk_size):
+                    chunk = keys[start : start + self.pipeline_chunk_size]
+                    values.extend(await self._breaker_for(len(keys)).call(self.redis.mget, chunk))
+                return values
+            except Exception:  # noqa: BLE001
+                pass
+        if self.allow_fallback:
+            return [self.memory_cache.get(key) for key in keys]
+        return [None] * len(keys)
+
+    async def set_many(
+        self, items: Mapping[str, bytes], ttl_seconds: int = 300, *, principals: Optional[Mapping[str, str]] = None
+    ) -> None:
+        """Set ``items``; keys found in ``principals`` are also added to that principal's key index.
+
+        Large batches go to Redis in pipelines of ``pipeline_chunk_size`` keys; if one fails, it and
+        the rest of the batch go to the in-memory fallback (when allowed).
+        """
+        if not items:
+            return
+        principals = principals or {}
+        entries = list(items.items())
+        start = 0
+        if self.redis is not None:
+            breaker = self._breaker_for(len(entries))
+            try:
+                for start in range(0, len(entries), self.pipeline_chunk_size):
+                    chunk = entries[start : start + self.pipeline_chunk_size]
+                    pipe = self.redis.pipeline(transaction=False)
+                    for key, value in chunk:
+                        pipe.set(key, value, ex=ttl_seconds)
+                    for index, keys in self._indexed(chunk, principals).items():
+                        # The index outlives its entries by at most one TTL; stale members are harmless
+                        pipe.sadd(index, *keys)
+                        pipe.expire(index, ttl_seconds)
+                    await breaker.call(pipe.execute)
+                return
+            except Exception:  # noqa: BLE001
+                pass
+        if self.allow_fallback:
+            self.memory_cache.update(entries[start:])
+            for index, keys in self._indexed(entries[start:], principals).items():
+                self.memory_index.setdefault(index, set()).update(keys)
+
+    @staticmethod
+    def _indexed(entries: Sequence[Tuple[str, bytes]], principals: Mapping[str, str]) -> Dict[str, List[str]]:
+        indexed: Dict[str, List[str]] = {}
+        for key, _ in entries:
+            principal = principals.get(key)
+            if principal is not None:
+                indexed.setdefault(principal_index_key(principal), []).append(key)
+        return indexed
+
+    async def delete_many(self, keys: Sequence[str]) -> None:
+        if not keys:
+            return
+        if self.redis is not None:
+            try:
+                for start in range(0, len(keys), self.pipeline_chunk_size):
+                    chunk = keys[start : start + self.pipeline_chunk_size]
+                    await self._breaker_for(len(keys)).call(self.redis.delete, *chunk)
+                return
+            except Exception:  # noqa: BLE001
+                pass
+        if self.allow_fallback:
+            for key in keys:
+                self.memory_cache.pop(key, None)
+
+    async def aclose(self) -> None:
+        if self.redis is not None:
+            await self.redis.aclose()
+            # The pool was passed in explicitly, so closing the client leaves its sockets open
+            await self.redis.connection_pool.disconnect()
+            self.redis = None
+
+    async def purge_principal(self, data_principal_id: str) -> int:
+        """Drop every cached key of one principal; returns how many keys were indexed."""
+        index = principal_index_key(data_principal_id)
+        purged = 0
+        if self.redis is not None:
+            try:
+                # EVALSHA, falling back to EVAL the first time the server sees the script
+                script = self.redis.register_script(_PURGE_PRINCIPAL_SCRIPT)
+                purged = int(await self.bulk_breaker.call(script, keys=[index]))
+            except Exception:  # noqa: BLE001
+                pass
+        if self.allow_fallback:
+            keys = self.memory_index.pop(index, set())
+            for key in keys:
+                self.memory_cache.pop(key, None)
+            purged = max(purged, len(keys))
+        return purged
+
 
 class ConsentService:
-    def __init__(self) -> None:
-        self.cache = ConsentCache()
-        self.audit = AuditLog()
+    """Consent storage, routed through a ``ShardRouter``.
+
+    Consents are placed on a shard by a hash of ``data_principal_id``, and the ids it hands out are
+    global ids that encode the shard (``local_id * shards + shard``), so with one shard they are the
+    plain row ids. Reads go to replicas where configured, except for principals and sessions that
+    wrote recently. Every write also stages its changes in its transaction, and once it commits
+    ``changes`` gives them versions and serves them as a feed.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[ConsentCache] = None,
+        audit: Optional[AuditLog] = None,
+        router: Optional[ShardRouter] = None,
+    ) -> None:
+        self.cache = cache or ConsentCache()
+        self.audit = audit or AuditLog()
+        self.router = router or ShardRouter()
+        self.changes = ConsentChangeFeed(self.router)
+        self.stream_chunk_size = int(os.getenv("CONSENT_STREAM_CHUNK_SIZE", "1000"))
+        self.bulk_batch_size = int(os.getenv("CONSENT_BULK_BATCH_SIZE", "5000"))
+        self.warmup_chunk_size = int(os.getenv("CONSENT_CACHE_WARMUP_CHUNK_SIZE", "5000"))
+        self.warmup_max_bytes = int(os.getenv("CONSENT_CACHE_WARMUP_MAX_BYTES", str(64 * 1024 * 1024)))
+        # Below this many rows a COPY round-trip costs more than a multi-row INSERT
+        self.copy_min_rows = int(os.getenv("CONSENT_COPY_MIN_ROWS", "500"))
+        # Distinct cache entries whose compiled scope is kept; principals with the same scope share one
+        self.compiled_scope = lru_cache(maxsize=int(os.getenv("CONSENT_SCOPE_CACHE_SIZE", "4096")))(compile_scope)
 
     @staticmethod
     def _cache_key(data_principal_id: str, purpose: str) -> str:
         return f"consent:{data_principal_id}:{purpose}"
 
+    def _shard_of(self, data_principal_id: str) -> int:
+        return shard_for(data_principal_id, self.router.shards)
+
+    def _global_id(self, local_id: int, shard: int) -> int:
+        return to_global_id(local_id, shard, self.router.shards)
+
+    def _shards(self, data_principal_id: Optional[str]) -> List[int]:
+        return [self._shard_of(data_principal_id)] if data_principal_id else list(self.router.shard_ids())
+
+    @asynccontextmanager
+    async def _audit_session(self, shard: int, session: AsyncSession) -> AsyncIterator[AsyncSession]:
+        """Session for the audit events of a write on ``shard``.
+
+        On the main database that is the write's own session. A separate shard cannot share a
+        transaction with the audit log, so its events are committed first: an event without its
+        change can be spotted, a change without its event could not.
+        """
+        if self.router.is_main(shard):
+            yield session
+            return
+        async with get_session() as audit_session:
+            yield audit_session
+
+    @asynccontextmanager
+    async def _principal_session(
+        self, data_principal_id: str, session: Optional[AsyncSession]
+    ) -> AsyncIterator[AsyncSession]:
+        # The caller's main-database session when the principal's shard lives there, else the shard's primary
+        shard = self._shard_of(data_principal_id)
+        if session is not None and self.router.is_main(shard):
+            yield session
+            return
+        async with self.router.write(shard) as shard_session:
+            yield shard_session
+
+    @staticmethod
+    async def _record_changes(
+        session: AsyncSession, change: str, local_ids: Sequence[int], previous_purpose: Optional[str] = None
+    ) -> None:
+        """Append a ``change`` for each consent in ``local_ids``, copied from its row as it now is."""
+        if not local_ids:
+            return
+        rows = (
+            select(
+                Consent.id,
+                Consent.data_principal_id,
+                literal(change, String),
+                Consent.purpose,
+                literal(previous_purpose, String),
+                Consent.scope,
+                Consent.expires_at,
+                Consent.active,
+                literal(datetime.utcnow(), DateTime),
+            )
+            .where(Consent.id.in_(local_ids))
+            .order_by(Consent.id)
+        )
+        columns = [
+            "consent_id",
+            "data_principal_id",
+            "change",
+            "purpose",
+            "previous_purpose",
+            "scope",
+            "expires_at",
+            "active",
+            "created_at",
+        ]
+        # INSERT ... SELECT: the rows are copied inside the database, nothing is sent back and forth
+        await session.execute(insert(cast(Table, PendingConsentChange.__table__)).from_select(columns, rows))
+
     async def create_consent(self, payload: ConsentCreate) -> ConsentRead:
-        async with get_session() as session:
+        shard = self._shard_of(payload.data_principal_id)
+        async with self.router.write(shard) as session:
             consent = Consent(
                 data_principal_id=payload.data_principal_id,
                 purpose=payload.purpose,
-                scope=json.dumps(payload.scope),
+                scope=payload.scope,
                 expires_at=payload.expires_at,
                 active=True,
             )
             session.add(consent)
             await session.flush()
             await session.refresh(consent)
-            await self.audit.append_event(
-                action="consent_create",
-                actor_id="system",
-                scope=payload.purpose,
-                payload={"consent_id": consent.id},
-                session=session,
-            )
-            await self.cache.set(
-                self._cache_key(payload.data_principal_id, payload.purpose),
-                json.dumps({"active": True, "scope": payload.scope}),
-            )
-            return ConsentRead(
-                id=consent.id,
+            await self._record_changes(session, "create", [consent.id])
+            consent_id = self._global_id(consent.id, shard)
+            async with self._audit_session(shard, session) as audit_session:
+                await self.audit.append_event(
+                    action="consent_create",
+                    actor_id="system",
+                    scope=payload.purpose,
+                    payload={"consent_id": consent_id},
+                    session=audit_session,
+                )
+            created = ConsentRead(
+                id=consent_id,
                 data_principal_id=consent.data_principal_id,
                 purpose=consent.purpose,
-                scope=json.loads(consent.scope),
+                scope=consent.scope,
                 expires_at=consent.expires_at,
                 active=consent.active,
             )
+        self.router.note_write(payload.data_principal_id)
+        await self.changes.sequence(shard)
+        self.changes.notify()
+        await self.audit.sequence()
+        # Once committed: cache I/O inside the transaction would only lengthen it
+        await self.cache.set(
+            self._cache_key(payload.data_principal_id, payload.purpose),
+            encode_cached_consent(True, payload.scope),
+            principal=payload.data_principal_id,
+        )
+        return created
 
     async def get_consent(self, consent_id: int) -> Optional[ConsentRead]:
-        async with get_session() as session:
-            db_obj = await session.get(Consent, consent_id)
-            if not db_obj:
-                return None
-            return ConsentRead(
-                id=db_obj.id,
-                data_principal_id=db_obj.data_principal_id,
-                purpose=db_obj.purpose,
-                scope=json.loads(db_obj.scope),
-                expires_at=db_obj.expires_at,
-                active=db_obj.active,
-            )
+        shard, local_id = from_global_id(consent_id, self.router.shards)
+        async with self.router.read(shard) as session:
+            # A column select: no ORM entity or identity-map bookkeeping for a read-only lookup
+            row = (await session.execute(select(*_CONSENT_COLUMNS).where(Consent.id == local_id))).first()
+        return None if row is None else self._read_from_row(row, consent_id)
+
+    @staticmethod
+    def _list_stmt(
+        *,
+        data_principal_id: Optional[str],
+        purpose: Optional[str],
+        after_id: Optional[int],
+        scope: Sequence[str] = (),
+        dialect: str = "",
+        columns: Sequence[Any] = _CONSENT_COLUMNS,
+    ):
+        stmt = select(*columns).order_by(Consent.id)
+        if data_principal_id:
+            stmt = stmt.where(Consent.data_principal_id == data_principal_id)
+        if purpose:
+            stmt = stmt.where(Consent.purpose == purpose)
+        if scope:
+            stmt = stmt.where(scope_includes(scope, dialect))
+        if after_id is not None:
+            stmt = stmt.where(Consent.id > after_id)
+        return stmt
+
+    @staticmethod
+    def _read_from_row(row: Any, consent_id: int) -> ConsentRead:
+        return ConsentRead(
+            id=consent_id,
+            data_principal_id=row.data_principal_id,
+            purpose=row.purpose,
+            scope=row.scope,
+            expires_at=row.expires_at,
+            active=row.active,
+        )
+
+    def _local_after(self, after_id: Optional[int], shard: int) -> Optional[int]:
+        # Global ids above ``after_id`` on this shard are exactly the local ids above this bound
+        return None if after_id is None else (after_id - shard) // self.router.shards
+
+    async def list_consents(
+        self,
+        *,
+        data_principal_id: Optional[str],
+        purpose: Optional[str],
+        after_id: Optional[int] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        scope: Sequence[str] = (),
+    ) -> List[ConsentRead]:
+        rows = await self._page_rows(data_principal_id, purpose, after_id, limit, scope, _CONSENT_COLUMNS)
+        return [self._read_from_row(row, consent_id) for consent_id, row in rows]
+
+    async def list_consents_json(
+        self,
+        *,
+        data_principal_id: Optional[str],
+        purpose: Optional[str],
+        after_id: Optional[int] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        scope: Sequence[str] = (),
+    ) -> Tuple[bytes, Optional[int]]:
+        """``list_consents`` as a ready JSON array body, and the next page's cursor when the page is full."""
+        rows = await self._page_rows(data_principal_id, purpose, after_id, limit, scope, _CONSENT_COLUMNS)
+        body = "[" + ",".join(consent_json(row, consent_id) for consent_id, row in rows) + "]"
+        return body.encode("utf-8"), rows[-1][0] if len(rows) == limit else None
 
-    async def list_consents(self, *, data_principal_id: Optional[str], purpose: Optional[str]) -> List[ConsentRead]:
-        async with get_session() as session:
-            from sqlalchemy import select
-
-            stmt = select(Consent)
-            if data_principal_id:
-                stmt = stmt.where(Consent.data_principal_id == data_principal_id)
-            if purpose:
-                stmt = stmt.where(Consent.purpose == purpose)
-            result = await session.execute(stmt)
-            consents = result.scalars().all()
-            return [
-                ConsentRead(
-                    id=c.id,
-                    data_principal_id=c.data_principal_id,
-                    purpose=c.purpose,
-                    scope=json.loads(c.scope),
-                    expires_at=c.expires_at,
-                    active=c.active,
+    async def _page_rows(
+        self,
+        data_principal_id: Optional[str],
+        purpose: Optional[str],
+        after_id: Optional[int],
+        limit: int,
+        scope: Sequence[str],
+        columns: Sequence[Any],
+    ) -> List[Tuple[int, Any]]:
+        # (global id, row) pairs of one page
+        async def shard_page(shard: int) -> List[Tuple[int, Any]]:
+            async with self.router.read(shard, data_principal_id) as session:
+                stmt = self._list_stmt(
+                    data_principal_id=data_principal_id,
+                    purpose=purpose,
+                    after_id=self._local_after(after_id, shard),
+                    scope=scope,
+                    dialect=session.bind.dialect.name,
+                    columns=columns,
                 )
-                for c in consents
-            ]
+                result = await session.execute(stmt.limit(limit))
+                return [(self._global_id(row.id, shard), row) for row in result]
+
+        shards = self._shards(data_principal_id)
+        if len(shards) == 1:
+            return await shard_page(shards[0])
+        # Each shard's page is in global-id order already; the first ``limit`` of their union is the page
+        pages = await asyncio.gather(*(shard_page(shard) for shard in shards))
+        return sorted(itertools.chain.from_iterable(pages), key=lambda pair: pair[0])[:limit]
+
+    async def stream_consents(
+        self,
+        *,
+        data_principal_id: Optional[str],
+        purpose: Optional[str],
+        chunk_size: Optional[int] = None,
+        scope: Sequence[str] = (),
+        session: Optional[AsyncSession] = None,
+    ) -> AsyncIterator[ConsentRead]:
+        """Stream matching consents in id order within each shard, shard after shard.
+
+        ``session`` (on the main database) is used for shards stored there.
+        """
+        filters = {"data_principal_id": data_principal_id, "purpose": purpose, "after_id": None, "scope": scope}
+        chunk_size = chunk_size or self.stream_chunk_size
+        async for consent_id, row in self._stream_rows(filters, chunk_size, session, _CONSENT_COLUMNS):
+            yield self._read_from_row(row, consent_id)
+
+    async def stream_consents_json(
+        self,
+        *,
+        data_principal_id: Optional[str],
+        purpose: Optional[str],
+        chunk_size: Optional[int] = None,
+        scope: Sequence[str] = (),
+    ) -> AsyncIterator[str]:
+        """``stream_consents`` with each consent already rendered to JSON."""
+        filters = {"data_principal_id": data_principal_id, "purpose": purpose, "after_id": None, "scope": scope}
+        chunk_size = chunk_size or self.stream_chunk_size
+        async for consent_id, row in self._stream_rows(filters, chunk_size, None, _CONSENT_COLUMNS):
+            yield consent_json(row, consent_id)
+
+    async def _stream_rows(
+        self,
+        filters: Dict[str, Any],
+        chunk_size: int,
+        session: Optional[AsyncSession],
+        columns: Sequence[Any],
+    ) -> AsyncIterator[Tuple[int, Any]]:
+        for shard in self._shards(filters["data_principal_id"]):
+            if session is not None and self.router.is_main(shard):
+                async for pair in self._stream_shard(session, filters, chunk_size, shard, columns):
+                    yield pair
+                continue
+            async with self.router.read(shard, filters["data_principal_id"]) as owned_session:
+                async for pair in self._stream_shard(owned_session, filters, chunk_size, shard, columns):
+                    yield pair
+
+    async def _stream_shard(
+        self, session: AsyncSession, filters: Dict[str, Any], chunk_size: int, shard: int, columns: Sequence[Any]
+    ) -> AsyncIterator[Tuple[int, Any]]:
+        # Server-side cursor: rows are fetched chunk_size at a time so exports stay bounded in memory
+        stmt = self._list_stmt(**filters, dialect=session.bind.dialect.name, columns=columns)
+        result = await session.stream(stmt.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            for row in partition:
+                yield self._global_id(row.id, shard), row
 
     async def update_consent(self, consent_id: int, payload: ConsentUpdate) -> Optional[ConsentRead]:
-        async with get_session() as session:
-            db_obj = await session.get(Consent, consent_id)
+        shard, local_id = from_global_id(consent_id, self.router.shards)
+        async with self.router.write(shard) as session:
+            db_obj = await session.get(Consent, local_id)
             if not db_obj:
                 return None
+            previous_purpose = db_obj.purpose
+            previous_key = self._cache_key(db_obj.data_principal_id, db_obj.purpose)
             if payload.purpose is not None:
                 db_obj.purpose = payload.purpose
             if payload.scope is not None:
-                db_obj.scope = json.dumps(payload.scope)
+                db_obj.scope = payload.scope
             if payload.expires_at is not None:
                 db_obj.expires_at = payload.expires_at
             if payload.active is not None:
                 db_obj.active = payload.active
             await session.flush()
-            await self.audit.append_event(
-                action="consent_update",
-                actor_id="system",
-                scope=db_obj.purpose,
-                payload={"consent_id": db_obj.id},
-                session=session,
+            await self._record_changes(
+                session, "update", [local_id], previous_purpose if previous_purpose != db_obj.purpose else None
             )
-            return ConsentRead(
-                id=db_obj.id,
+            async with self._audit_session(shard, session) as audit_session:
+                await self.audit.append_event(
+                    action="consent_update",
+                    actor_id="system",
+                    scope=db_obj.purpose,
+                    payload={"consent_id": consent_id},
+                    session=audit_session,
+                )
+            updated = ConsentRead(
+                id=consent_id,
                 data_principal_id=db_obj.data_principal_id,
                 purpose=db_obj.purpose,
-                scope=json.loads(db_obj.scope),
+                scope=db_obj.scope,
                 expires_at=db_obj.expires_at,
                 active=db_obj.active,
             )
+        self.router.note_write(updated.data_principal_id)
+        await self.changes.sequence(shard)
+        self.changes.notify()
+        await self.audit.sequence()
+        # Write-through once committed so has_valid_consent never serves the pre-update scope
+        key = self._cache_key(updated.data_principal_id, updated.purpose)
+        if key != previous_key:
+            await self.cache.delete(previous_key)
+        if updated.active:
+            await self.cache.set(key, encode_cached_consent(True, updated.scope), principal=updated.data_principal_id)
+        else:
+            # Another active consent may exist for the same key, so let the next check consult the DB
+            await self.cache.delete(key)
+        return updated
+
     async def withdraw_consent(self, consent_id: int) -> bool:
-        async with get_session() as session:
-            db_obj = await session.get(Consent, consent_id)
+        shard, local_id = from_global_id(consent_id, self.router.shards)
+        async with self.router.write(shard) as session:
+            db_obj = await session.get(Consent, local_id)
             if not db_obj:
                 return False
             db_obj.active = False
             await session.flush()
-            await self.audit.append_event(
-                action="consent_withdraw",
-                actor_id="system",
-                scope=db_obj.purpose,
-                payload={"consent_id": db_obj.id},
-                session=session,
+            await self._record_changes(session, "withdraw", [local_id])
+            async with self._audit_session(shard, session) as audit_session:
+                await self.audit.append_event(
+                    action="consent_withdraw",
+                    actor_id="system",
+                    scope=db_obj.purpose,
+                    payload={"consent_id": consent_id},
+                    session=audit_session,
+                )
+            principal, purpose = db_obj.data_principal_id, db_obj.purpose
+        self.router.note_write(principal)
+        await self.changes.sequence(shard)
+        self.changes.notify()
+        await self.audit.sequence()
+        await self.cache.delete(self._cache_key(principal, purpose))
+        return True
+
+    async def bulk_create(self, items: Sequence[ConsentCreate]) -> List[int]:
+        if not items:
+            return []
+        by_shard: Dict[int, List[ConsentCreate]] = {}
+        for item in items:
+            by_shard.setdefault(self._shard_of(item.data_principal_id), []).append(item)
+        created_ids: List[int] = []
+        for shard, shard_items in by_shard.items():
+            async with self.router.write(shard) as session:
+                inserted = await self._insert_consents(session, shard_items)
+                await self._record_changes(session, "create", [local_id for local_id, _ in inserted])
+                created = [(self._global_id(local_id, shard), purpose) for local_id, purpose in inserted]
+                async with self._audit_session(shard, session) as audit_session:
+                    await self.audit.append_events(
+                        [
+                            {
+                                "action": "consent_create",
+                                "actor_id": "system",
+                                "scope": purpose,
+                                "payload": {"consent_id": consent_id},
+                            }
+                            for consent_id, purpose in created
+                        ],
+                        session=audit_session,
+                    )
+            created_ids.extend(consent_id for consent_id, _ in created)
+        self.router.note_write(*{item.data_principal_id for item in items})
+        await self.changes.sequence(*by_shard)
+        self.changes.notify()
+        await self.audit.sequence()
+        keys = [self._cache_key(item.data_principal_id, item.purpose) for item in items]
+        await self.cache.set_many(
+            {key: encode_cached_consent(True, item.scope) for key, item in zip(keys, items)},
+            principals={key: item.data_principal_id for key, item in zip(keys, items)},
+        )
+        return created_ids
+
+    async def _insert_consents(
+        self, session: AsyncSession, items: Sequence[ConsentCreate]
+    ) -> List[Tuple[int, str]]:
+        """Insert consents and return ``(id, purpose)`` pairs, not necessarily in input order."""
+        now = datetime.utcnow()
+        if session.bind.dialect.name == "postgresql" and len(items) >= self.copy_min_rows:
+            # Pre-allocate ids from the sequence, then COPY rows in; this runs inside the session's
+            # transaction because the SELECT below has already begun it on the same connection
+            result = await session.execute(
+                text("SELECT nextval(pg_get_serial_sequence('consents', 'id')) FROM generate_series(1, :n)"),
+                {"n": len(items)},
+            )
+            ids = [row[0] for row in result]
+            conn = await session.connection()
+            driver = (await conn.get_raw_connection()).driver_connection
+            assert driver is not None
+            await driver.copy_records_to_table(
+                Consent.__tablename__,
+                # asyncpg's binary COPY takes jsonb values as JSON text
+                records=[
+                    (consent_id, item.data_principal_id, item.purpose, json.dumps(item.scope), item.expires_at, True, now)
+                    for consent_id, item in zip(ids, items)
+                ],
+                columns=["id", "data_principal_id", "purpose", "scope", "expires_at", "active", "created_at"],
+            )
+            return [(consent_id, item.purpose) for consent_id, item in zip(ids, items)]
+        # Not asking for parameter-ordered RETURNING keeps SQLite on batched multi-row INSERTs
+        result = await session.execute(
+            insert(cast(Table, Consent.__table__)).returning(Consent.id, Consent.purpose),
+            [
+                {
+                    "data_principal_id": item.data_principal_id,
+                    "purpose": item.purpose,
+                    "scope": item.scope,
+                    "expires_at": item.expires_at,
+                    "active": True,
+                    "created_at": now,
+                }
+                for item in items
+            ],
+        )
+        return [(row.id, row.purpose) for row in result]
+
+    async def bulk_withdraw(self, consent_ids: Sequence[int]) -> int:
+        if not consent_ids:
+            return 0
+        by_shard: Dict[int, List[int]] = {}
+        for consent_id in consent_ids:
+            shard, local_id = from_global_id(consent_id, self.router.shards)
+            by_shard.setdefault(shard, []).append(local_id)
+        withdrawn: List[Tuple[int, str, str]] = []
+        for shard, local_ids in by_shard.items():
+            async with self.router.write(shard) as session:
+                stmt = (
+                    update(Consent)
+                    .where(Consent.id.in_(local_ids))
+                    .where(Consent.active.is_(True))
+                    .values(active=False)
+                    .returning(Consent.id, Consent.data_principal_id, Consent.purpose)
+                    .execution_options(synchronize_session=False)
+                )
+                updated_rows = (await session.execute(stmt)).all()
+                await self._record_changes(session, "withdraw", [row.id for row in updated_rows])
+                rows = [(self._global_id(row.id, shard), row.data_principal_id, row.purpose) for row in updated_rows]
+                async with self._audit_session(shard, session) as audit_session:
+                    await self.audit.append_events(
+                        [
+                            {
+                                "action": "consent_withdraw",
+                                "actor_id": "system",
+                                "scope": purpose,
+                                "payload": {"consent_id": consent_id},
+                            }
+                            for consent_id, _, purpose in rows
+                        ],
+                        session=audit_session,
+                    )
+            withdrawn.extend(rows)
+        self.router.note_write(*{principal for _, principal, _ in withdrawn})
+        await self.changes.sequence(*by_shard)
+        self.changes.notify()
+        await self.audit.sequence()
+        await self.cache.delete_many([self._cache_key(principal, purpose) for _, principal, purpose in withdrawn])
+        return len(withdrawn)
+
+    async def count_principal_consents(self, data_principal_id: str, session: Optional[AsyncSession] = None) -> int:
+        async with self._principal_session(data_principal_id, session) as shard_session:
+            stmt = select(func.count()).select_from(Consent).where(Consent.data_principal_id == data_principal_id)
+            return int(await shard_session.scalar(stmt) or 0)
+
+    async def delete_principal_consents(
+        self, data_principal_id: str, limit: int, session: Optional[AsyncSession] = None
+    ) -> int:
+        """Delete up to ``limit`` of the principal's consents; returns how many were deleted.
+
+        With the last chunk (fewer than ``limit`` deleted), the principal's entries in the change feed
+        are replaced by a single "erase" change.
+        """
+        async with self._principal_session(data_principal_id, session) as shard_session:
+            chunk = select(Consent.id).where(Consent.data_principal_id == data_principal_id).limit(limit)
+            result = await shard_session.execute(
+                delete(Consent).where(Consent.id.in_(chunk)).execution_options(synchronize_session=False)
             )
-            await self.cache.delete(self._cache_key(db_obj.data_principal_id, db_obj.purpose))
-            return True
+            deleted = int(getattr(result, "rowcount", 0) or 0)
+            if deleted < limit:
+                erased = 0
+                for stmt in (
+                    delete(ConsentChange).where(ConsentChange.data_principal_id == data_principal_id),
+                    delete(PendingConsentChange).where(PendingConsentChange.data_principal_id == data_principal_id),
+                ):
+                    result = await shard_session.execute(stmt)
+                    erased += int(getattr(result, "rowcount", 0) or 0)
+                if deleted or erased:
+                    await shard_session.execute(
+                        insert(cast(Table, PendingConsentChange.__table__)).values(
+                            data_principal_id=data_principal_id, change="erase", active=False
+                        )
+                    )
+        self.router.note_write(data_principal_id)
+        shard = self._shard_of(data_principal_id)
+        if session is None or not self.router.is_main(shard):
+            # Otherwise the caller's transaction is still open; the caller sequences once it commits
+            await self.changes.sequence(shard)
+        self.changes.notify()
+        return deleted
+
+    async def invalidate_cached(self, changes: Sequence[ConsentChangeRead]) -> None:
+        """Drop the cache entries that ``changes`` (from another process's feed) made stale."""
+        keys: set[str] = set()
+        for change in changes:
+            if change.change == "erase":
+                await self.cache.purge_principal(change.data_principal_id)
+                continue
+            for purpose in (change.purpose, change.previous_purpose):
+                if purpose is not None:
+                    keys.add(self._cache_key(change.data_principal_id, purpose))
+        await self.cache.delete_many(sorted(keys))
+
+    async def warm_cache(
+        self, *, max_bytes: Optional[int] = None, chunk_size: Optional[int] = None
+    ) -> Dict[str, float]:
+        """Preload the most recent active consents until ``max_bytes`` of cache entries are written.
+
+        With several shards each is loaded in turn, so the budget favours the first shards.
+        """
+        max_bytes = self.warmup_max_bytes if max_bytes is None else max_bytes
+        chunk_size = chunk_size or self.warmup_chunk_size
+        start = time.perf_counter()
+        now = datetime.utcnow()
+        stmt = (
+            select(Consent.data_principal_id, Consent.purpose, Consent.scope)
+            .where(Consent.active.is_(True))
+            .where(or_(Consent.expires_at.is_(None), Consent.expires_at > now))
+            .order_by(Consent.created_at.desc(), Consent.id.desc())
+            .execution_options(yield_per=chunk_size)
+        )
+        seen: set[str] = set()
+        loaded = 0
+        used_bytes = 0
+        full = False
+        for shard in self.router.shard_ids():
+            async with self.router.read(shard) as session:
+                result = await session.stream(stmt)
+                async for partition in result.partitions():
+                    batch: Dict[str, bytes] = {}
+                    principals: Dict[str, str] = {}
+                    for row in partition:
+                        key = self._cache_key(row.data_principal_id, row.purpose)
+                        if key in seen:
+                            # Rows arrive newest first; an older consent must not overwrite the newer entry
+                            continue
+                        value = encode_cached_consent(True, row.scope)
+                        entry_bytes = len(key) + len(value) + CACHE_ENTRY_OVERHEAD_BYTES
+                        if used_bytes + entry_bytes > max_bytes:
+                            full = True
+                            break
+                        seen.add(key)
+                        batch[key] = value
+                        principals[key] = row.data_principal_id
+                        used_bytes += entry_bytes
+                    await self.cache.set_many(batch, principals=principals)
+                    loaded += len(batch)
+                    if full:
+                        break
+            if full:
+                break
+        return {"entries": loaded, "bytes": used_bytes, "seconds": time.perf_counter() - start}
 
     async def has_valid_consent(self, data_principal_id: str, purpose: str) -> bool:
         key = self._cache_key(data_principal_id, purpose)
         cached = await self.cache.get(key)
         if cached:
-            try:
-                info = json.loads(cached)
-                return bool(info.get("active"))
-            except Exception:  # noqa: BLE001
-                return False
-        # fallback to DB
-        async with get_session() as session:
-            from sqlalchemy import select
+            CACHE_HITS.inc()
+            return cached_consent_active(cached)
+        CACHE_MISSES.inc()
+        return await self._load_active(key, data_principal_id, purpose) is not None
 
+    async def consent_scope(self, data_principal_id: str, purpose: str) -> Optional[FrozenSet[str]]:
+        """Fields the principal's active consent for ``purpose`` covers, or None without one."""
+        key = self._cache_key(data_principal_id, purpose)
+        cached = await self.cache.get(key)
+        if cached:
+            CACHE_HITS.inc()
+            return self.compiled_scope(cached)
+        CACHE_MISSES.inc()
+        loaded = await self._load_active(key, data_principal_id, purpose)
+        return None if loaded is None else self.compiled_scope(loaded)
+
+    async def _load_active(self, key: str, data_principal_id: str, purpose: str) -> Optional[bytes]:
+        # Cache miss: read an active consent from the database and cache its encoded entry
+        async with self.router.read(self._shard_of(data_principal_id), data_principal_id) as session:
             stmt = (
-                select(Consent)
+                select(Consent.scope)
                 .where(Consent.data_principal_id == data_principal_id)
                 .where(Consent.purpose == purpose)
                 .where(Consent.active.is_(True))
+                .limit(1)
             )
-            result = await session.execute(stmt)
-            consent: Optional[Consent] = result.scalars().first()
-            if consent:
-                await self.cache.set(key, json.dumps({"active": True, "scope": json.loads(consent.scope)}))
-                return True
-            return False
-
-
+            scope = await session.scalar(stmt)
+        if scope is None:
+            return None
+        value = encode_cached_consent(True, scope)
+        await self.cache.set(key, value, principal=data_principal_id)
+        return value
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+
+from ..db.routing import ShardRouter
+from .consent_service import ConsentCache, ConsentService
+from .dsar import DsarExporter
+from .erasure import ErasureService
+from .executor import CpuExecutor
+from .ingest_pipeline import IngestPipeline
+from .merkle_audit import AuditLog
+from .payload_codec import PayloadCodec
+
+
+@dataclass
+class Services:
+    """Long-lived resources of one app instance, shared by every router through dependencies.
+
+    Everything hangs off a single ``ConsentCache`` (one Redis pool), ``AuditLog``, ``CpuExecutor`` and
+    ``PayloadCodec``, instead of each router and service building its own. Settings are read from the
+    environment here, when the app starts, not when modules are imported.
+    """
+
+    cache: ConsentCache
+    router: ShardRouter
+    audit: AuditLog
+    consents: ConsentService
+    pipeline: IngestPipeline
+    erasure: ErasureService
+    exporter: DsarExporter
+    executor: CpuExecutor
+    codec: PayloadCodec
+    # RSA verification cost does not depend on token size, so it is offloaded whole rather than by size
+    jwt_verify_offload: bool
+
+    @classmethod
+    def create(cls) -> "Services":
+        executor = CpuExecutor()
+        codec = PayloadCodec()
+        cache = ConsentCache()
+        audit = AuditLog(executor=executor)
+        router = ShardRouter()
+        consents = ConsentService(cache=cache, audit=audit, router=router)
+        return cls(
+            cache=cache,
+            router=router,
+            audit=audit,
+            consents=consents,
+            pipeline=IngestPipeline(consent=consents, audit=audit, codec=codec, executor=executor),
+            erasure=ErasureService(cache=cache, audit=audit, consents=consents),
+            exporter=DsarExporter(consents=consents, audit=audit, codec=codec, executor=executor),
+            executor=executor,
+            codec=codec,
+            jwt_verify_offload=os.getenv("JWT_VERIFY_OFFLOAD", "true").lower() == "true",
+        )
+
+    async def aclose(self) -> None:
+        await self.erasure.aclose()
+        await self.pipeline.policy.aclose()
+        await self.cache.aclose()
+        await self.router.dispose()
+        self.executor.shutdown()
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 import hashlib
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+
+from .executor import CpuExecutor
 
 
 class Deidentifier:
-    def __init__(self) -> None:
+    def __init__(self, executor: Optional[CpuExecutor] = None) -> None:
         self.redact_fields = {"ssn", "aadhar", "pan"}
+        self.executor = executor or CpuExecutor()
 
     def process(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         result: Dict[str, Any] = {}
@@ -19,4 +22,9 @@ class Deidentifier:
                 result[key] = value
         return result
 
-
+    async def process_async(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        # Only the bytes that actually get hashed count towards the offload decision
+        hashed_bytes = sum(
+            len(value) for key, value in payload.items() if key.endswith("_hash") and isinstance(value, str)
+        )
+        return await self.executor.run(self.process, payload, size=hashed_bytes)
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import os
+import zipfile
+from typing import IO, Any, AsyncIterator, List, Optional, Sequence, cast
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.session import get_session
+from ..models.orm import IngestRecord
+from .consent_service import ConsentService
+from .executor import CpuExecutor
+from .merkle_audit import AuditLog
+from .payload_codec import PayloadCodec
+
+SECTIONS = ("consents", "ingest_records", "audit_events")
+
+DSAR_EXPORTS = Counter("dsar_exports_total", "Data-access exports started", ["format"])
+DSAR_ACTIVE = Gauge("dsar_exports_active", "Data-access exports currently streaming")
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, non-seekable target, so zipfile emits data descriptors and the archive can stream."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.pending = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        self.pending += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks, self.pending = [], 0
+        return data
+
+
+def _record_lines(rows: Sequence[Any], codec: PayloadCodec) -> List[bytes]:
+    """NDJSON lines of stored ingest rows with their payloads decoded; may run in a worker thread."""
+    return [
+        json.dumps(
+            {
+                "id": row.id,
+                "purpose": row.purpose,
+                "payload": codec.decode(row.payload),
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+        + b"\n"
+        for row in rows
+    ]
+
+
+class DsarExporter:
+    """Streams everything held about one data principal from server-side cursors.
+
+    Memory stays at about one fetch chunk plus one flush buffer per export. Exports beyond
+    ``max_concurrent`` wait for a slot (and the API turns new ones away while all are taken), so a
+    burst of large exports cannot take over the connection pool that ingest depends on.
+    """
+
+    def __init__(
+        self,
+        consents: Optional[ConsentService] = None,
+        audit: Optional[AuditLog] = None,
+        max_concurrent: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        codec: Optional[PayloadCodec] = None,
+        executor: Optional[CpuExecutor] = None,
+    ) -> None:
+        self.consents = consents or ConsentService()
+        self.audit = audit or AuditLog()
+        self.codec = codec or PayloadCodec()
+        self.executor = executor or CpuExecutor()
+        self.chunk_size = chunk_size or int(os.getenv("DSAR_CHUNK_SIZE", "500"))
+        # Bytes buffered before a piece of the response is sent
+        self.flush_bytes = int(os.getenv("DSAR_FLUSH_BYTES", str(64 * 1024)))
+        # Each export holds one pooled connection for its whole duration, so keep this well below the pool size
+        self._slots = asyncio.Semaphore(max_concurrent or int(os.getenv("DSAR_MAX_CONCURRENT_EXPORTS", "2")))
+
+    @property
+    def busy(self) -> bool:
+        return self._slots.locked()
+
+    async def _lines(self, session: AsyncSession, section: str, data_principal_id: str) -> AsyncIterator[bytes]:
+        if section == "consents":
+            async for consent in self.consents.stream_consents(
+                data_principal_id=data_principal_id, purpose=None, chunk_size=self.chunk_size, session=session
+            ):
+                yield consent.model_dump_json().encode("utf-8") + b"\n"
+        elif section == "ingest_records":
+            await self.codec.refresh(session)
+            stmt = (
+                select(IngestRecord.id, IngestRecord.purpose, IngestRecord.payload, IngestRecord.created_at)
+                .where(IngestRecord.data_principal_id == data_principal_id)
+                .order_by(IngestRecord.id)
+                .execution_options(yield_per=self.chunk_size)
+            )
+            result = await session.stream(stmt)
+            async for partition in result.partitions():
+                size = sum(len(row.payload) for row in partition)
+                try:
+                    lines = await self.executor.run(_record_lines, partition, self.codec, size=size)
+                except LookupError:
+                    # A dictionary trained since the last refresh
+                    await self.codec.refresh(session, force=True)
+                    lines = await self.executor.run(_record_lines, partition, self.codec, size=size)
+                for line in lines:
+                    yield line
+        else:
+            # Events the principal is the actor of (ingest_store and similar), newest first
+            async for event in self.audit.stream_events(
+                actor_id=data_principal_id, chunk_size=self.chunk_size, session=session
+            ):
+                yield event.model_dump_json().encode("utf-8") + b"\n"
+
+    async def ndjson(self, data_principal_id: str) -> AsyncIterator[bytes]:
+        """One line per item, ``{"type": <section>, "record": {...}}``, sections in ``SECTIONS`` order."""
+        async with self._slots:
+            DSAR_EXPORTS.labels(format="ndjson").inc()
+            with DSAR_ACTIVE.track_inprogress():
+                async with get_session() as session:
+                    buffer: List[bytes] = []
+                    pending = 0
+                    for section in SECTIONS:
+                        prefix = b'{"type":"' + section.encode() + b'","record":'
+                        async for line in self._lines(session, section, data_principal_id):
+                            buffer.append(prefix + line[:-1] + b"}\n")
+                            pending += len(buffer[-1])
+                            if pending >= self.flush_bytes:
+                                yield b"".join(buffer)
+                                buffer, pending = [], 0
+                    if buffer:
+                        yield b"".join(buffer)
+
+    async def zip(self, data_principal_id: str) -> AsyncIterator[bytes]:
+        """A zip archive with one ``<section>.ndjson`` member per section, produced as it is read."""
+        async with self._slots:
+            DSAR_EXPORTS.labels(format="zip").inc()
+            with DSAR_ACTIVE.track_inprogress():
+                async with get_session() as session:
+                    sink = _ZipSink()
+                    with zipfile.ZipFile(cast(IO[bytes], sink), "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                        for section in SECTIONS:
+                            with archive.open(f"{section}.ndjson", "w", force_zip64=True) as member:
+                                async for line in self._lines(session, section, data_principal_id):
+                                    member.write(line)
+                                    if sink.pending >= self.flush_bytes:
+                                        yield sink.drain()
+                    yield sink.drain()
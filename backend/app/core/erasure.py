@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional, Set
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.session import get_session
+from ..models.orm import ErasureJob, IngestRecord
+from ..models.schemas import ErasureJobRead
+from .consent_service import ConsentCache, ConsentService
+from .merkle_audit import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+def job_read(job: ErasureJob) -> ErasureJobRead:
+    total = job.ingest_records_total + job.consents_total
+    done = job.ingest_records_deleted + job.consents_deleted
+    progress = 1.0 if job.status == "completed" else (min(done / total, 1.0) if total else 0.0)
+    return ErasureJobRead(
+        id=job.id,
+        data_principal_id=job.data_principal_id,
+        requested_by=job.requested_by,
+        status=job.status,
+        ingest_records_total=job.ingest_records_total,
+        ingest_records_deleted=job.ingest_records_deleted,
+        consents_total=job.consents_total,
+        consents_deleted=job.consents_deleted,
+        cache_keys_deleted=job.cache_keys_deleted,
+        progress=progress,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        finished_at=job.finished_at,
+    )
+
+
+class ErasureService:
+    """Deletes everything held about one data principal as a background job.
+
+    Each table is emptied in chunks of ``chunk_size`` rows picked through its ``data_principal_id``
+    index, one transaction per chunk, with the job's counters updated in the same transaction. The
+    deletes are idempotent, so a job interrupted by a restart is simply run again by ``resume``.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[ConsentCache] = None,
+        chunk_size: Optional[int] = None,
+        audit: Optional[AuditLog] = None,
+        consents: Optional[ConsentService] = None,
+    ) -> None:
+        self.cache = cache or ConsentCache()
+        self.audit = audit or AuditLog()
+        # Consents may live on shard databases; the service finds the principal's shard
+        self.consents = consents or ConsentService(cache=self.cache, audit=self.audit)
+        # Rows deleted per transaction: keeps lock time and WAL bursts short for principals with millions of rows
+        self.chunk_size = chunk_size or int(os.getenv("ERASURE_CHUNK_SIZE", "5000"))
+        self._tasks: Set[asyncio.Task[None]] = set()
+
+    async def start(self, data_principal_id: str, requested_by: str) -> ErasureJobRead:
+        async with get_session() as session:
+            job = ErasureJob(data_principal_id=data_principal_id, requested_by=requested_by, status="pending")
+            session.add(job)
+            await session.flush()
+            await session.refresh(job)
+            created = job_read(job)
+        self._spawn(created.id)
+        return created
+
+    def _spawn(self, job_id: int) -> None:
+        task = asyncio.create_task(self.run(job_id))
+        # Keep a reference until done so the task is not garbage-collected mid-run
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def get(self, job_id: int) -> Optional[ErasureJobRead]:
+        async with get_session() as session:
+            job = await session.get(ErasureJob, job_id)
+            return job_read(job) if job is not None else None
+
+    async def resume(self) -> int:
+        """Restart jobs left pending or running by a previous process; returns how many."""
+        async with get_session() as session:
+            ids = (
+                await session.execute(select(ErasureJob.id).where(ErasureJob.status.in_(("pending", "running"))))
+            ).scalars().all()
+        for job_id in ids:
+            self._spawn(job_id)
+        return len(ids)
+
+    async def wait(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def aclose(self) -> None:
+        # Interrupted jobs stay "running" and are picked up by the next process's resume()
+        for task in self._tasks:
+            task.cancel()
+        await self.wait()
+
+    async def run(self, job_id: int) -> None:
+        try:
+            await self._run(job_id)
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("erasure job failed", extra={"job_id": job_id})
+            async with get_session() as session:
+                job = await session.get(ErasureJob, job_id)
+                if job is not None:
+                    job.status, job.error = "failed", str(exc)
+                    job.updated_at = job.finished_at = datetime.utcnow()
+
+    async def _run(self, job_id: int) -> None:
+        async with get_session() as session:
+            job = await session.get(ErasureJob, job_id)
+            if job is None or job.status not in ("pending", "running"):
+                return
+            principal = job.data_principal_id
+            if job.status == "pending":
+                # Counted once through the same indexes the deletes use; a resumed job keeps its totals
+                job.ingest_records_total = await self._count(session, IngestRecord, principal)
+                job.consents_total = await self.consents.count_principal_consents(principal, session=session)
+                job.status = "running"
+                job.updated_at = datetime.utcnow()
+            requested_by = job.requested_by
+
+        records = await self._delete_chunks(
+            job_id, "ingest_records_deleted", lambda session: self._delete_records(session, principal)
+        )
+        consents = await self._delete_chunks(
+            job_id,
+            "consents_deleted",
+            lambda session: self.consents.delete_principal_consents(principal, self.chunk_size, session=session),
+        )
+        # The "erase" change was staged in the job's transaction, which has committed by now
+        await self.consents.changes.sequence()
+        # After the consent rows are gone, so a concurrent cache miss cannot re-cache a deleted consent
+        cache_keys = await self.cache.purge_principal(principal)
+
+        async with get_session() as session:
+            await self.audit.append_events(
+                [
+                    {
+                        "action": "erasure",
+                        "actor_id": requested_by,
+                        "scope": table,
+                        "payload": {"job_id": job_id, "data_principal_id": principal, "deleted": deleted},
+                    }
+                    for table, deleted in (
+                        ("ingest_records", records),
+                        ("consents", consents),
+                        ("consent_cache", cache_keys),
+                    )
+                ],
+                session=session,
+            )
+            job = await session.get(ErasureJob, job_id)
+            assert job is not None
+            job.cache_keys_deleted = cache_keys
+            job.status = "completed"
+            job.updated_at = job.finished_at = datetime.utcnow()
+        await self.audit.sequence()
+
+    @staticmethod
+    async def _count(session: AsyncSession, model: Any, principal: str) -> int:
+        stmt = select(func.count()).select_from(model).where(model.data_principal_id == principal)
+        return int(await session.scalar(stmt) or 0)
+
+    async def _delete_records(self, session: AsyncSession, principal: str) -> int:
+        chunk = select(IngestRecord.id).where(IngestRecord.data_principal_id == principal).limit(self.chunk_size)
+        result = await session.execute(
+            delete(IngestRecord).where(IngestRecord.id.in_(chunk)).execution_options(synchronize_session=False)
+        )
+        return int(getattr(result, "rowcount", 0) or 0)
+
+    async def _delete_chunks(
+        self, job_id: int, counter: str, delete_chunk: Callable[[AsyncSession], Awaitable[int]]
+    ) -> int:
+        """Run ``delete_chunk`` until it deletes less than a chunk; returns the total deleted by this job.
+
+        Each chunk shares a transaction with the job's counter, unless it runs on a consent shard
+        database; deletes are idempotent either way, so a resumed job only re-counts.
+        """
+        while True:
+            async with get_session() as session:
+                deleted = await delete_chunk(session)
+                job = await session.get(ErasureJob, job_id)
+                assert job is not None
+                setattr(job, counter, getattr(job, counter) + deleted)
+                job.updated_at = datetime.utcnow()
+                total = int(getattr(job, counter))
+            if deleted < self.chunk_size:
+                return total
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, List, Optional, Sequence, TypeVar
+
+from prometheus_client import Counter, Histogram
+
+T = TypeVar("T")
+A = TypeVar("A")
+R = TypeVar("R")
+
+CPU_TASKS = Counter("cpu_tasks_total", "CPU-bound calls by where they ran", ["mode"])
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between a scheduled wake-up of the event loop and when it actually ran",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+class CpuExecutor:
+    """Runs CPU-heavy calls off the event loop thread.
+
+    Calls whose input is smaller than ``inline_threshold`` bytes run inline, since handing them to a
+    thread costs more than the work. Larger single calls go to a thread pool (hashlib and
+    cryptography release the GIL on large buffers); big batches are split across a process pool.
+    """
+
+    def __init__(self) -> None:
+        cpus = os.cpu_count() or 1
+        self.inline_threshold = int(os.getenv("CPU_INLINE_THRESHOLD_BYTES", "16384"))
+        self.thread_workers = int(os.getenv("CPU_THREAD_WORKERS", str(min(32, cpus + 4))))
+        self.process_workers = int(os.getenv("CPU_PROCESS_WORKERS", str(cpus)))
+        self.batch_min_items = int(os.getenv("CPU_PROCESS_BATCH_MIN_ITEMS", "4096"))
+        self.start_method = os.getenv("CPU_PROCESS_START_METHOD", "spawn")
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix="cpu")
+        return self._threads
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        if self._processes is None:
+            # fork() from a process running an event loop and driver threads is unsafe; spawn workers instead
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.process_workers, mp_context=multiprocessing.get_context(self.start_method)
+            )
+        return self._processes
+
+    async def run(self, fn: Callable[..., T], *args: Any, size: int) -> T:
+        """Run ``fn(*args)`` inline when ``size`` (bytes of input) is tiny, otherwise in the thread pool."""
+        if size < self.inline_threshold or self.thread_workers <= 0:
+            CPU_TASKS.labels(mode="inline").inc()
+            return fn(*args)
+        return await self.offload(fn, *args)
+
+    async def offload(self, fn: Callable[..., T], *args: Any) -> T:
+        if self.thread_workers <= 0:
+            CPU_TASKS.labels(mode="inline").inc()
+            return fn(*args)
+        CPU_TASKS.labels(mode="thread").inc()
+        return await asyncio.get_running_loop().run_in_executor(self._thread_pool(), partial(fn, *args))
+
+    async def map_batch(self, fn: Callable[[Sequence[A]], List[R]], items: Sequence[A]) -> List[R]:
+        """Apply a chunk function (picklable, module level) to ``items``, fanning out to processes for big batches."""
+        if len(items) < self.batch_min_items or self.process_workers <= 0:
+            return await self.run(fn, items, size=len(items) * 64)
+        CPU_TASKS.labels(mode="process").inc()
+        pool: Executor = self._process_pool()
+        chunk = -(-len(items) // self.process_workers)
+        loop = asyncio.get_running_loop()
+        parts = await asyncio.gather(
+            *(loop.run_in_executor(pool, fn, items[i : i + chunk]) for i in range(0, len(items), chunk))
+        )
+        return [result for part in parts for result in part]
+
+    def shutdown(self) -> None:
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+            self._threads = None
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._processes = None
+
+
+async def monitor_event_loop_lag(interval: float) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        scheduled = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - scheduled - interval))
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import time
+from typing import Any, Dict, Optional
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.session import get_session
+from ..models.orm import IngestRecord
+
+DEDUP_REBUILD_CHUNK_SIZE = 50_000
+
+FILTER_CHECKS = Counter(
+    "ingest_dedup_filter_checks_total", "Idempotency keys checked against the in-memory filter", ["result"]
+)
+FILTER_FALSE_POSITIVES = Counter(
+    "ingest_dedup_filter_false_positives_total", "Filter hits for keys the database did not have"
+)
+DUPLICATES = Counter("ingest_duplicates_total", "Ingest requests answered with an earlier record")
+FILTER_FP_RATE = Gauge("ingest_dedup_filter_fp_rate", "Expected false-positive rate at the filter's current fill")
+FILTER_BYTES = Gauge("ingest_dedup_filter_bytes", "Memory held by the idempotency key filter")
+
+
+class BloomFilter:
+    """Bloom filter over hex SHA-256 keys; the key bytes already are uniform hashes, so the k probe
+    positions come from double hashing on two 64-bit slices instead of k separate hash calls."""
+
+    def __init__(self, capacity: int, fp_rate: float, max_bytes: int) -> None:
+        bits = math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))
+        self.size = max(64, min(bits, max_bytes * 8))
+        self.hashes = max(1, round(self.size / max(capacity, 1) * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> list[int]:
+        digest = bytes.fromhex(key)
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def expected_fp_rate(self) -> float:
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+
+def idempotency_key(
+    data_principal_id: str, purpose: str, header: Optional[str], payload: Dict[str, Any], mode: str = "header"
+) -> Optional[str]:
+    """Stored key for a request: a client key scoped to the principal, or a hash of the request body.
+
+    ``mode`` "header" honours Idempotency-Key only; "payload_hash" also derives a key from requests without one.
+    """
+    if header:
+        material = f"key\0{data_principal_id}\0{header}"
+    elif mode == "payload_hash":
+        body = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        material = f"body\0{data_principal_id}\0{purpose}\0{body}"
+    else:
+        return None
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class IdempotencyIndex:
+    """Finds the record an idempotency key was stored with.
+
+    The unique index on ``ingest_records.idempotency_key`` is the source of truth; the Bloom filter
+    in front of it only lets the common case, a key never seen before, skip the database probe.
+    The filter is per process and may miss keys stored by other processes, which the insert's
+    ON CONFLICT DO NOTHING then catches.
+    """
+
+    def __init__(self) -> None:
+        self.mode = os.getenv("INGEST_IDEMPOTENCY", "header").lower()
+        self.max_bytes = int(os.getenv("INGEST_DEDUP_FILTER_MAX_BYTES", str(16 * 1024 * 1024)))
+        self.fp_rate = float(os.getenv("INGEST_DEDUP_FILTER_FP_RATE", "0.01"))
+        # Headroom for keys added after a rebuild before the filter's false-positive rate degrades
+        self.min_capacity = int(os.getenv("INGEST_DEDUP_FILTER_MIN_CAPACITY", "1000000"))
+        self.filter = BloomFilter(self.min_capacity, self.fp_rate, self.max_bytes)
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        FILTER_BYTES.set(len(self.filter.bits))
+        FILTER_FP_RATE.set(self.filter.expected_fp_rate)
+
+    def add(self, key: str) -> None:
+        self.filter.add(key)
+        if self.filter.count % 1024 == 0:
+            self._update_gauges()
+
+    async def find(self, key: str, session: Optional[AsyncSession] = None) -> Optional[int]:
+        if key not in self.filter:
+            FILTER_CHECKS.labels(result="negative").inc()
+            return None
+        FILTER_CHECKS.labels(result="positive").inc()
+        record_id = await self.lookup(key, session)
+        if record_id is None:
+            FILTER_FALSE_POSITIVES.inc()
+        return record_id
+
+    @staticmethod
+    async def lookup(key: str, session: Optional[AsyncSession] = None) -> Optional[int]:
+        stmt = select(IngestRecord.id).where(IngestRecord.idempotency_key == key)
+        if session is not None:
+            return await session.scalar(stmt)
+        async with get_session() as owned_session:
+            return await owned_session.scalar(stmt)
+
+    async def rebuild(self) -> Dict[str, float]:
+        """Reload the filter from the database, sized for the stored keys within the memory budget."""
+        start = time.perf_counter()
+        async with get_session() as session:
+            stored = int(
+                await session.scalar(
+                    select(func.count()).select_from(IngestRecord).where(IngestRecord.idempotency_key.is_not(None))
+                )
+                or 0
+            )
+            rebuilt = BloomFilter(max(stored * 2, self.min_capacity), self.fp_rate, self.max_bytes)
+            stmt = (
+                select(IngestRecord.idempotency_key)
+                .where(IngestRecord.idempotency_key.is_not(None))
+                .execution_options(yield_per=DEDUP_REBUILD_CHUNK_SIZE)
+            )
+            result = await session.stream_scalars(stmt)
+            async for partition in result.partitions():
+                for key in partition:
+                    rebuilt.add(key)
+        self.filter = rebuilt
+        self._update_gauges()
+        return {
+            "keys": rebuilt.count,
+            "bytes": len(rebuilt.bits),
+            "fp_rate": rebuilt.expected_fp_rate,
+            "seconds": time.perf_counter() - start,
+        }
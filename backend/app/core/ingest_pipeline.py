@@ -1,7 +1,14 @@
 from __future__ import annotations
 
-import json
-from typing import Tuple
+import os
+from typing import AbstractSet, Any, Dict, FrozenSet, List, Optional, Sequence, Tuple, cast
+
+from prometheus_client import Counter
+
+from sqlalchemy import Insert, Table, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.schemas import IngestRequest
 from ..db.session import get_session
@@ -9,50 +16,172 @@ from ..models.orm import IngestRecord
 from .consent_service import ConsentService
 from .policy_engine import PolicyEngine
 from .deid import Deidentifier
+from .executor import CpuExecutor
+from .idempotency import DUPLICATES, IdempotencyIndex, idempotency_key
+from .ingest_wal import IngestWAL
 from .merkle_audit import AuditLog
+from .payload_codec import PayloadCodec, serialize
 from .age_verifier import AgeVerifier
 
+OUT_OF_SCOPE_FIELDS = Counter(
+    "ingest_out_of_scope_fields_total", "Payload fields outside the consented scope", ["action"]
+)
+
+
+def restrict_to_scope(payload: Dict[str, Any], scope: FrozenSet[str]) -> Tuple[Dict[str, Any], AbstractSet[str]]:
+    """``payload`` without the top-level fields ``scope`` does not cover, and the names of those fields.
+
+    A payload within scope is returned as is; the check is a single set difference.
+    """
+    extra = payload.keys() - scope
+    if not extra:
+        return payload, extra
+    # Copying the dict and deleting is C-level work; rebuilding it field by field costs about twice as much
+    kept = dict(payload)
+    for key in extra:
+        del kept[key]
+    return kept, extra
+
+
+def _insert_records(dialect: str) -> Insert:
+    table = cast(Table, IngestRecord.__table__)
+    # A record whose idempotency key is already stored is skipped rather than failing the batch,
+    # so a retried request replayed from the WAL cannot wedge the drainer
+    if dialect == "postgresql":
+        return pg_insert(table).on_conflict_do_nothing(index_elements=["idempotency_key"])
+    if dialect == "sqlite":
+        return sqlite_insert(table).on_conflict_do_nothing(index_elements=["idempotency_key"])
+    return insert(table)
+
+
+def _encode_payloads(codec: PayloadCodec, purposes: Sequence[str], raws: Sequence[bytes]) -> List[bytes]:
+    """Stored form of each serialized payload; may run in a worker thread."""
+    return [codec.encode_serialized(purpose, raw) for purpose, raw in zip(purposes, raws)]
+
+
+async def store_records(
+    session: AsyncSession,
+    audit: AuditLog,
+    codec: PayloadCodec,
+    records: Sequence[Dict[str, Any]],
+    executor: Optional[CpuExecutor] = None,
+) -> List[int]:
+    """Insert de-identified records and their ``ingest_store`` audit events in the caller's transaction.
+
+    Returns the ids of the records actually inserted; duplicates of a stored idempotency key are left out.
+    The events get their leaf index from ``audit.sequence()`` after the commit, or from the next tree head.
+    Compression runs on ``executor`` (the audit log's by default) once the batch passes its inline threshold.
+    """
+    await codec.refresh(session)
+    raws = [serialize(record["payload"]) for record in records]
+    purposes = [record["purpose"] for record in records]
+    executor = executor or audit.executor
+    payloads = await executor.run(_encode_payloads, codec, purposes, raws, size=sum(len(raw) for raw in raws))
+    result = await session.execute(
+        _insert_records(session.bind.dialect.name).returning(
+            IngestRecord.id, IngestRecord.data_principal_id, IngestRecord.purpose
+        ),
+        [
+            {
+                "data_principal_id": record["data_principal_id"],
+                "purpose": record["purpose"],
+                "payload": payload,
+                "idempotency_key": record.get("idempotency_key"),
+            }
+            for record, payload in zip(records, payloads)
+        ],
+    )
+    # Multi-row RETURNING order is not guaranteed, so audit events are built from the returned rows
+    stored = result.all()
+    await audit.append_events(
+        [
+            {"action": "ingest_store", "actor_id": row.data_principal_id, "scope": row.purpose, "payload": {"record_id": row.id}}
+            for row in stored
+        ],
+        session=session,
+    )
+    return [row.id for row in stored]
+
 
 class IngestPipeline:
-    def __init__(self) -> None:
-        self.consent = ConsentService()
-        self.policy = PolicyEngine()
-        self.deid = Deidentifier()
-        self.audit = AuditLog()
+    def __init__(
+        self,
+        consent: Optional[ConsentService] = None,
+        audit: Optional[AuditLog] = None,
+        policy: Optional[PolicyEngine] = None,
+        codec: Optional[PayloadCodec] = None,
+        executor: Optional[CpuExecutor] = None,
+    ) -> None:
+        self.consent = consent or ConsentService()
+        self.policy = policy or PolicyEngine()
+        self.deid = Deidentifier(executor)
+        self.audit = audit or AuditLog()
+        self.codec = codec or PayloadCodec()
         self.age = AgeVerifier()
+        # "sync" stores before responding; "wal" acknowledges once the record is in the local write-ahead log
+        self.wal = IngestWAL() if os.getenv("INGEST_MODE", "sync").lower() == "wal" else None
+        self.idempotency = IdempotencyIndex()
+        # Payload fields outside the consent's scope: "drop" stores the rest, "reject" refuses the record, "off" keeps them
+        self.scope_mode = os.getenv("INGEST_SCOPE_MODE", "drop").lower()
+
+    async def store_batch(self, session: AsyncSession, records: List[Dict[str, Any]]) -> List[int]:
+        stored = await store_records(session, self.audit, self.codec, records, self.deid.executor)
+        for record in records:
+            if record.get("idempotency_key"):
+                self.idempotency.add(record["idempotency_key"])
+        return stored
+
+    async def run(self, req: IngestRequest, idempotency_header: Optional[str] = None) -> Tuple[bool, str, int | None]:
+        key = idempotency_key(
+            req.data_principal_id, req.purpose, idempotency_header, req.payload, self.idempotency.mode
+        )
+        if key is not None:
+            # A retry of a stored request gets the original record back without being re-processed
+            existing = await self.idempotency.find(key)
+            if existing is not None:
+                DUPLICATES.inc()
+                return True, "duplicate", existing
 
-    async def run(self, req: IngestRequest) -> Tuple[bool, str, int | None]:
         is_minor, needs_guardian = self.age.check_minor(req.date_of_birth)
         if is_minor and needs_guardian and not req.guardian_consent_token:
             return False, "Guardian consent required", None
 
-        has_consent = await self.consent.has_valid_consent(req.data_principal_id, req.purpose)
+        scope = await self.consent.consent_scope(req.data_principal_id, req.purpose)
         decision = await self.policy.allow_processing(
             data_principal_id=req.data_principal_id,
             purpose=req.purpose,
-            has_consent=has_consent,
+            has_consent=scope is not None,
             is_minor=is_minor,
             guardian_token_present=bool(req.guardian_consent_token),
         )
         if not decision:
             return False, "Policy denied", None
 
-        transformed = self.deid.process(req.payload)
-        async with get_session() as session:
-            record = IngestRecord(
-                data_principal_id=req.data_principal_id,
-                purpose=req.purpose,
-                payload=json.dumps(transformed),
-            )
-            session.add(record)
-            await session.flush()
-            await session.refresh(record)
-        await self.audit.append_event(
-            action="ingest_store",
-            actor_id=req.data_principal_id,
-            scope=req.purpose,
-            payload={"record_id": record.id},
-        )
-        return True, "allowed", record.id
-
+        payload = req.payload
+        if scope is not None and self.scope_mode != "off":
+            # Before de-identification, so fields that are dropped are never processed
+            payload, extra = restrict_to_scope(payload, scope)
+            if extra and self.scope_mode == "reject":
+                OUT_OF_SCOPE_FIELDS.labels(action="rejected").inc(len(extra))
+                return False, f"Fields outside the consented scope: {', '.join(sorted(extra))}", None
+            if extra:
+                OUT_OF_SCOPE_FIELDS.labels(action="dropped").inc(len(extra))
 
+        transformed = await self.deid.process_async(payload)
+        record = {"data_principal_id": req.data_principal_id, "purpose": req.purpose, "payload": transformed}
+        if key is not None:
+            record["idempotency_key"] = key
+        if self.wal is not None:
+            # Duplicates still waiting in the WAL are dropped by the insert when drained
+            await self.wal.append(record)
+            if key is not None:
+                self.idempotency.add(key)
+            return True, "accepted", None
+        async with get_session() as session:
+            stored = await self.store_batch(session, [record])
+            if not stored and key is not None:
+                # Raced with a concurrent retry, or stored by a process whose keys our filter lacks
+                DUPLICATES.inc()
+                return True, "duplicate", await self.idempotency.lookup(key, session)
+        await self.audit.sequence()
+        return True, "allowed", stored[0]
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import socket
+import struct
+import zlib
+from pathlib import Path
+from typing import IO, Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy.exc import DisconnectionError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.session import get_session
+from ..models.orm import IngestWalOffset
+
+# Frame: crc32 over (seq, body), seq, body length, then the JSON body
+_FRAME = struct.Struct("<IQI")
+_SEGMENT_SUFFIX = ".wal"
+_DEAD_LETTER = "dead-letter.log"
+# Failures that say nothing about the entry itself: the database is unreachable, so retry without limit
+_TRANSIENT_ERRORS = (OperationalError, InterfaceError, DisconnectionError, OSError)
+
+WAL_APPENDS = Counter("ingest_wal_appends_total", "Entries acknowledged by the ingest write-ahead log")
+WAL_DRAINED = Counter("ingest_wal_drained_total", "Ingest WAL entries persisted to the database")
+WAL_DEAD_LETTERS = Counter(
+    "ingest_wal_dead_letters_total", "Ingest WAL entries that could not be stored and were moved to the dead-letter log"
+)
+WAL_BACKLOG = Gauge("ingest_wal_backlog_entries", "Acknowledged ingest WAL entries not yet in the database")
+WAL_FSYNC_SECONDS = Histogram(
+    "ingest_wal_fsync_seconds",
+    "Write + fsync time of one ingest WAL group commit",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+logger = logging.getLogger(__name__)
+
+StoreBatch = Callable[[AsyncSession, List[Dict[str, Any]]], Awaitable[Any]]
+
+
+def _frame(seq: int, body: bytes) -> bytes:
+    head = struct.pack("<QI", seq, len(body))
+    return _FRAME.pack(zlib.crc32(head + body), seq, len(body)) + body
+
+
+def _read_frames(data: bytes, offset: int = 0) -> Tuple[List[Tuple[int, bytes]], int]:
+    """Complete, checksummed frames in ``data`` from ``offset``; stops at the first torn or corrupt one."""
+    frames = []
+    while offset + _FRAME.size <= len(data):
+        crc, seq, length = _FRAME.unpack_from(data, offset)
+        end = offset + _FRAME.size + length
+        body = data[offset + _FRAME.size : end]
+        if len(body) < length or zlib.crc32(struct.pack("<QI", seq, length) + body) != crc:
+            break
+        frames.append((seq, body))
+        offset = end
+    return frames, offset
+
+
+def _read_frame(fh: IO[bytes]) -> Optional[Tuple[int, bytes]]:
+    """The next complete, checksummed frame at ``fh``'s position; None at the end or at a torn or corrupt one."""
+    head = fh.read(_FRAME.size)
+    if len(head) < _FRAME.size:
+        return None
+    crc, seq, length = _FRAME.unpack(head)
+    body = fh.read(length)
+    if len(body) < length or zlib.crc32(struct.pack("<QI", seq, length) + body) != crc:
+        return None
+    return seq, body
+
+
+class IngestWAL:
+    """Local write-ahead log for accepted ingest records, drained into the database in batches.
+
+    Appends are acknowledged once fsynced; appends arriving while a write is in flight are committed
+    together with the next fsync. The drainer stores each batch and the WAL position (``lsn``) it
+    reached in the same transaction, so after a crash replay resumes exactly after the last stored
+    entry. One process owns a WAL directory at a time.
+
+    When a batch fails for a reason other than the database being unreachable, its entries are
+    retried one at a time; an entry that still fails ``max_attempts`` times in a row is copied to
+    ``dead-letter.log`` in the WAL directory (same frame format) and skipped, so it cannot hold up
+    the entries behind it.
+    """
+
+    def __init__(self, directory: Optional[str] = None, *, wal_id: Optional[str] = None) -> None:
+        self.directory = Path(directory or os.getenv("INGEST_WAL_DIR") or "wal/ingest")
+        self.wal_id = wal_id or os.getenv("INGEST_WAL_ID") or socket.gethostname()
+        self.segment_bytes = int(os.getenv("INGEST_WAL_SEGMENT_BYTES", str(64 << 20)))
+        self.drain_batch = int(os.getenv("INGEST_WAL_DRAIN_BATCH", "500"))
+        self.retry_seconds = float(os.getenv("INGEST_WAL_RETRY_SECONDS", "1.0"))
+        self.max_attempts = int(os.getenv("INGEST_WAL_MAX_ATTEMPTS", "5"))
+        self.next_seq = 1
+        self.durable_seq = 0
+        self.drained_seq = 0
+        self._pending: List[Tuple[int, bytes, asyncio.Future[None]]] = []
+        self._flusher: Optional[asyncio.Task[None]] = None
+        self._appended = asyncio.Event()
+        self._lock: Optional[IO[bytes]] = None
+        self._file: Optional[IO[bytes]] = None
+        self._segment_size = 0
+        # Drain position: (segment first seq, byte offset)
+        self._read_pos: Tuple[int, int] = (0, 0)
+        # After a batch fails, entries up to this sequence number are drained one at a time
+        self._isolate_until = 0
+        # Consecutive failures of the single entry at the drain position
+        self._attempts = 0
+
+    def _segments(self) -> List[int]:
+        return sorted(int(path.stem) for path in self.directory.glob(f"*{_SEGMENT_SUFFIX}"))
+
+    def _segment_path(self, first_seq: int) -> Path:
+        return self.directory / f"{first_seq:020d}{_SEGMENT_SUFFIX}"
+
+    async def open(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = open(self.directory / "LOCK", "wb")
+        try:
+            fcntl.flock(self._lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError as exc:
+            raise RuntimeError(f"ingest WAL {self.directory} is in use by another process") from exc
+        async with get_session() as session:
+            offset = await session.get(IngestWalOffset, self.wal_id)
+            self.drained_seq = offset.lsn if offset is not None else 0
+        await asyncio.get_running_loop().run_in_executor(None, self._recover)
+        WAL_BACKLOG.set(self.durable_seq - self.drained_seq)
+
+    def _recover(self) -> None:
+        last_seq = 0
+        segments = self._segments()
+        for first in segments:
+            path = self._segment_path(first)
+            data = path.read_bytes()
+            frames, valid = _read_frames(data)
+            if valid < len(data):
+                # A torn tail from a crash mid-write was never acknowledged; cut it off
+                logger.warning("truncating ingest WAL segment", extra={"segment": path.name, "bytes": len(data) - valid})
+                with open(path, "r+b") as fh:
+                    fh.truncate(valid)
+                    os.fsync(fh.fileno())
+            if frames:
+                last_seq = frames[-1][0]
+        # Never reuse a sequence number the database has already recorded as drained
+        self.durable_seq = max(last_seq, self.drained_seq)
+        self.next_seq = self.durable_seq + 1
+        if segments:
+            self._open_segment(segments[-1])
+            self._read_pos = (segments[0], 0)
+        else:
+            self._open_segment(self.next_seq)
+            self._read_pos = (self.next_seq, 0)
+
+    def _open_segment(self, first_seq: int) -> None:
+        if self._file is not None:
+            self._file.close()
+        path = self._segment_path(first_seq)
+        created = not path.exists()
+        self._file = open(path, "ab")
+        self._segment_size = self._file.tell()
+        if created:
+            # Make the new directory entry durable too
+            fd = os.open(self.directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    async def append(self, entry: Dict[str, Any]) -> int:
+        """Append ``entry`` and return its sequence number once it is on disk."""
+        if self._file is None:
+            raise RuntimeError("ingest WAL is not open")
+        seq = self.next_seq
+        self.next_seq += 1
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._pending.append((seq, json.dumps(entry, separators=(",", ":")).encode("utf-8"), future))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_pending())
+        await future
+        return seq
+
+    async def _flush_pending(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            batch, self._pending = self._pending, []
+            data = b"".join(_frame(seq, body) for seq, body, _ in batch)
+            try:
+                with WAL_FSYNC_SECONDS.time():
+                    await loop.run_in_executor(None, self._write, batch[0][0], data)
+            except Exception as exc:  # noqa: BLE001
+                for _, _, future in batch:
+                    future.set_exception(exc)
+                continue
+            self.durable_seq = batch[-1][0]
+            WAL_APPENDS.inc(len(batch))
+            WAL_BACKLOG.set(self.durable_seq - self.drained_seq)
+            for _, _, future in batch:
+                future.set_result(None)
+            self._appended.set()
+
+    def _write(self, first_seq: int, data: bytes) -> None:
+        if self._segment_size >= self.segment_bytes:
+            self._open_segment(first_seq)
+        assert self._file is not None
+        try:
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except OSError:
+            # Drop a partly written batch so later frames do not land behind a torn one
+            self._file.truncate(self._segment_size)
+            raise
+        self._segment_size += len(data)
+
+    def _read_batch(self, limit: int) -> Tuple[List[Tuple[int, Dict[str, Any]]], Tuple[int, int]]:
+        """Up to ``limit`` durable, undrained entries from the read position, and the position after them."""
+        segments = self._segments()
+        first, offset = self._read_pos
+        batch: List[Tuple[int, Dict[str, Any]]] = []
+        for segment in segments:
+            if segment < first:
+                continue
+            if segment > first:
+                first, offset = segment, 0
+            # Frame by frame from the read position, so a batch costs its own frames, not the rest of the segment
+            with open(self._segment_path(segment), "rb") as fh:
+                fh.seek(offset)
+                while (frame := _read_frame(fh)) is not None:
+                    seq, body = frame
+                    if seq > self.durable_seq or len(batch) >= limit:
+                        return batch, (first, offset)
+                    offset += _FRAME.size + len(body)
+                    if seq > self.drained_seq:
+                        batch.append((seq, json.loads(body)))
+        return batch, (first, offset)
+
+    def _remove_drained_segments(self) -> None:
+        segments = self._segments()
+        # A segment is done when the next one starts at or below the drained position
+        for segment, following in zip(segments, segments[1:]):
+            if following - 1 <= self.drained_seq and segment < self._read_pos[0]:
+                self._segment_path(segment).unlink(missing_ok=True)
+
+    def _dead_letter(self, seq: int, entry: Dict[str, Any]) -> None:
+        with open(self.directory / _DEAD_LETTER, "ab") as fh:
+            fh.write(_frame(seq, json.dumps(entry, separators=(",", ":")).encode("utf-8")))
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    async def _store(self, store: Optional[StoreBatch], entries: List[Dict[str, Any]], last: int) -> None:
+        async with get_session() as session:
+            if store is not None:
+                await store(session, entries)
+            offset = await session.get(IngestWalOffset, self.wal_id, with_for_update=True)
+            if offset is None:
+                session.add(IngestWalOffset(wal_id=self.wal_id, lsn=last))
+            else:
+                offset.lsn = last
+
+    async def drain_once(self, store: StoreBatch) -> int:
+        """Persist one batch via ``store`` together with the new drain position; returns entries drained."""
+        loop = asyncio.get_running_loop()
+        limit = 1 if self.drained_seq < self._isolate_until else self.drain_batch
+        batch, position = await loop.run_in_executor(None, self._read_batch, limit)
+        if batch:
+            last = batch[-1][0]
+            try:
+                await self._store(store, [entry for _, entry in batch], last)
+            except _TRANSIENT_ERRORS:
+                raise
+            except Exception:  # noqa: BLE001
+                if len(batch) > 1:
+                    # Find the entry that cannot be stored by retrying the batch one entry at a time
+                    self._isolate_until = last
+                    raise
+                self._attempts += 1
+                if self._attempts < self.max_attempts:
+                    raise
+                logger.exception("moving ingest WAL entry to the dead-letter log", extra={"seq": last})
+                await loop.run_in_executor(None, self._dead_letter, last, batch[0][1])
+                await self._store(None, [], last)
+                WAL_DEAD_LETTERS.inc()
+            else:
+                WAL_DRAINED.inc(len(batch))
+            self._attempts = 0
+            self.drained_seq = last
+            WAL_BACKLOG.set(self.durable_seq - self.drained_seq)
+        self._read_pos = position
+        await loop.run_in_executor(None, self._remove_drained_segments)
+        return len(batch)
+
+    async def drain_forever(self, store: StoreBatch) -> None:
+        while True:
+            self._appended.clear()
+            try:
+                drained = await self.drain_once(store)
+            except Exception:  # noqa: BLE001
+                # Entries stay in the log; the same batch is retried once the database is back
+                logger.exception("ingest WAL drain failed; retrying")
+                await asyncio.sleep(self.retry_seconds)
+                continue
+            if not drained:
+                await self._appended.wait()
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            await self._flusher
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
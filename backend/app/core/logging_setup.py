@@ -1,17 +1,222 @@
 from __future__ import annotations
 
+import atexit
+import copy
+import json
 import logging
 import os
-from pythonjsonlogger import jsonlogger
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler
+from typing import IO, Any, Dict, List, Optional, Tuple
 
+from prometheus_client import Counter
 
-def configure_logging() -> None:
+LOG_DROPPED = Counter("log_records_dropped_total", "Log records dropped because the log queue was full")
+LOG_SUPPRESSED = Counter(
+    "log_records_suppressed_total", "DEBUG records dropped by sampling or rate limiting", ["logger", "reason"]
+)
+
+# Attributes every LogRecord has; anything else on a record came from ``extra=``
+_RECORD_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+
+class FastJsonFormatter(logging.Formatter):
+    """One compact JSON object per record: asctime, levelname, name, message, then any ``extra`` fields.
+
+    Produces the keys python-json-logger did with "%(asctime)s %(levelname)s %(name)s %(message)s",
+    with the timestamp text cached per second.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._second = -1
+        self._second_text = ""
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        second = int(record.created)
+        if second != self._second:
+            self._second_text = time.strftime("%Y-%m-%d %H:%M:%S", self.converter(record.created))
+            self._second = second
+        return f"{self._second_text},{int(record.msecs):03d}"
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "asctime": self.formatTime(record),
+            "levelname": record.levelname,
+            "name": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str, separators=(",", ":"))
+
+
+class DebugSampler(logging.Filter):
+    """Thins out DEBUG records per logger: a fixed sample of some loggers, then a per-second budget for each."""
+
+    def __init__(self, rate_limit: Optional[float] = None, sample_rates: Optional[str] = None) -> None:
+        super().__init__()
+        # DEBUG records per second and logger; more are dropped before they are queued
+        self.rate_limit = float(os.getenv("LOG_DEBUG_RATE_LIMIT", "100")) if rate_limit is None else rate_limit
+        # "logger=rate,..." keeps that fraction of the logger's DEBUG records, e.g. "backend.app.core.ingest_pipeline=0.01"
+        if sample_rates is None:
+            sample_rates = os.getenv("LOG_SAMPLE_RATES", "")
+        self.sample_every: Dict[str, int] = {}
+        for item in filter(None, (part.strip() for part in sample_rates.split(","))):
+            name, _, rate = item.partition("=")
+            self.sample_every[name.strip()] = max(1, round(1 / float(rate))) if float(rate) > 0 else 0
+        self._seen: Dict[str, int] = {}
+        self._suppressed: Dict[Tuple[str, str], Any] = {}
+        # logger -> (tokens, last refill)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def _count(self, name: str, reason: str) -> None:
+        # Labelled children are cached: labels() takes a lock and is too slow for every dropped record
+        child = self._suppressed.get((name, reason))
+        if child is None:
+            child = self._suppressed[(name, reason)] = LOG_SUPPRESSED.labels(logger=name, reason=reason)
+        child.inc()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        name = record.name
+        every = self.sample_every.get(name)
+        if every is not None:
+            seen = self._seen.get(name, 0)
+            self._seen[name] = seen + 1
+            if every == 0 or seen % every:
+                self._count(name, "sampled")
+                return False
+        if self.rate_limit <= 0:
+            return True
+        tokens, last = self._buckets.get(name, (self.rate_limit, record.created))
+        tokens = min(self.rate_limit, tokens + (record.created - last) * self.rate_limit)
+        if tokens < 1:
+            self._buckets[name] = (tokens, record.created)
+            self._count(name, "rate_limited")
+            return False
+        self._buckets[name] = (tokens - 1, record.created)
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Enqueues records for the writer thread; drops (and counts) them when the queue is full."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args now, while they still hold the values at the time of the call; JSON is left to the writer.
+        # On a copy: other handlers and filters of the logger chain still see the record as it was logged
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_DROPPED.inc()
+
+
+class BatchLogWriter:
+    """Background thread that formats queued records and writes each batch with a single write and flush."""
+
+    _STOP = None
+
+    def __init__(
+        self,
+        log_queue: "queue.Queue[Optional[logging.LogRecord]]",
+        stream: IO[str],
+        formatter: logging.Formatter,
+        batch_max: int = 512,
+    ) -> None:
+        self.queue = log_queue
+        self.stream = stream
+        self.formatter = formatter
+        self.batch_max = batch_max
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Write what is queued and end the thread."""
+        if self._thread.is_alive():
+            self.queue.put(self._STOP)
+            self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Optional[logging.LogRecord]] = [self.queue.get()]
+            while len(batch) < self.batch_max:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = []
+            for i, record in enumerate(batch):
+                if record is not self._STOP:
+                    lines.append(self.formatter.format(record))
+                if i % 64 == 63:
+                    # Formatting holds the GIL; hand it back regularly instead of stalling the event loop
+                    # for a whole switch interval (5 ms) per batch
+                    time.sleep(0)
+            if lines:
+                try:
+                    self.stream.write("\n".join(lines) + "\n")
+                    self.stream.flush()
+                except Exception:  # noqa: BLE001
+                    pass
+            if self._STOP in batch:
+                return
+
+
+_writer: Optional[BatchLogWriter] = None
+
+
+def shutdown_logging() -> None:
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+
+
+def configure_logging(stream: Optional[IO[str]] = None) -> None:
+    global _writer
     level = logging.DEBUG if os.getenv("DEBUG", "false").lower() == "true" else logging.INFO
     logger = logging.getLogger()
     logger.setLevel(level)
-    log_handler = logging.StreamHandler()
-    formatter = jsonlogger.JsonFormatter("%(asctime)s %(levelname)s %(name)s %(message)s")
-    log_handler.setFormatter(formatter)
-    logger.handlers = [log_handler]
+    formatter = FastJsonFormatter()
+    previous, writer = _writer, None
+    handler: logging.Handler
+    # "true" formats and writes log lines on a background thread; "false" writes synchronously
+    if os.getenv("LOG_ASYNC", "true").lower() == "true":
+        log_queue: "queue.Queue[Optional[logging.LogRecord]]" = queue.Queue(int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+        handler = NonBlockingQueueHandler(log_queue)
+        writer = BatchLogWriter(
+            log_queue, stream or sys.stderr, formatter, batch_max=int(os.getenv("LOG_BATCH_MAX", "512"))
+        )
+        writer.start()
+    else:
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(formatter)
+    handler.addFilter(DebugSampler())
+    logger.handlers = [handler]
+    _writer = writer
+    # Only once the new handler is installed, so nothing is logged to a queue nobody drains
+    if previous is not None:
+        previous.stop()
 
 
+atexit.register(shutdown_logging)
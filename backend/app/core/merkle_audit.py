@@ -1,65 +1,442 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
-from typing import Any, Dict, List, Optional
+import logging
+import os
+from bisect import bisect_left
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, cast
 
+from ..auth.security import sign_payload
 from ..db.session import get_session
+from sqlalchemy import Select, Table, delete, func, insert, literal, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..models.orm import AuditEvent
+from ..models.orm import AuditEvent, AuditPendingLeaf, AuditSegment, MerkleNode, TreeHead
+from ..models.schemas import AuditEventRead
+from .audit_archive import AuditArchive, LeafRow, write_segment
+from .executor import CpuExecutor
+
+logger = logging.getLogger(__name__)
+
+
+NodeKey = Tuple[int, int]
+Range = Tuple[int, int]
+
+# RFC 6962 domain separation: a leaf hash can never be replayed as an interior node
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
 
 
 def _hash(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
 
 
+def leaf_hash(leaf_data: Dict[str, Any]) -> str:
+    return _hash(_LEAF_PREFIX + json.dumps(leaf_data, sort_keys=True).encode())
+
+
+def node_hash(left: str, right: str) -> str:
+    return _hash(_NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right))
+
+
+def leaf_hashes(batch: Sequence[Dict[str, Any]]) -> List[str]:
+    # Module level so CpuExecutor.map_batch can ship it to worker processes
+    return [leaf_hash(leaf_data) for leaf_data in batch]
+
+
+def subtree_levels(leaves: Sequence[str]) -> List[List[str]]:
+    """Every level of the perfect subtree over ``leaves`` (a power-of-two count), leaves first."""
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        below = levels[-1]
+        levels.append([node_hash(below[i], below[i + 1]) for i in range(0, len(below), 2)])
+    return levels
+
+
+def _split(n: int) -> int:
+    # Largest power of two strictly smaller than n (n > 1)
+    return 1 << ((n - 1).bit_length() - 1)
+
+
+def perfect_subtrees(lo: int, hi: int) -> List[NodeKey]:
+    """Split leaves [lo, hi) into complete subtrees ``(level, idx)``, left to right.
+
+    Valid for every range that appears in an RFC 6962 proof, since those start on a boundary of
+    their own (rounded up) size.
+    """
+    keys: List[NodeKey] = []
+    while lo < hi:
+        level = (hi - lo).bit_length() - 1
+        keys.append((level, lo >> level))
+        lo += 1 << level
+    return keys
+
+
+def range_hash(lo: int, hi: int, nodes: Mapping[NodeKey, str]) -> str:
+    keys = perfect_subtrees(lo, hi)
+    digest = nodes[keys[-1]]
+    for key in reversed(keys[:-1]):
+        digest = node_hash(nodes[key], digest)
+    return digest
+
+
+def inclusion_ranges(index: int, size: int) -> List[Range]:
+    """Leaf ranges whose hashes form the audit path of ``index`` in a tree of ``size`` leaves."""
+    path: List[Range] = []
+    lo, hi = 0, size
+    while hi - lo > 1:
+        k = _split(hi - lo)
+        if index < lo + k:
+            path.append((lo + k, hi))
+            hi = lo + k
+        else:
+            path.append((lo, lo + k))
+            lo += k
+    path.reverse()
+    return path
+
+
+def consistency_ranges(old_size: int, size: int) -> List[Range]:
+    """Leaf ranges whose hashes prove the first ``old_size`` leaves are a prefix of ``size`` leaves."""
+    if not 0 < old_size < size:
+        return []
+    path: List[Range] = []
+    lo, hi = 0, size
+    whole_old_tree = True
+    while hi != old_size:
+        k = _split(hi - lo)
+        if old_size - lo <= k:
+            path.append((lo + k, hi))
+            hi = lo + k
+        else:
+            path.append((lo, lo + k))
+            lo += k
+            whole_old_tree = False
+    if not whole_old_tree:
+        path.append((lo, hi))
+    path.reverse()
+    return path
+
+
+def multiproof_ranges(indices: Sequence[int], size: int) -> List[Range]:
+    """Ranges needed to rebuild the root from the leaves at sorted ``indices``, each emitted once.
+
+    Walks the tree left to right and stops at any subtree holding none of the leaves, so interior
+    nodes shared between individual audit paths appear a single time.
+    """
+    ranges: List[Range] = []
+
+    def walk(lo: int, hi: int) -> None:
+        if bisect_left(indices, lo) == bisect_left(indices, hi):
+            ranges.append((lo, hi))
+        elif hi - lo > 1:
+            k = _split(hi - lo)
+            walk(lo, lo + k)
+            walk(lo + k, hi)
+
+    if indices:
+        walk(0, size)
+    return ranges
+
+
+def multiproof_root(size: int, leaves: Mapping[int, str], nodes: Mapping[Range, str]) -> Optional[str]:
+    """Recompute the root from leaf hashes by index plus the ``(lo, hi) -> hash`` nodes of a multiproof."""
+    indices = sorted(leaves)
+
+    def walk(lo: int, hi: int) -> str:
+        if bisect_left(indices, lo) == bisect_left(indices, hi):
+            return nodes[(lo, hi)]
+        if hi - lo == 1:
+            return leaves[lo]
+        k = _split(hi - lo)
+        return node_hash(walk(lo, lo + k), walk(lo + k, hi))
+
+    if not indices or indices[-1] >= size:
+        return None
+    try:
+        return walk(0, size)
+    except KeyError:
+        return None
+
+
+def verify_multiproof(size: int, leaves: Mapping[int, str], nodes: Mapping[Range, str], root: str) -> bool:
+    return multiproof_root(size, leaves, nodes) == root
+
+
+def verify_inclusion(index: int, size: int, leaf: str, proof: Sequence[str], root: str) -> bool:
+    if not 0 <= index < size:
+        return False
+    fn, sn, digest = index, size - 1, leaf
+    for sibling in proof:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            digest = node_hash(sibling, digest)
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            digest = node_hash(digest, sibling)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and digest == root
+
+
+def verify_consistency(old_size: int, size: int, old_root: str, root: str, proof: Sequence[str]) -> bool:
+    if old_size == size:
+        return old_root == root and not proof
+    if not 0 < old_size < size or not proof:
+        return False
+    path = list(proof)
+    if old_size & (old_size - 1) == 0:
+        path.insert(0, old_root)
+    fn, sn = old_size - 1, size - 1
+    while fn & 1:
+        fn >>= 1
+        sn >>= 1
+    fr = sr = path[0]
+    for node in path[1:]:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            fr = node_hash(node, fr)
+            sr = node_hash(node, sr)
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            sr = node_hash(sr, node)
+        fn >>= 1
+        sn >>= 1
+    return fr == old_root and sr == root and sn == 0
+
+
 class MerkleTree:
-    def __init__(self) -> None:
-        self.leaves: List[str] = []
+    """Append-only RFC 6962 Merkle tree.
+
+    Appending and computing the root only need the right edge (``frontier``). Completed nodes are
+    kept in ``nodes`` for proofs unless ``keep_nodes`` is false, as for AuditLog which stores them.
+    """
+
+    def __init__(self, *, keep_nodes: bool = True) -> None:
+        self.size = 0
+        # level -> hash of the complete subtree at that level still waiting for its right sibling
+        self.frontier: Dict[int, str] = {}
+        self.nodes: Optional[Dict[NodeKey, str]] = {} if keep_nodes else None
+
+    @classmethod
+    def from_frontier(cls, size: int, nodes: Mapping[NodeKey, str]) -> "MerkleTree":
+        tree = cls(keep_nodes=False)
+        tree.size = size
+        tree.frontier = {level: nodes[(level, idx)] for level, idx in cls.frontier_keys(size)}
+        return tree
+
+    @staticmethod
+    def frontier_keys(size: int) -> List[NodeKey]:
+        return [(level, (size >> level) - 1) for level in range(size.bit_length()) if (size >> level) & 1]
 
     def append(self, leaf_data: Dict[str, Any]) -> int:
-        leaf_hash = _hash(json.dumps(leaf_data, sort_keys=True).encode())
-        self.leaves.append(leaf_hash)
-        return len(self.leaves) - 1
+        self.append_hash(leaf_hash(leaf_data))
+        return self.size - 1
+
+    def append_hash(self, digest: str) -> List[Tuple[int, int, str]]:
+        """Append a leaf hash and return the ``(level, idx, hash)`` nodes it completed, leaf first."""
+        index = self.size
+        created = [(0, index, digest)]
+        level = 0
+        while (index >> level) & 1:
+            digest = node_hash(self.frontier.pop(level), digest)
+            level += 1
+            created.append((level, index >> level, digest))
+        self.frontier[level] = digest
+        self.size += 1
+        if self.nodes is not None:
+            for lvl, idx, node in created:
+                self.nodes[(lvl, idx)] = node
+        return created
 
     def root(self) -> Optional[str]:
-        nodes = self.leaves[:]
-        if not nodes:
-            return None
-        while len(nodes) > 1:
-            nxt: List[str] = []
-            for i in range(0, len(nodes), 2):
-                left = nodes[i]
-                right = nodes[i + 1] if i + 1 < len(nodes) else left
-                nxt.append(_hash((left + right).encode()))
-            nodes = nxt
-        return nodes[0]
-
-    def proof(self, index: int) -> List[str]:
-        # Simple sibling list proof for demonstration
-        proof: List[str] = []
-        nodes = self.leaves[:]
-        idx = index
-        if idx < 0 or idx >= len(nodes):
+        digest: Optional[str] = None
+        # Lower levels are further right, so fold upwards
+        for level in sorted(self.frontier):
+            digest = self.frontier[level] if digest is None else node_hash(self.frontier[level], digest)
+        return digest
+
+    def proof(self, index: int, size: Optional[int] = None) -> List[str]:
+        size = self.size if size is None else size
+        if self.nodes is None or not 0 <= index < size <= self.size:
             return []
-        level = nodes
-        while len(level) > 1:
-            nxt: List[str] = []
-            for i in range(0, len(level), 2):
-                left = level[i]
-                right = level[i + 1] if i + 1 < len(level) else left
-                if i == idx ^ 1 or i + 1 == idx:
-                    sibling = right if idx == i else left
-                    proof.append(sibling)
-                nxt.append(_hash((left + right).encode()))
-            idx //= 2
-            level = nxt
-        return proof
+        return [range_hash(lo, hi, self.nodes) for lo, hi in inclusion_ranges(index, size)]
 
+    def consistency_proof(self, old_size: int, size: Optional[int] = None) -> List[str]:
+        size = self.size if size is None else size
+        if self.nodes is None or size > self.size:
+            return []
+        return [range_hash(lo, hi, self.nodes) for lo, hi in consistency_ranges(old_size, size)]
+
+
+class _SharedTree:
+    """Process-wide frontier of the committed tree, only changed by the sequencer while it holds ``lock()``."""
 
-class AuditLog:
     def __init__(self) -> None:
-        self.tree = MerkleTree()
+        self.tree: Optional[MerkleTree] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock, self._loop = asyncio.Lock(), loop
+        return self._lock
+
+
+_shared = _SharedTree()
+# pg_advisory_xact_lock key ("nssaudit") serialising the sequencer across worker processes
+_APPEND_LOCK_KEY = 0x6E73736175646974
+_NODE_FETCH_CHUNK = 500
+DEFAULT_EVENT_PAGE_SIZE = 100
+MAX_EVENT_PAGE_SIZE = 1000
+_EVENT_COLUMNS = (
+    AuditEvent.id,
+    AuditEvent.action,
+    AuditEvent.actor_id,
+    AuditEvent.scope,
+    AuditEvent.payload,
+    AuditEvent.merkle_root,
+    AuditEvent.leaf_index,
+    AuditEvent.created_at,
+)
+
+
+class AuditLog:
+    def __init__(self, archive: Optional[AuditArchive] = None, executor: Optional[CpuExecutor] = None) -> None:
+        self.archive = archive if archive is not None else AuditArchive()
+        self.executor = executor or CpuExecutor()
+        self.max_batch_proof_events = int(os.getenv("AUDIT_MAX_BATCH_PROOF_EVENTS", "100000"))
+        self.proof_stream_chunk_size = int(os.getenv("AUDIT_PROOF_STREAM_CHUNK_SIZE", "5000"))
+        self.event_stream_chunk_size = int(os.getenv("AUDIT_EVENT_STREAM_CHUNK_SIZE", "1000"))
+        self.archive_segment_level = int(os.getenv("AUDIT_ARCHIVE_SEGMENT_LEVEL", "16"))
+        self.archive_keep_leaves = int(os.getenv("AUDIT_ARCHIVE_KEEP_LEAVES", "1000000"))
+        # Pending leaves given indices per sequencer transaction
+        self.sequence_batch_size = int(os.getenv("AUDIT_SEQUENCE_BATCH_SIZE", "5000"))
+
+    async def _committed_size(self, session: AsyncSession) -> int:
+        last = await session.scalar(select(func.max(MerkleNode.idx)).where(MerkleNode.level == 0))
+        return 0 if last is None else last + 1
+
+    async def _fetch_nodes(self, session: AsyncSession, keys: Iterable[NodeKey]) -> Dict[NodeKey, str]:
+        found: Dict[NodeKey, str] = {}
+        hot: List[NodeKey] = []
+        for key in sorted(set(keys)):
+            archived = self.archive.node(*key)
+            if archived is None:
+                hot.append(key)
+            else:
+                found[key] = archived
+        for i in range(0, len(hot), _NODE_FETCH_CHUNK):
+            chunk = hot[i : i + _NODE_FETCH_CHUNK]
+            result = await session.execute(
+                select(MerkleNode.level, MerkleNode.idx, MerkleNode.hash).where(
+                    tuple_(MerkleNode.level, MerkleNode.idx).in_(chunk)
+                )
+            )
+            found.update({(row.level, row.idx): row.hash for row in result})
+        missing = [key for key in hot if key not in found]
+        if missing:
+            # Possibly archived by another process since the catalog was loaded
+            await self.archive.refresh(session)
+            found.update({key: node for key in missing if (node := self.archive.node(*key)) is not None})
+            missing = [key for key in missing if key not in found]
+        if missing:
+            raise LookupError(f"merkle nodes missing from storage: {missing[:5]}")
+        return found
+
+    async def _range_hashes(self, session: AsyncSession, ranges: Sequence[Range]) -> List[str]:
+        nodes = await self._fetch_nodes(session, (key for lo, hi in ranges for key in perfect_subtrees(lo, hi)))
+        return [range_hash(lo, hi, nodes) for lo, hi in ranges]
+
+    async def _current_tree(self, session: AsyncSession) -> MerkleTree:
+        db_size = await self._committed_size(session)
+        tree = _shared.tree
+        # Another process sequenced, or the table was reset: reload the frontier from storage
+        if tree is None or db_size != tree.size:
+            tree = MerkleTree.from_frontier(
+                db_size, await self._fetch_nodes(session, MerkleTree.frontier_keys(db_size))
+            )
+            _shared.tree = tree
+        return tree
+
+    async def tree_at(self, size: int) -> MerkleTree:
+        """Frontier-only tree over the first ``size`` committed leaves, e.g. to resume from a checkpoint."""
+        async with get_session() as session:
+            return MerkleTree.from_frontier(size, await self._fetch_nodes(session, MerkleTree.frontier_keys(size)))
+
+    async def sequence(self) -> int:
+        """Give committed events waiting in ``audit_pending_leaves`` their leaf index; returns how many.
+
+        Events are written with their transaction and only join the tree once it has committed, in a
+        short transaction of their own, so a rolled-back write never leaves a leaf behind and no
+        writer waits for another's transaction. The tree is only extended here, under the in-process
+        lock and, on PostgreSQL, an advisory lock shared by every worker.
+        """
+        sequenced = 0
+        async with get_session() as session:
+            if await session.scalar(select(AuditPendingLeaf.event_id).limit(1)) is None:
+                return 0
+        while True:
+            async with _shared.lock():
+                try:
+                    async with get_session() as session:
+                        count = await self._sequence_batch(session)
+                except BaseException:
+                    # The frontier may hold leaves whose nodes never committed
+                    _shared.tree = None
+                    raise
+            sequenced += count
+            if count < self.sequence_batch_size:
+                return sequenced
+
+    async def _sequence_batch(self, session: AsyncSession) -> int:
+        if session.bind.dialect.name == "postgresql":
+            # Held until this short transaction commits, not for the writers' transactions
+            await session.execute(select(func.pg_advisory_xact_lock(_APPEND_LOCK_KEY)))
+        pending = (
+            await session.execute(
+                select(AuditPendingLeaf.event_id, AuditPendingLeaf.leaf_hash, AuditPendingLeaf.with_root)
+                .order_by(AuditPendingLeaf.event_id)
+                .limit(self.sequence_batch_size)
+            )
+        ).all()
+        if not pending:
+            return 0
+        tree = await self._current_tree(session)
+        created: List[Tuple[int, int, str]] = []
+        events: List[Dict[str, Any]] = []
+        for row in pending:
+            events.append({"id": row.event_id, "leaf_index": tree.size})
+            created.extend(tree.append_hash(row.leaf_hash))
+            events[-1]["merkle_root"] = tree.root() if row.with_root else None
+        await session.execute(
+            insert(cast(Table, MerkleNode.__table__)),
+            [{"level": level, "idx": idx, "hash": node} for level, idx, node in created],
+        )
+        await session.execute(update(AuditEvent), events)
+        await session.execute(
+            delete(AuditPendingLeaf).where(AuditPendingLeaf.event_id.in_([row.event_id for row in pending]))
+        )
+        return len(pending)
+
+    async def _add_pending(self, session: AsyncSession, event_ids: Sequence[int], digests: Sequence[str]) -> None:
+        await session.execute(
+            insert(cast(Table, AuditPendingLeaf.__table__)),
+            [
+                {"event_id": event_id, "leaf_hash": digest, "with_root": i == len(event_ids) - 1}
+                for i, (event_id, digest) in enumerate(zip(event_ids, digests))
+            ],
+        )
 
     async def append_event(
         self,
@@ -76,39 +453,457 @@ class AuditLog:
             "scope": scope,
             "payload": payload,
         }
-        self.tree.append(event_payload)
-        root = self.tree.root()
+        digest = leaf_hash(event_payload)
         if session is not None:
-            event = AuditEvent(
-                action=action,
-                actor_id=actor_id,
-                scope=scope,
-                payload=json.dumps(payload),
-                merkle_root=root,
+            # The caller calls sequence() once its transaction has committed
+            return await self._store_event(session, event_payload, digest)
+        async with get_session() as owned_session:
+            event_id = await self._store_event(owned_session, event_payload, digest)
+        await self.sequence()
+        return event_id
+
+    async def _store_event(self, session: AsyncSession, event_payload: Dict[str, Any], digest: str) -> int:
+        event = AuditEvent(
+            action=event_payload["action"],
+            actor_id=event_payload["actor_id"],
+            scope=event_payload["scope"],
+            payload=json.dumps(event_payload["payload"]),
+        )
+        session.add(event)
+        await session.flush()
+        await self._add_pending(session, [event.id], [digest])
+        return event.id
+
+    async def append_events(
+        self,
+        events: Sequence[Dict[str, Any]],
+        *,
+        session: Optional[AsyncSession] = None,
+    ) -> None:
+        # Bulk variant of append_event: one executemany insert, no per-row flush/refresh round-trips.
+        # Only the last event of the batch carries the merkle_root; the per-event roots are still
+        # derivable from the stored nodes via leaf_index. With a caller's session, the caller calls
+        # sequence() once its transaction has committed.
+        if not events:
+            return
+        leaves = [
+            {
+                "action": event["action"],
+                "actor_id": event["actor_id"],
+                "scope": event["scope"],
+                "payload": event["payload"],
+            }
+            for event in events
+        ]
+        # Leaf hashing is the CPU-heavy part and is pure, so it can leave the event loop
+        digests = await self.executor.map_batch(leaf_hashes, leaves)
+        if session is not None:
+            await self._store_events(session, leaves, digests)
+            return
+        async with get_session() as owned_session:
+            await self._store_events(owned_session, leaves, digests)
+        await self.sequence()
+
+    async def _store_events(
+        self, session: AsyncSession, leaves: Sequence[Dict[str, Any]], digests: Sequence[str]
+    ) -> None:
+        rows: List[Dict[str, Any]] = [
+            {
+                "action": leaf["action"],
+                "actor_id": leaf["actor_id"],
+                "scope": leaf["scope"],
+                "payload": json.dumps(leaf["payload"]),
+            }
+            for leaf in leaves
+        ]
+        stmt = insert(cast(Table, AuditEvent.__table__)).returning(AuditEvent.id, sort_by_parameter_order=True)
+        event_ids = list((await session.execute(stmt, rows)).scalars())
+        await self._add_pending(session, event_ids, digests)
+
+    async def _archived_event(self, session: AsyncSession, event_id: int) -> Optional[AuditEventRead]:
+        record = self.archive.event(event_id)
+        if record is None:
+            await self.archive.refresh(session)
+            record = self.archive.event(event_id)
+        return None if record is None else AuditEventRead.model_validate(record)
+
+    async def get_event(self, event_id: int) -> Optional[AuditEventRead]:
+        async with get_session() as session:
+            row = (await session.execute(select(*_EVENT_COLUMNS).where(AuditEvent.id == event_id))).first()
+            if row is not None:
+                return self._event_from_row(row)
+            return await self._archived_event(session, event_id)
+
+    async def get_inclusion_proof(self, event_id: int, tree_size: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        await self.sequence()
+        async with get_session() as session:
+            db_obj: Optional[Any] = await session.get(AuditEvent, event_id)
+            if not db_obj:
+                db_obj = await self._archived_event(session, event_id)
+                if not db_obj:
+                    return None
+            if db_obj.leaf_index is None:
+                # Events written before leaves were persisted are not part of the tree
+                return {"event_id": event_id, "merkle_root": db_obj.merkle_root, "proof": []}
+            current = await self._committed_size(session)
+            size = current if tree_size is None else tree_size
+            if not db_obj.leaf_index < size <= current:
+                raise ValueError(f"tree_size must be in ({db_obj.leaf_index}, {current}]")
+            ranges = inclusion_ranges(db_obj.leaf_index, size)
+            nodes = await self._fetch_nodes(
+                session,
+                [(0, db_obj.leaf_index), *MerkleTree.frontier_keys(size)]
+                + [key for lo, hi in ranges for key in perfect_subtrees(lo, hi)],
             )
-            session.add(event)
-            await session.flush()
-            await session.refresh(event)
-            return event.id
+            return {
+                "event_id": event_id,
+                "leaf_index": db_obj.leaf_index,
+                "leaf_hash": nodes[(0, db_obj.leaf_index)],
+                "tree_size": size,
+                "root_hash": range_hash(0, size, nodes),
+                "merkle_root": db_obj.merkle_root,
+                "proof": [range_hash(lo, hi, nodes) for lo, hi in ranges],
+            }
+
+    async def _proof_size(self, session: AsyncSession, tree_size: Optional[int]) -> int:
+        current = await self._committed_size(session)
+        size = current if tree_size is None else tree_size
+        if not 0 < size <= current:
+            raise ValueError(f"tree_size must be in (0, {current}]")
+        return size
+
+    async def _root_at(self, session: AsyncSession, size: int) -> str:
+        return range_hash(0, size, await self._fetch_nodes(session, MerkleTree.frontier_keys(size)))
+
+    @staticmethod
+    def _leaf_rows(size: int, start_id: Optional[int] = None, end_id: Optional[int] = None) -> Select:
+        stmt = (
+            select(AuditEvent.id, AuditEvent.leaf_index, MerkleNode.hash)
+            .join(MerkleNode, (MerkleNode.level == 0) & (MerkleNode.idx == AuditEvent.leaf_index))
+            .where(AuditEvent.leaf_index < size)
+            .order_by(AuditEvent.leaf_index)
+        )
+        if start_id is not None:
+            stmt = stmt.where(AuditEvent.id >= start_id)
+        if end_id is not None:
+            stmt = stmt.where(AuditEvent.id <= end_id)
+        return stmt
+
+    async def get_batch_proof(
+        self,
+        *,
+        event_ids: Optional[Sequence[int]] = None,
+        start_id: Optional[int] = None,
+        end_id: Optional[int] = None,
+        tree_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Multiproof for a list or an id range of events against one tree head.
+
+        ``nodes`` holds ``[lo, hi, hash]`` for every subtree needed besides the leaves themselves, each
+        once; ``verify_multiproof`` recomputes the root from them.
+        """
+        await self.sequence()
+        async with get_session() as session:
+            size = await self._proof_size(session, tree_size)
+            rows: List[Any] = []
+            if event_ids is not None:
+                wanted = sorted(set(event_ids))
+                for i in range(0, len(wanted), _NODE_FETCH_CHUNK):
+                    chunk = wanted[i : i + _NODE_FETCH_CHUNK]
+                    rows.extend(await session.execute(self._leaf_rows(size).where(AuditEvent.id.in_(chunk))))
+                hot = {row.id for row in rows}
+                if len(hot) < len(wanted):
+                    await self.archive.refresh(session)
+                for event_id in wanted:
+                    leaf_index = None if event_id in hot else self.archive.leaf_index(event_id)
+                    if leaf_index is not None and leaf_index < size:
+                        leaf = self.archive.node(0, leaf_index)
+                        rows.append(LeafRow(event_id, leaf_index, cast(str, leaf)))
+                rows.sort(key=lambda row: row.leaf_index)
+            else:
+                # Archived leaves all precede the ones still in the database
+                await self.archive.refresh(session)
+                limit = self.max_batch_proof_events + 1
+                rows.extend(islice(self.archive.leaf_rows(start_id, end_id, size), limit))
+                stmt = self._leaf_rows(size, start_id, end_id).limit(limit - len(rows))
+                rows.extend(await session.execute(stmt))
+            if len(rows) > self.max_batch_proof_events:
+                raise ValueError(
+                    f"more than {self.max_batch_proof_events} events; use the streaming proof endpoint"
+                )
+            ranges = multiproof_ranges([row.leaf_index for row in rows], size)
+            hashes = await self._range_hashes(session, ranges)
+            proof: Dict[str, Any] = {
+                "tree_size": size,
+                "root_hash": await self._root_at(session, size),
+                "leaves": [[row.id, row.leaf_index, row.hash] for row in rows],
+                "nodes": [[lo, hi, node] for (lo, hi), node in zip(ranges, hashes)],
+            }
+        if event_ids is not None:
+            # Unknown ids, legacy rows without a leaf and events appended after tree_size
+            found = {row.id for row in rows}
+            proof["missing"] = [event_id for event_id in wanted if event_id not in found]
+        return proof
+
+    async def stream_batch_proof(
+        self,
+        *,
+        start_id: Optional[int] = None,
+        end_id: Optional[int] = None,
+        tree_size: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Multiproof for an id range in parts: a ``{tree_size, root_hash}`` head, then ``{leaves, nodes}``.
+
+        Each part carries the nodes lying between the previous part's last leaf and its own, so the
+        concatenated parts hold exactly the nodes of the one-shot multiproof. Parts hold at most
+        ``AUDIT_MAX_BATCH_PROOF_EVENTS`` leaves.
+        """
+        chunk_size = min(chunk_size or self.proof_stream_chunk_size, self.max_batch_proof_events)
+        await self.sequence()
+        async with get_session() as session:
+            size = await self._proof_size(session, tree_size)
+            yield {"tree_size": size, "root_hash": await self._root_at(session, size)}
+            await self.archive.refresh(session)
+
+            async def partitions() -> AsyncIterator[Sequence[Any]]:
+                # Archived leaves first: they all precede the ones still in the database
+                archived = self.archive.leaf_rows(start_id, end_id, size)
+                while part := list(islice(archived, chunk_size)):
+                    yield part
+                stmt = self._leaf_rows(size, start_id, end_id).execution_options(yield_per=chunk_size)
+                result = await session.stream(stmt)
+                async for part in result.partitions():
+                    yield part
+
+            previous = -1
+            async for part in partitions():
+                indices = [row.leaf_index for row in part]
+                context = [previous, *indices] if previous >= 0 else indices
+                ranges = [r for r in multiproof_ranges(context, size) if previous < r[0] and r[1] <= indices[-1]]
+                hashes = await self._range_hashes(session, ranges)
+                yield {
+                    "leaves": [[row.id, row.leaf_index, row.hash] for row in part],
+                    "nodes": [[lo, hi, node] for (lo, hi), node in zip(ranges, hashes)],
+                }
+                previous = indices[-1]
+            if previous >= 0:
+                ranges = [r for r in multiproof_ranges([previous], size) if r[0] > previous]
+                hashes = await self._range_hashes(session, ranges)
+                yield {"leaves": [], "nodes": [[lo, hi, node] for (lo, hi), node in zip(ranges, hashes)]}
+
+    @staticmethod
+    def _events_stmt(
+        *,
+        actor_id: Optional[str],
+        action: Optional[str],
+        scope: Optional[str],
+        since: Optional[datetime],
+        until: Optional[datetime],
+        before: Optional[Tuple[datetime, int]],
+    ) -> Select:
+        # Newest first; (created_at, id) is the keyset so pages stay stable while events are appended
+        stmt = select(*_EVENT_COLUMNS).order_by(AuditEvent.created_at.desc(), AuditEvent.id.desc())
+        if actor_id:
+            stmt = stmt.where(AuditEvent.actor_id == actor_id)
+        if action:
+            stmt = stmt.where(AuditEvent.action == action)
+        if scope:
+            stmt = stmt.where(AuditEvent.scope == scope)
+        if since is not None:
+            stmt = stmt.where(AuditEvent.created_at >= since)
+        if until is not None:
+            stmt = stmt.where(AuditEvent.created_at < until)
+        if before is not None:
+            stmt = stmt.where(tuple_(AuditEvent.created_at, AuditEvent.id) < tuple_(literal(before[0]), literal(before[1])))
+        return stmt
+
+    @staticmethod
+    def _event_from_row(row: Any) -> AuditEventRead:
+        return AuditEventRead(
+            id=row.id,
+            action=row.action,
+            actor_id=row.actor_id,
+            scope=row.scope,
+            payload=json.loads(row.payload),
+            merkle_root=row.merkle_root,
+            leaf_index=row.leaf_index,
+            created_at=row.created_at,
+        )
+
+    async def list_events(
+        self,
+        *,
+        actor_id: Optional[str] = None,
+        action: Optional[str] = None,
+        scope: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        before: Optional[Tuple[datetime, int]] = None,
+        limit: int = DEFAULT_EVENT_PAGE_SIZE,
+    ) -> List[AuditEventRead]:
+        stmt = self._events_stmt(
+            actor_id=actor_id, action=action, scope=scope, since=since, until=until, before=before
+        )
+        async with get_session() as session:
+            result = await session.execute(stmt.limit(limit))
+            return [self._event_from_row(row) for row in result]
+
+    async def stream_events(
+        self,
+        *,
+        actor_id: Optional[str] = None,
+        action: Optional[str] = None,
+        scope: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        chunk_size: Optional[int] = None,
+        session: Optional[AsyncSession] = None,
+    ) -> AsyncIterator[AuditEventRead]:
+        chunk_size = chunk_size or self.event_stream_chunk_size
+        stmt = self._events_stmt(
+            actor_id=actor_id, action=action, scope=scope, since=since, until=until, before=None
+        )
+        if session is not None:
+            async for event in self._stream_event_rows(session, stmt, chunk_size):
+                yield event
+            return
         async with get_session() as owned_session:
-            event = AuditEvent(
-                action=action,
-                actor_id=actor_id,
-                scope=scope,
-                payload=json.dumps(payload),
-                merkle_root=root,
+            async for event in self._stream_event_rows(owned_session, stmt, chunk_size):
+                yield event
+
+    async def _stream_event_rows(
+        self, session: AsyncSession, stmt: Select, chunk_size: int
+    ) -> AsyncIterator[AuditEventRead]:
+        result = await session.stream(stmt.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            for row in partition:
+                yield self._event_from_row(row)
+
+    async def _level_hashes(self, session: AsyncSession, level: int, lo: int, hi: int) -> List[str]:
+        result = await session.execute(
+            select(MerkleNode.hash)
+            .where(MerkleNode.level == level, MerkleNode.idx >= lo, MerkleNode.idx < hi)
+            .order_by(MerkleNode.idx)
+        )
+        return list(result.scalars())
+
+    async def archive_sealed_segment(
+        self, *, level: Optional[int] = None, keep_leaves: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Move the oldest subtree of ``2**level`` leaves still in the database to a segment file.
+
+        Only subtrees lying entirely below the newest ``keep_leaves`` leaves are sealed. The events and
+        every node under the subtree root are deleted; the root itself stays as the anchor.
+        """
+        level = self.archive_segment_level if level is None else level
+        keep_leaves = self.archive_keep_leaves if keep_leaves is None else keep_leaves
+        await self.sequence()
+        async with get_session() as session:
+            await self.archive.refresh(session)
+            first = self.archive.next_leaf
+            if first:
+                # Stay aligned when the segment level was raised since the last run
+                level = min(level, (first & -first).bit_length() - 1)
+            span = 1 << level
+            # The newest leaf always stays in the database: the committed size is read from it
+            if first + span + max(1, keep_leaves) > await self._committed_size(session):
+                return None
+            result = await session.execute(
+                select(*_EVENT_COLUMNS)
+                .where(AuditEvent.leaf_index >= first, AuditEvent.leaf_index < first + span)
+                .order_by(AuditEvent.leaf_index)
+            )
+            events = [self._event_from_row(row) for row in result]
+            if len(events) != span:
+                raise RuntimeError(f"leaves [{first}, {first + span}) have {len(events)} events")
+            leaves = [
+                {"action": e.action, "actor_id": e.actor_id, "scope": e.scope, "payload": e.payload}
+                for e in events
+            ]
+            digests = await self.executor.map_batch(leaf_hashes, leaves)
+            if digests != await self._level_hashes(session, 0, first, first + span):
+                raise RuntimeError(f"leaves [{first}, {first + span}) do not match their events")
+            levels = await self.executor.offload(subtree_levels, digests)
+            anchor = (await self._fetch_nodes(session, [(level, first >> level)]))[(level, first >> level)]
+            if levels[-1][0] != anchor:
+                raise RuntimeError(f"subtree ({level}, {first >> level}) does not match its stored root")
+            records = [e.model_dump(mode="json") for e in events]
+            path = await self.executor.offload(
+                write_segment, self.archive.directory, first, levels, records, self.archive.block_events
             )
-            owned_session.add(event)
-            await owned_session.flush()
-            await owned_session.refresh(event)
-            return event.id
+            session.add(AuditSegment(first_leaf=first, level=level, path=path.name, root_hash=anchor))
+            await session.execute(
+                delete(AuditEvent).where(AuditEvent.leaf_index >= first, AuditEvent.leaf_index < first + span)
+            )
+            for lower in range(level):
+                await session.execute(
+                    delete(MerkleNode).where(
+                        MerkleNode.level == lower,
+                        MerkleNode.idx >= first >> lower,
+                        MerkleNode.idx < (first + span) >> lower,
+                    )
+                )
+        return {"first_leaf": first, "level": level, "events": span, "path": str(path)}
 
-    async def get_inclusion_proof(self, event_id: int) -> Optional[Dict[str, Any]]:
+    async def get_consistency_proof(self, first: int, second: int) -> Dict[str, Any]:
+        await self.sequence()
         async with get_session() as session:
-            db_obj = await session.get(AuditEvent, event_id)
-            if not db_obj:
+            current = await self._committed_size(session)
+            if not 0 < first <= second <= current:
+                raise ValueError(f"require 0 < first <= second <= {current}")
+            proof = await self._range_hashes(session, consistency_ranges(first, second))
+        return {"first": first, "second": second, "proof": proof}
+
+    @staticmethod
+    def _tree_head_dict(head: TreeHead) -> Dict[str, Any]:
+        return {
+            "tree_size": head.tree_size,
+            "root_hash": head.root_hash,
+            "timestamp": int(head.timestamp.replace(tzinfo=timezone.utc).timestamp() * 1000),
+            "signature": head.signature,
+        }
+
+    async def publish_tree_head(self) -> Optional[Dict[str, Any]]:
+        """Sign and store the head of the committed tree; a no-op when the tree has not grown."""
+        await self.sequence()
+        async with get_session() as session:
+            size = await self._committed_size(session)
+            if size == 0:
                 return None
-            # This simplistic in-memory tree won't persist across restarts; in production persist leaves
-            return {"event_id": event_id, "merkle_root": db_obj.merkle_root, "proof": []}
+            latest = await session.scalar(select(TreeHead).order_by(TreeHead.tree_size.desc()).limit(1))
+            if latest is not None and latest.tree_size == size:
+                return self._tree_head_dict(latest)
+            nodes = await self._fetch_nodes(session, MerkleTree.frontier_keys(size))
+            now = datetime.now(timezone.utc).replace(microsecond=0)
+            statement = {
+                "tree_size": size,
+                "root_hash": range_hash(0, size, nodes),
+                "timestamp": int(now.timestamp() * 1000),
+            }
+            head = TreeHead(
+                tree_size=size,
+                root_hash=statement["root_hash"],
+                timestamp=now.replace(tzinfo=None),
+                signature=sign_payload(statement),
+            )
+            session.add(head)
+            await session.flush()
+            return self._tree_head_dict(head)
+
+    async def get_tree_head(self, tree_size: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        async with get_session() as session:
+            stmt = select(TreeHead).order_by(TreeHead.tree_size.desc()).limit(1)
+            if tree_size is not None:
+                stmt = select(TreeHead).where(TreeHead.tree_size == tree_size)
+            head = await session.scalar(stmt)
+            return None if head is None else self._tree_head_dict(head)
 
 
+async def publish_tree_heads(audit_log: AuditLog, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await audit_log.publish_tree_head()
+        except Exception:  # noqa: BLE001
+            logger.exception("failed to publish audit tree head")
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import struct
+import time
+import zlib
+from collections import Counter
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.orm import PayloadDictionary
+
+# Stored payload = one format byte + body. Rows written before this format are plain JSON text
+# (or its UTF-8 bytes), which always starts with "{" or "[" and so never collides with a format byte.
+FORMAT_RAW = 0x00
+FORMAT_ZLIB = 0x01
+FORMAT_ZLIB_DICT = 0x02  # followed by the u32 dictionary id, then a stream compressed with zdict
+_DICT_HEADER = struct.Struct("<BI")
+
+# zlib can only reference the last 32 KiB before the data
+DICTIONARY_MAX_BYTES = 32 * 1024
+
+# A JSON member or array element: everything up to the next top-level separator
+_FRAGMENT = re.compile(rb'"[^"\\]*"\s*:\s*(?:"[^"\\]*"|[^,{}\[\]]*)|"[^"\\]*"')
+
+
+def train_dictionary(samples: Sequence[bytes], max_bytes: int = DICTIONARY_MAX_BYTES) -> bytes:
+    """Build a zlib preset dictionary from sample serialized payloads.
+
+    Fragments seen more than once are ranked by how many bytes they would save (count x length).
+    The best ones go last because zlib matches nearby dictionary bytes with shorter distances.
+    """
+    counts: Counter[bytes] = Counter()
+    for sample in samples:
+        counts.update(_FRAGMENT.findall(sample))
+    ranked = sorted(((count * len(fragment), fragment) for fragment, count in counts.items() if count > 1), reverse=True)
+    chosen, total = [], 0
+    for _, fragment in ranked:
+        if total + len(fragment) > max_bytes:
+            continue
+        chosen.append(fragment)
+        total += len(fragment)
+    return b"".join(reversed(chosen))
+
+
+def serialize(payload: Any) -> bytes:
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+class PayloadCodec:
+    """Encodes ingest payloads for storage: raw below a size threshold, otherwise zlib, using the
+    newest dictionary trained for the record's purpose when one exists."""
+
+    def __init__(self) -> None:
+        self.compress_min_bytes = int(os.getenv("PAYLOAD_COMPRESS_MIN_BYTES", "128"))
+        self.compress_level = int(os.getenv("PAYLOAD_COMPRESS_LEVEL", "6"))
+        self.refresh_seconds = float(os.getenv("PAYLOAD_DICTIONARY_REFRESH_SECONDS", "300"))
+        self._by_id: Dict[int, bytes] = {}
+        self._by_purpose: Dict[str, Tuple[int, bytes]] = {}
+        self._loaded_at: Optional[float] = None
+
+    async def refresh(self, session: AsyncSession, *, force: bool = False) -> None:
+        """Reload dictionaries (there are few of them) when stale, to pick up ones trained elsewhere."""
+        if not force and self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_seconds:
+            return
+        result = await session.execute(
+            select(PayloadDictionary.id, PayloadDictionary.purpose, PayloadDictionary.data).order_by(PayloadDictionary.id)
+        )
+        by_id, by_purpose = {}, {}
+        for row in result:
+            by_id[row.id] = row.data
+            by_purpose[row.purpose] = (row.id, row.data)
+        self._by_id, self._by_purpose = by_id, by_purpose
+        self._loaded_at = time.monotonic()
+
+    def encode(self, purpose: str, payload: Any) -> bytes:
+        return self.encode_serialized(purpose, serialize(payload))
+
+    def encode_serialized(self, purpose: str, raw: bytes) -> bytes:
+        """Stored form of a payload already passed through ``serialize``; thread-safe, so it may be offloaded."""
+        if len(raw) < self.compress_min_bytes:
+            return bytes([FORMAT_RAW]) + raw
+        entry = self._by_purpose.get(purpose)
+        if entry is not None:
+            dict_id, zdict = entry
+            compressor = zlib.compressobj(self.compress_level, zdict=zdict)
+            encoded = _DICT_HEADER.pack(FORMAT_ZLIB_DICT, dict_id) + compressor.compress(raw) + compressor.flush()
+        else:
+            encoded = bytes([FORMAT_ZLIB]) + zlib.compress(raw, self.compress_level)
+        return encoded if len(encoded) <= len(raw) else bytes([FORMAT_RAW]) + raw
+
+    def decode(self, stored: Union[bytes, str]) -> Any:
+        if isinstance(stored, str):
+            return json.loads(stored)
+        fmt = stored[0]
+        if fmt == FORMAT_RAW:
+            return json.loads(stored[1:])
+        if fmt == FORMAT_ZLIB:
+            return json.loads(zlib.decompress(stored[1:]))
+        if fmt == FORMAT_ZLIB_DICT:
+            _, dict_id = _DICT_HEADER.unpack_from(stored)
+            zdict = self._by_id.get(dict_id)
+            if zdict is None:
+                raise LookupError(f"payload dictionary {dict_id} is not loaded")
+            decompressor = zlib.decompressobj(zdict=zdict)
+            return json.loads(decompressor.decompress(stored[_DICT_HEADER.size :]) + decompressor.flush())
+        if fmt in b"{[":
+            return json.loads(stored)
+        raise ValueError(f"unknown payload format byte {fmt:#04x}")
+
+    async def decode_async(self, session: AsyncSession, stored: Union[bytes, str]) -> Any:
+        try:
+            return self.decode(stored)
+        except LookupError:
+            # Written with a dictionary trained after our last refresh
+            await self.refresh(session, force=True)
+            return self.decode(stored)
+
+    async def add_dictionary(self, session: AsyncSession, purpose: str, data: bytes) -> int:
+        row = PayloadDictionary(purpose=purpose, data=data)
+        session.add(row)
+        await session.flush()
+        self.register(row.id, purpose, data)
+        return row.id
+
+    def register(self, dict_id: int, purpose: str, data: bytes) -> None:
+        """Make a dictionary available for decoding and the newest one for ``purpose`` when encoding."""
+        self._by_id[dict_id] = data
+        self._by_purpose[purpose] = (dict_id, data)
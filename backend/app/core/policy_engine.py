@@ -1,14 +1,34 @@
 from __future__ import annotations
 
 import os
+from typing import TYPE_CHECKING, Optional
 
-import httpx
+from .circuit_breaker import CircuitBreaker
+
+if TYPE_CHECKING:
+    import httpx
 
 
 class PolicyEngine:
     def __init__(self) -> None:
         self.opa_url = os.getenv("OPA_URL", "http://localhost:8181")
         self.use_opa = os.getenv("USE_OPA", "false").lower() == "true"
+        self._client: Optional["httpx.AsyncClient"] = None
+        # While OPA is down, decisions come from the local rule without waiting on a connect timeout
+        self.breaker = CircuitBreaker("opa")
+
+    def _http(self) -> "httpx.AsyncClient":
+        # One pooled client for all OPA calls; httpx is only imported when OPA is actually used
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(timeout=self.breaker.timeout)
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def allow_processing(
         self,
@@ -21,28 +41,28 @@ class PolicyEngine:
     ) -> bool:
         if self.use_opa:
             # Expect a policy package: data.nss.allow
-            async with httpx.AsyncClient(timeout=2.0) as client:
-                try:
-                    resp = await client.post(
-                        f"{self.opa_url}/v1/data/nss/allow",
-                        json={
-                            "input": {
-                                "data_principal_id": data_principal_id,
-                                "purpose": purpose,
-                                "has_consent": has_consent,
-                                "is_minor": is_minor,
-                                "guardian_token_present": guardian_token_present,
-                            }
-                        },
-                    )
-                    resp.raise_for_status()
-                    decision = resp.json().get("result", False)
-                    return bool(decision)
-                except Exception:  # noqa: BLE001
-                    # Fallback to local decision if OPA fails
-                    return self._local_rule(has_consent, is_minor, guardian_token_present)
+            try:
+                decision = await self.breaker.call(
+                    self._query,
+                    {
+                        "data_principal_id": data_principal_id,
+                        "purpose": purpose,
+                        "has_consent": has_consent,
+                        "is_minor": is_minor,
+                        "guardian_token_present": guardian_token_present,
+                    },
+                )
+                return bool(decision)
+            except Exception:  # noqa: BLE001
+                # Fallback to local decision if OPA fails
+                return self._local_rule(has_consent, is_minor, guardian_token_present)
         return self._local_rule(has_consent, is_minor, guardian_token_present)
 
+    async def _query(self, policy_input: dict) -> object:
+        resp = await self._http().post(f"{self.opa_url}/v1/data/nss/allow", json={"input": policy_input})
+        resp.raise_for_status()
+        return resp.json().get("result", False)
+
     @staticmethod
     def _local_rule(has_consent: bool, is_minor: bool, guardian_token_present: bool) -> bool:
         if not has_consent:
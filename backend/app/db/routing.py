@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import hashlib
+import itertools
+import os
+import time
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from .session import get_sessionmaker
+
+# The caller a request is served for (the token subject); its own writes are read back from the primary
+session_key: ContextVar[Optional[str]] = ContextVar("consent_session_key", default=None)
+
+
+def _split(value: str, sep: str) -> List[str]:
+    return [part.strip() for part in value.split(sep) if part.strip()]
+
+
+def shard_for(data_principal_id: str, shards: int) -> int:
+    """Stable shard of a principal; a process-independent hash, unlike ``hash()``."""
+    if shards == 1:
+        return 0
+    digest = hashlib.sha256(data_principal_id.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shards
+
+
+def to_global_id(local_id: int, shard: int, shards: int) -> int:
+    """Id exposed by the API: encodes the shard so lookups by id need no directory."""
+    return local_id * shards + shard
+
+
+def from_global_id(global_id: int, shards: int) -> Tuple[int, int]:
+    """``(shard, local_id)`` of an API id."""
+    return global_id % shards, global_id // shards
+
+
+class ShardRouter:
+    """Routes consent sessions to a shard's primary or one of its read replicas.
+
+    Writes always go to the primary. Reads go to a replica unless the principal, or the calling
+    session (``session_key``), wrote within ``pin_seconds``, which gives read-your-writes for
+    replicas lagging less than that. With a single shard and no URL, the shard is the main
+    database, so consent writes share a transaction with the audit log as before.
+    """
+
+    def __init__(
+        self,
+        shard_urls: Optional[Sequence[str]] = None,
+        replica_urls: Optional[Sequence[Sequence[str]]] = None,
+        pin_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        # Comma-separated database URLs, one per consent shard; empty keeps consents in the main database
+        urls = list(shard_urls) if shard_urls is not None else _split(os.getenv("CONSENT_SHARD_URLS", ""), ",")
+        if replica_urls is None:
+            # Shards separated by ",", a shard's replicas by "|"; may be shorter than the shard list
+            groups = os.getenv("CONSENT_REPLICA_URLS", "").split(",")
+            replica_urls = [_split(group, "|") for group in groups]
+        self.urls: List[Optional[str]] = list(urls) or [None]
+        self.replica_urls: List[List[str]] = [
+            list(replica_urls[i]) if i < len(replica_urls) else [] for i in range(len(self.urls))
+        ]
+        if pin_seconds is None:
+            # Reads after a write stay on the primary this long; set above the replicas' worst expected lag
+            pin_seconds = float(os.getenv("CONSENT_READ_YOUR_WRITES_SECONDS", "5"))
+        self.pin_seconds = pin_seconds
+        self._clock = clock
+        self._engines: Dict[str, AsyncEngine] = {}
+        self._makers: Dict[str, async_sessionmaker[AsyncSession]] = {}
+        self._replica_turns = [itertools.cycle(range(len(group))) for group in self.replica_urls]
+        self._pins: Dict[str, float] = {}
+        self._next_sweep = 0.0
+
+    @property
+    def shards(self) -> int:
+        return len(self.urls)
+
+    def shard_ids(self) -> range:
+        return range(self.shards)
+
+    def is_main(self, shard: int) -> bool:
+        """Whether the shard's primary is the main database (the one audit events go to)."""
+        return self.urls[shard] is None
+
+    def _maker(self, url: Optional[str]) -> async_sessionmaker[AsyncSession]:
+        if url is None:
+            return get_sessionmaker()
+        if url not in self._makers:
+            engine = self._engines[url] = create_async_engine(url, echo=False, future=True)
+            self._makers[url] = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        return self._makers[url]
+
+    def engines(self) -> List[Tuple[str, AsyncEngine]]:
+        """Engines of every shard primary and replica, created on first use; for schema setup and tests."""
+        for url in [*self.urls, *itertools.chain.from_iterable(self.replica_urls)]:
+            if url is not None:
+                self._maker(url)
+        return list(self._engines.items())
+
+    def note_write(self, *keys: Optional[str]) -> None:
+        now = self._clock()
+        until = now + self.pin_seconds
+        if now >= self._next_sweep:
+            # Expired pins are dropped once per pin window, keeping the map at about one window of writers
+            self._pins = {key: expiry for key, expiry in self._pins.items() if expiry > now}
+            self._next_sweep = until
+        for key in (*keys, session_key.get()):
+            if key is not None:
+                self._pins[key] = until
+
+    def pinned(self, keys: Iterable[Optional[str]]) -> bool:
+        now = self._clock()
+        return any(key is not None and self._pins.get(key, 0.0) > now for key in (*keys, session_key.get()))
+
+    @asynccontextmanager
+    async def _session(self, url: Optional[str]) -> AsyncIterator[AsyncSession]:
+        async with self._maker(url)() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:  # noqa: BLE001
+                await session.rollback()
+                raise
+
+    def write(self, shard: int) -> AbstractAsyncContextManager[AsyncSession]:
+        """Session on the shard's primary, committed on exit like ``get_session``."""
+        return self._session(self.urls[shard])
+
+    def read(self, shard: int, *keys: Optional[str]) -> AbstractAsyncContextManager[AsyncSession]:
+        """Session on a replica of the shard, or on its primary if it has none or ``keys`` wrote recently."""
+        replicas = self.replica_urls[shard]
+        if not replicas or self.pinned(keys):
+            return self._session(self.urls[shard])
+        return self._session(replicas[next(self._replica_turns[shard])])
+
+    async def dispose(self) -> None:
+        for engine in self._engines.values():
+            await engine.dispose()
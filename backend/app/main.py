@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import logging
 import os
 from contextlib import asynccontextmanager
 from typing import AsyncIterator
@@ -8,17 +9,19 @@ from typing import AsyncIterator
 from dotenv import load_dotenv
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from prometheus_client import Counter, Histogram, generate_latest
+from prometheus_client import Counter, Gauge, Histogram, generate_latest
 from starlette.requests import Request
 from starlette.responses import PlainTextResponse
 
-from .api import consent, ingest, audit, health
+from .api import consent, ingest, audit, health, rights
 from .auth.security import RateLimiterMiddleware, auth_dependency
-from .core.logging_setup import configure_logging
-
-load_dotenv()
-
-configure_logging()
+from .core.admission import AdmissionController
+from .core.consent_feed import follow_changes
+from .core.container import Services
+from .core.executor import monitor_event_loop_lag
+from .core.logging_setup import configure_logging, shutdown_logging
+from .core.merkle_audit import publish_tree_heads
+from .db.session import dispose_engine
 
 REQUEST_COUNT = Counter(
     "http_requests_total", "Total HTTP requests", ["method", "endpoint", "status"]
@@ -26,55 +29,109 @@ REQUEST_COUNT = Counter(
 REQUEST_LATENCY = Histogram(
     "http_request_latency_seconds", "Request latency", ["endpoint"]
 )
+CACHE_WARMUP_SECONDS = Gauge("consent_cache_warmup_seconds", "Duration of the startup consent cache warm-up")
+CACHE_WARMUP_ENTRIES = Gauge("consent_cache_warmup_entries", "Consent cache entries loaded at startup")
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
-async def lifespan(_: FastAPI) -> AsyncIterator[None]:
-    # Startup
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Startup: every long-lived resource, and the log writer thread, is created here, not at import
+    configure_logging()
+    services = app.state.services = Services.create()
+    if os.getenv("CONSENT_CACHE_WARMUP", "false").lower() == "true":
+        report = await services.consents.warm_cache()
+        CACHE_WARMUP_SECONDS.set(report["seconds"])
+        CACHE_WARMUP_ENTRIES.set(report["entries"])
+        logger.info("consent cache warm-up complete", extra=report)
+    dedup_report = await services.pipeline.idempotency.rebuild()
+    logger.info("ingest idempotency filter rebuilt", extra=dedup_report)
+    lag_interval = float(os.getenv("EVENT_LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag(lag_interval)) if lag_interval > 0 else None
+    wal = services.pipeline.wal
+    wal_drainer = None
+    if wal is not None:
+        await wal.open()
+        wal_drainer = asyncio.create_task(wal.drain_forever(services.pipeline.store_batch))
+    resumed = await services.erasure.resume()
+    if resumed:
+        logger.info("resumed erasure jobs", extra={"jobs": resumed})
+    head_interval = float(os.getenv("AUDIT_TREE_HEAD_INTERVAL_SECONDS", "300"))
+    head_publisher = (
+        asyncio.create_task(publish_tree_heads(services.audit, head_interval)) if head_interval > 0 else None
+    )
+    # Invalidates this process's cache entries on consent writes made elsewhere, instead of waiting for the TTL
+    cache_follower = (
+        asyncio.create_task(follow_changes(services.consents.changes, services.consents.invalidate_cached))
+        if os.getenv("CONSENT_CACHE_FOLLOW_CHANGES", "false").lower() == "true"
+        else None
+    )
     yield
     # Shutdown
-    await asyncio.sleep(0)
-
-
-app = FastAPI(
-    title=os.getenv("APP_NAME", "NSS Secure Data Platform"),
-    version="0.1.0",
-    docs_url="/docs",
-    redoc_url=None,
-    lifespan=lifespan,
-)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.add_middleware(RateLimiterMiddleware)
-
-
-@app.middleware("http")
-async def metrics_middleware(request: Request, call_next):
-    endpoint = request.url.path
-    with REQUEST_LATENCY.labels(endpoint=endpoint).time():
-        response = await call_next(request)
-    REQUEST_COUNT.labels(
-        method=request.method, endpoint=endpoint, status=str(response.status_code)
-    ).inc()
-    return response
-
-
-@app.get("/metrics")
-async def metrics() -> PlainTextResponse:
-    return PlainTextResponse(generate_latest().decode("utf-8"))
-
-
-# Routers
-app.include_router(health.router, prefix="/api")
-app.include_router(consent.router, prefix="/api", dependencies=[Depends(auth_dependency)])
-app.include_router(ingest.router, prefix="/api", dependencies=[Depends(auth_dependency)])
-app.include_router(audit.router, prefix="/api", dependencies=[Depends(auth_dependency)])
-
-
+    tasks = [task for task in (lag_monitor, head_publisher, wal_drainer, cache_follower) if task is not None]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if wal is not None:
+        # Undrained entries stay in the log and are replayed on the next start
+        await wal.close()
+    if head_publisher is not None:
+        # Sign a head over events appended since the last tick, so none are left uncovered by this process
+        try:
+            await services.audit.publish_tree_head()
+        except Exception:  # noqa: BLE001
+            logger.exception("failed to publish audit tree head at shutdown")
+    await services.aclose()
+    app.state.services = None
+    await dispose_engine()
+    shutdown_logging()
+
+
+def create_app() -> FastAPI:
+    """Build the application; no database, Redis, HTTP client or thread is started until the lifespan runs."""
+    load_dotenv()
+    app = FastAPI(
+        title=os.getenv("APP_NAME", "NSS Secure Data Platform"),
+        version="0.1.0",
+        docs_url="/docs",
+        redoc_url=None,
+        lifespan=lifespan,
+    )
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    app.add_middleware(RateLimiterMiddleware)
+    # Outside the rate limiter so overload is shed before any other work is done
+    app.add_middleware(AdmissionController)
+
+    @app.middleware("http")
+    async def metrics_middleware(request: Request, call_next):
+        endpoint = request.url.path
+        with REQUEST_LATENCY.labels(endpoint=endpoint).time():
+            response = await call_next(request)
+        REQUEST_COUNT.labels(
+            method=request.method, endpoint=endpoint, status=str(response.status_code)
+        ).inc()
+        return response
+
+    @app.get("/metrics")
+    async def metrics() -> PlainTextResponse:
+        return PlainTextResponse(generate_latest().decode("utf-8"))
+
+    # Routers
+    app.include_router(health.router, prefix="/api")
+    app.include_router(consent.router, prefix="/api", dependencies=[Depends(auth_dependency)])
+    app.include_router(ingest.router, prefix="/api", dependencies=[Depends(auth_dependency)])
+    app.include_router(audit.router, prefix="/api", dependencies=[Depends(auth_dependency)])
+    app.include_router(rights.router, prefix="/api", dependencies=[Depends(auth_dependency)])
+    return app
+
+
+app = create_app()
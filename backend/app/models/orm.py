@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import List
 
-from sqlalchemy import Boolean, DateTime, Integer, String, Text
+from sqlalchemy import JSON, BigInteger, Boolean, DateTime, Index, Integer, LargeBinary, String, Text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
 from ..db.base import Base
@@ -10,28 +12,107 @@ from ..db.base import Base
 
 class Consent(Base):
     __tablename__ = "consents"
+    # jsonb_path_ops only serves @> but is smaller and faster than the default GIN opclass
+    __table_args__ = (
+        Index(
+            "ix_consents_scope_gin",
+            "scope",
+            postgresql_using="gin",
+            postgresql_ops={"scope": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     data_principal_id: Mapped[str] = mapped_column(String(255), index=True, nullable=False)
     purpose: Mapped[str] = mapped_column(String(100), index=True, nullable=False)
-    scope: Mapped[str] = mapped_column(Text, nullable=False)
+    scope: Mapped[List[str]] = mapped_column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
     expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 
+class _ConsentChangeColumns:
+    # Local consent id on the shard; NULL for "erase", which covers all of a principal's consents
+    consent_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    data_principal_id: Mapped[str] = mapped_column(String(255), index=True, nullable=False)
+    # create | update | withdraw | erase
+    change: Mapped[str] = mapped_column(String(20), nullable=False)
+    purpose: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    # Set by an update that moved the consent to another purpose
+    previous_purpose: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    scope: Mapped[List[str] | None] = mapped_column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+    expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    active: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class ConsentChange(_ConsentChangeColumns, Base):
+    """One write to a consent, in commit order per database: ``id`` is the change version the feed serves.
+
+    Stored next to the consents (on their shard). Writes stage their changes in ``pending_consent_changes``
+    and ``ConsentChangeFeed.sequence`` moves them here once committed. Erasure replaces a principal's
+    changes with a single "erase" change that carries no consent details.
+    """
+
+    __tablename__ = "consent_changes"
+    # Versions must never be handed out twice, even after erasure deletes the newest ones; SQLite
+    # otherwise reuses the highest rowid once it is deleted
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+
+
+class PendingConsentChange(_ConsentChangeColumns, Base):
+    """A consent change written in the same transaction as the consent, not yet given a feed version."""
+
+    __tablename__ = "pending_consent_changes"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+
+
 class IngestRecord(Base):
     __tablename__ = "ingest_records"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     data_principal_id: Mapped[str] = mapped_column(String(255), index=True, nullable=False)
     purpose: Mapped[str] = mapped_column(String(100), index=True, nullable=False)
-    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    # Encoded by core.payload_codec (format byte, optionally compressed); legacy rows hold JSON text
+    payload: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    # SHA-256 hex from core.idempotency; NULL for requests without a key, which never collide
+    idempotency_key: Mapped[str | None] = mapped_column(String(64), unique=True, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class PayloadDictionary(Base):
+    """A zlib preset dictionary trained on one purpose's payloads; rows are never updated or deleted."""
+
+    __tablename__ = "payload_dictionaries"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    purpose: Mapped[str] = mapped_column(String(100), index=True, nullable=False)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 
+class IngestWalOffset(Base):
+    """Last ingest WAL sequence number persisted from a given WAL, written with the drained rows."""
+
+    __tablename__ = "ingest_wal_offsets"
+
+    wal_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    lsn: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
 class AuditEvent(Base):
     __tablename__ = "audit_events"
+    # Each filter column leads a (column, created_at, id) index so a filtered, time-ordered page is
+    # one index range scan; (created_at, id) doubles as the keyset for unfiltered listing
+    __table_args__ = (
+        Index("ix_audit_events_actor_created", "actor_id", "created_at", "id"),
+        Index("ix_audit_events_action_created", "action", "created_at", "id"),
+        Index("ix_audit_events_scope_created", "scope", "created_at", "id"),
+        Index("ix_audit_events_created", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     action: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -39,6 +120,70 @@ class AuditEvent(Base):
     scope: Mapped[str] = mapped_column(String(100), nullable=False)
     payload: Mapped[str] = mapped_column(Text, nullable=False)
     merkle_root: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    leaf_index: Mapped[int | None] = mapped_column(BigInteger, unique=True, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 
+class MerkleNode(Base):
+    """A complete subtree hash: level 0 are leaves, (level, idx) covers leaves [idx * 2**level, (idx + 1) * 2**level)."""
+
+    __tablename__ = "merkle_nodes"
+
+    level: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    idx: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    hash: Mapped[str] = mapped_column(String(64), nullable=False)
+
+
+class AuditPendingLeaf(Base):
+    """Leaf hash of an audit event written in the same transaction, waiting to be given a leaf index."""
+
+    __tablename__ = "audit_pending_leaves"
+
+    event_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    leaf_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    # Store the tree root on the event once sequenced: single events and the last event of a batch
+    with_root: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+
+class TreeHead(Base):
+    __tablename__ = "merkle_tree_heads"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    tree_size: Mapped[int] = mapped_column(BigInteger, unique=True, nullable=False)
+    root_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    signature: Mapped[str] = mapped_column(Text, nullable=False)
+
+
+class AuditSegment(Base):
+    """A sealed subtree of the audit log moved out of the database into a segment file."""
+
+    __tablename__ = "audit_segments"
+
+    first_leaf: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    level: Mapped[int] = mapped_column(Integer, nullable=False)
+    path: Mapped[str] = mapped_column(String(255), nullable=False)
+    root_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class ErasureJob(Base):
+    """A right-to-erasure request for one data principal and how far its deletion has got."""
+
+    __tablename__ = "erasure_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    data_principal_id: Mapped[str] = mapped_column(String(255), index=True, nullable=False)
+    requested_by: Mapped[str] = mapped_column(String(255), nullable=False)
+    # pending -> running -> completed | failed
+    status: Mapped[str] = mapped_column(String(20), index=True, nullable=False, default="pending")
+    # Rows found when the job started, per table; deleted counts are updated after every chunk
+    ingest_records_total: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    ingest_records_deleted: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    consents_total: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    consents_deleted: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    cache_keys_deleted: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
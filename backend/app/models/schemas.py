@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class ConsentCreate(BaseModel):
@@ -18,9 +18,28 @@ class ConsentRead(ConsentCreate):
     active: bool
 
 
-class IngestRequest(BaseModel):
+class ConsentChangeRead(BaseModel):
+    version: int
+    change: str
+    consent_id: Optional[int] = None
     data_principal_id: str
-    purpose: str
+    purpose: Optional[str] = None
+    previous_purpose: Optional[str] = None
+    scope: Optional[List[str]] = None
+    expires_at: Optional[datetime] = None
+    active: bool
+    changed_at: datetime
+
+
+class ConsentChangeBatch(BaseModel):
+    changes: List[ConsentChangeRead]
+    # Pass back as ``since`` to get the changes after this batch
+    cursor: str
+
+
+class IngestRequest(BaseModel):
+    data_principal_id: str = Field(max_length=255)
+    purpose: str = Field(max_length=100)
     date_of_birth: str
     guardian_consent_token: Optional[str] = None
     payload: dict
@@ -38,3 +57,46 @@ class ConsentUpdate(BaseModel):
     active: Optional[bool] = None
 
 
+class BatchProofRequest(BaseModel):
+    event_ids: Optional[List[int]] = Field(default=None, min_length=1)
+    start_id: Optional[int] = None
+    end_id: Optional[int] = None
+    tree_size: Optional[int] = Field(default=None, ge=1)
+
+    @model_validator(mode="after")
+    def _ids_or_range(self) -> "BatchProofRequest":
+        if (self.event_ids is None) == (self.start_id is None and self.end_id is None):
+            raise ValueError("give either event_ids or start_id/end_id")
+        return self
+
+
+class AuditEventRead(BaseModel):
+    id: int
+    action: str
+    actor_id: str
+    scope: str
+    payload: dict
+    merkle_root: Optional[str] = None
+    leaf_index: Optional[int] = None
+    created_at: datetime
+
+
+class ErasureRequest(BaseModel):
+    data_principal_id: str = Field(min_length=1)
+
+
+class ErasureJobRead(BaseModel):
+    id: int
+    data_principal_id: str
+    requested_by: str
+    status: str
+    ingest_records_total: int
+    ingest_records_deleted: int
+    consents_total: int
+    consents_deleted: int
+    cache_keys_deleted: int
+    progress: float
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from backend.app.core.admission import AdaptiveLimit, AdmissionController, route_class
+
+
+def test_aimd_limit_backs_off_on_slow_requests_and_grows_when_saturated():
+    now = [0.0]
+    limit = AdaptiveLimit("t", target_latency=0.1, initial=10, min_limit=2, clock=lambda: now[0])
+    limit.inflight = 10
+    limit.release(0.5)
+    assert limit.limit == pytest.approx(9.0)
+    # A burst of slow completions within one target window backs off only once
+    limit.inflight = 9
+    limit.release(0.5)
+    assert limit.limit == pytest.approx(9.0)
+    now[0] = 1.0
+    limit.inflight = 9
+    limit.release(0.01)
+    assert limit.limit == pytest.approx(9.0 + 1 / 9.0)
+    assert limit.inflight == 8
+
+
+@pytest.mark.asyncio
+async def test_priority_requests_pass_while_limited_classes_are_saturated():
+    release = asyncio.Event()
+
+    async def backend(scope, receive, send):
+        if scope["method"] != "DELETE" and not scope["path"].endswith("bulk-withdraw"):
+            await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    assert set(AdmissionController(backend).limits) == {"ingest", "consent_read", "bulk_import", "export"}
+    limits = {
+        name: AdaptiveLimit(name, target_latency=1.0, initial=1, max_queue=1, queue_timeout=0.05)
+        for name in ("ingest", "consent_read")
+    }
+    controller = AdmissionController(backend, limits=limits)
+    controller.enabled = True
+    async with AsyncClient(app=controller, base_url="http://test") as ac:
+        held = [asyncio.create_task(ac.post("/api/ingest")), asyncio.create_task(ac.get("/api/consents/1"))]
+        await asyncio.sleep(0.01)
+        assert limits["ingest"].inflight == limits["consent_read"].inflight == 1
+        shed = await ac.post("/api/ingest")
+        assert shed.status_code == 503 and shed.headers["Retry-After"]
+        assert (await ac.get("/api/consents/2")).status_code == 503
+        # Withdrawal is never queued behind, or shed with, the saturated classes
+        assert (await ac.delete("/api/consents/1")).status_code == 200
+        assert (await ac.post("/api/consents/bulk-withdraw")).status_code == 200
+        release.set()
+        assert [(await task).status_code for task in held] == [200, 200]
+    assert limits["ingest"].inflight == limits["consent_read"].inflight == 0
+    assert route_class("GET", "/api/health/ready") == "priority"
+    assert route_class("POST", "/api/ingest/") == "ingest"
+    assert route_class("GET", "/api/consents/42") == "consent_read"
+    assert route_class("POST", "/api/consents/bulk") == "bulk_import"
+    assert route_class("GET", "/api/rights/export") == "export"
+    assert route_class("GET", "/api/consents/changes") is None
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import logging
+import subprocess
+import sys
+import threading
+
+import pytest
+from httpx import AsyncClient
+
+from backend.app.auth.security import issue_dev_token
+from backend.app.db.base import Base
+from backend.app.db.session import engine
+from backend.app.main import create_app
+
+
+def test_importing_the_app_creates_no_resources():
+    check = (
+        "import sys, threading, backend.app.main, backend.app.db.session as s; "
+        "assert s._engine is None, 'engine created at import'; "
+        "threads = [t.name for t in threading.enumerate() if t is not threading.main_thread()]; "
+        "assert not threads, threads; "
+        "loaded = [m for m in ('httpx', 'aiosqlite', 'asyncpg') if m in sys.modules]; "
+        "assert not loaded, loaded"
+    )
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+@pytest.mark.asyncio
+async def test_lifespan_creates_shared_services_and_closes_them(monkeypatch):
+    monkeypatch.setenv("AUDIT_TREE_HEAD_INTERVAL_SECONDS", "0")
+    # Settings are read when the app starts, so values set after import still apply
+    monkeypatch.setenv("CONSENT_BULK_BATCH_SIZE", "7")
+    root = logging.getLogger()
+    handlers, level = root.handlers, root.level
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    app = create_app()
+    headers = {"Authorization": f"Bearer {issue_dev_token('system', 'test')}"}
+    try:
+        async with app.router.lifespan_context(app):
+            services = app.state.services
+            assert services.consents.bulk_batch_size == 7
+            assert services.pipeline.codec is services.exporter.codec is services.codec
+            assert services.audit.executor is services.pipeline.deid.executor is services.executor
+            assert "log-writer" in {thread.name for thread in threading.enumerate()}
+            assert services.pipeline.consent is services.consents
+            assert services.erasure.cache is services.consents.cache is services.exporter.consents.cache
+            async with AsyncClient(app=app, base_url="http://test") as ac:
+                resp = await ac.post(
+                    "/api/consents",
+                    headers=headers,
+                    json={"data_principal_id": "l1", "purpose": "research", "scope": ["email"]},
+                )
+                assert resp.status_code == 200
+                assert app.state.services is services
+        assert app.state.services is None
+        assert services.cache.redis is None
+        assert "log-writer" not in {thread.name for thread in threading.enumerate()}
+    finally:
+        root.handlers, root.level = handlers, level
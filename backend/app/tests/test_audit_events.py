@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from backend.app.auth.security import issue_dev_token
+from backend.app.core.merkle_audit import AuditLog
+from backend.app.db.base import Base
+from backend.app.db.session import engine
+from backend.app.main import app
+
+
+@pytest.mark.asyncio
+async def test_audit_event_search_pages_filters_and_export():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    log = AuditLog()
+    await log.append_events(
+        [{"action": "read" if i % 2 else "write", "actor_id": f"u{i % 3}", "scope": "s", "payload": {"i": i}} for i in range(12)]
+    )
+    headers = {"Authorization": f"Bearer {issue_dev_token('system', 'test')}"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        seen: list[int] = []
+        params: dict[str, str | int] = {"actor_id": "u1", "limit": 2}
+        while True:
+            resp = await ac.get("/api/audit/events", headers=headers, params=params)
+            assert resp.status_code == 200
+            seen.extend(e["id"] for e in resp.json())
+            if "X-Next-Cursor" not in resp.headers:
+                break
+            params["cursor"] = resp.headers["X-Next-Cursor"]
+        assert seen == sorted(seen, reverse=True) and len(seen) == 4
+
+        resp = await ac.get("/api/audit/events", headers=headers, params={"action": "read", "actor_id": "u1"})
+        assert [e["payload"]["i"] for e in resp.json()] == [7, 1]
+
+        until = (datetime.utcnow() - timedelta(days=1)).isoformat()
+        resp = await ac.get("/api/audit/events", headers=headers, params={"until": until})
+        assert resp.json() == []
+
+        resp = await ac.get("/api/audit/events", headers=headers, params={"cursor": "not-a-cursor"})
+        assert resp.status_code == 400
+
+        resp = await ac.get("/api/audit/events/export", headers=headers, params={"scope": "s"})
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        assert len([json.loads(line) for line in resp.text.splitlines()]) == 12
+
+    async with engine.connect() as conn:
+        plan = await conn.execute(
+            text("EXPLAIN QUERY PLAN SELECT id FROM audit_events WHERE actor_id = 'u1' ORDER BY created_at DESC, id DESC")
+        )
+        assert "ix_audit_events_actor_created" in " ".join(str(row) for row in plan)
@@ -1,7 +1,32 @@
 from __future__ import annotations
 
+import argparse
+import asyncio
+import hashlib
+import json
 
-from backend.app.core.merkle_audit import MerkleTree
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from backend.app.auth.security import issue_dev_token, verify_signed_payload
+from backend.app.core.audit_archive import AuditArchive, Segment, write_segment
+from backend.app.core.merkle_audit import (
+    AuditLog,
+    MerkleTree,
+    leaf_hash,
+    multiproof_ranges,
+    range_hash,
+    subtree_levels,
+    verify_consistency,
+    verify_inclusion,
+    verify_multiproof,
+)
+from backend.app.db.base import Base
+from backend.app.db.session import engine, get_session
+from backend.app.main import app
+from backend.scripts.verify_audit_chain import verify as verify_chain
+from backend.scripts.verify_audit_segments import verify as verify_segments
 
 
 def test_merkle_root_changes_with_append():
@@ -15,3 +40,231 @@ def test_merkle_root_changes_with_append():
     assert r2 is not None and r2 != r1
 
 
+def _mth(leaves):
+    # RFC 6962 reference definition
+    if len(leaves) == 1:
+        return hashlib.sha256(b"\x00" + json.dumps(leaves[0], sort_keys=True).encode()).hexdigest()
+    k = 1 << ((len(leaves) - 1).bit_length() - 1)
+    left, right = _mth(leaves[:k]), _mth(leaves[k:])
+    return hashlib.sha256(b"\x01" + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def test_incremental_root_matches_rfc6962_definition():
+    tree = MerkleTree()
+    leaves = []
+    for i in range(70):
+        leaves.append({"i": i})
+        tree.append(leaves[-1])
+        assert tree.root() == _mth(leaves)
+
+
+def test_inclusion_and_consistency_proofs_verify():
+    tree = MerkleTree()
+    roots = {}
+    for i in range(33):
+        tree.append({"i": i})
+        roots[tree.size] = tree.root()
+    for size in range(1, 34):
+        for index in range(size):
+            leaf = tree.nodes[(0, index)]
+            assert verify_inclusion(index, size, leaf, tree.proof(index, size), roots[size])
+        for old in range(1, size + 1):
+            proof = tree.consistency_proof(old, size)
+            assert verify_consistency(old, size, roots[old], roots[size], proof)
+    assert not verify_consistency(5, 9, roots[6], roots[9], tree.consistency_proof(5, 9))
+    assert not verify_inclusion(3, 9, tree.nodes[(0, 4)], tree.proof(3, 9), roots[9])
+
+
+@pytest.mark.asyncio
+async def test_signed_tree_heads_and_consistency_from_stored_nodes():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    log = AuditLog()
+    for i in range(5):
+        await log.append_event(action="a", actor_id="u", scope="s", payload={"i": i})
+    first = await log.publish_tree_head()
+    await log.append_events([{"action": "b", "actor_id": "u", "scope": "s", "payload": {"i": i}} for i in range(8)])
+    second = await log.publish_tree_head()
+    assert first is not None and second is not None
+    assert (first["tree_size"], second["tree_size"]) == (5, 13)
+    assert verify_signed_payload(second["signature"])["root_hash"] == second["root_hash"]
+    assert await log.get_tree_head(5) == first
+
+    consistency = await log.get_consistency_proof(5, 13)
+    assert verify_consistency(5, 13, first["root_hash"], second["root_hash"], consistency["proof"])
+
+    inclusion = await log.get_inclusion_proof(5, tree_size=5)
+    assert inclusion is not None and inclusion["root_hash"] == first["root_hash"] == inclusion["merkle_root"]
+    assert verify_inclusion(4, 5, inclusion["leaf_hash"], inclusion["proof"], first["root_hash"])
+
+
+def test_multiproof_shares_nodes_and_verifies():
+    tree = MerkleTree()
+    for i in range(100):
+        tree.append({"i": i})
+    root = tree.root()
+    assert root is not None
+    indices = [3, 4, 5, 40, 41, 97]
+    ranges = multiproof_ranges(indices, 100)
+    nodes = {(lo, hi): range_hash(lo, hi, tree.nodes) for lo, hi in ranges}
+    leaves = {i: tree.nodes[(0, i)] for i in indices}
+    assert verify_multiproof(100, leaves, nodes, root)
+    assert len(ranges) < sum(len(tree.proof(i)) for i in indices)
+    assert not verify_multiproof(100, {**leaves, 4: tree.nodes[(0, 6)]}, nodes, root)
+    assert not verify_multiproof(100, leaves, dict(list(nodes.items())[1:]), root)
+
+
+@pytest.mark.asyncio
+async def test_batch_and_streamed_multiproofs_over_api():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    log = AuditLog()
+    await log.append_events([{"action": "a", "actor_id": "u", "scope": "s", "payload": {"i": i}} for i in range(57)])
+    headers = {"Authorization": f"Bearer {issue_dev_token('system', 'test')}"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        resp = await ac.post("/api/audit/proofs", headers=headers, json={"event_ids": [2, 3, 30, 999]})
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["missing"] == [999]
+        leaves = {index: leaf for _, index, leaf in body["leaves"]}
+        nodes = {(lo, hi): node for lo, hi, node in body["nodes"]}
+        assert verify_multiproof(body["tree_size"], leaves, nodes, body["root_hash"])
+
+        resp = await ac.post("/api/audit/proofs", headers=headers, json={"start_id": 5, "end_id": 40, "tree_size": 50})
+        one_shot = resp.json()
+        assert len(one_shot["leaves"]) == 36
+
+        resp = await ac.get(
+            "/api/audit/proofs/stream",
+            headers=headers,
+            params={"start_id": 5, "end_id": 40, "tree_size": 50, "chunk_size": 7},
+        )
+        head, *parts = [json.loads(line) for line in resp.text.splitlines()]
+        assert head["root_hash"] == one_shot["root_hash"]
+        streamed_nodes = [node for part in parts for node in part["nodes"]]
+        assert sorted(streamed_nodes) == sorted(one_shot["nodes"])
+        assert [leaf for part in parts for leaf in part["leaves"]] == one_shot["leaves"]
+
+        resp = await ac.post("/api/audit/proofs", headers=headers, json={"event_ids": [1], "start_id": 1})
+        assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_archived_segments_serve_proofs_and_events(tmp_path, capsys):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    log = AuditLog(AuditArchive(str(tmp_path)))
+    await log.append_events([{"action": "a", "actor_id": "u", "scope": "s", "payload": {"i": i}} for i in range(21)])
+    head = await log.publish_tree_head()
+    before = await log.get_inclusion_proof(6)
+
+    assert await log.archive_sealed_segment(level=3, keep_leaves=5) is not None
+    assert await log.archive_sealed_segment(level=3, keep_leaves=5) is not None
+    assert await log.archive_sealed_segment(level=3, keep_leaves=5) is None
+    async with engine.connect() as conn:
+        assert (await conn.execute(text("SELECT count(*) FROM audit_events"))).scalar() == 5
+
+    assert await log.get_inclusion_proof(6) == before
+    event = await log.get_event(6)
+    assert event is not None and event.payload == {"i": 5} and event.leaf_index == 5
+    batch = await log.get_batch_proof(start_id=4, end_id=19)
+    assert [leaf[1] for leaf in batch["leaves"]] == list(range(3, 19))
+    leaves = {index: leaf for _, index, leaf in batch["leaves"]}
+    nodes = {(lo, hi): node for lo, hi, node in batch["nodes"]}
+    assert head is not None and verify_multiproof(21, leaves, nodes, head["root_hash"])
+
+    await log.append_event(action="a", actor_id="u", scope="s", payload={"i": 21})
+    assert (await log.get_tree_head()) == head
+
+    args = argparse.Namespace(directory=str(tmp_path), workers=1)
+    assert await verify_segments(args) == 0
+    assert "2/2 segments ok, 16 events" in capsys.readouterr().out
+
+    # Rewrite a segment with an altered event and every hash above it, header included
+    path = sorted(tmp_path.glob("*.seg"))[1]
+    segment = Segment(path)
+    records = list(segment.records())
+    segment.close()
+    records[2]["payload"] = {"i": 999}
+    digests = [leaf_hash({key: r[key] for key in ("action", "actor_id", "scope", "payload")}) for r in records]
+    levels = subtree_levels(digests)
+    write_segment(tmp_path, 8, levels, records)
+    assert await verify_segments(args) == 1
+    assert f"FAIL {path}: root differs from audit_segments.root_hash" in capsys.readouterr().out
+    async with engine.begin() as conn:
+        await conn.execute(text("UPDATE audit_segments SET root_hash = :root WHERE first_leaf = 8"), {"root": levels[-1][0]})
+    assert await verify_segments(args) == 1
+    assert "root differs from merkle_nodes (3, 1)" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_chain_verifier_resumes_and_reports_first_divergence(tmp_path, capsys):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    log = AuditLog()
+    await log.append_events([{"action": "a", "actor_id": "u", "scope": "s", "payload": {"i": i}} for i in range(30)])
+    for i in range(5):
+        await log.append_event(action="b", actor_id="u", scope="s", payload={"i": i})
+    args = argparse.Namespace(workers=1, chunk=8, checkpoint=str(tmp_path / "ck.json"), restart=False)
+    assert await verify_chain(args) == 0
+    assert json.loads((tmp_path / "ck.json").read_text())["size"] == 35
+
+    await log.append_event(action="c", actor_id="u", scope="s", payload={})
+    assert await verify_chain(args) == 0
+    assert "resuming at leaf 35" in capsys.readouterr().err
+
+    async with engine.begin() as conn:
+        await conn.execute(text("UPDATE audit_events SET merkle_root = 'bad' WHERE leaf_index = 32"))
+        await conn.execute(text("UPDATE audit_events SET payload = '{\"i\": 99}' WHERE leaf_index = 33"))
+    args.restart = True
+    assert await verify_chain(args) == 1
+    assert "DIVERGENCE at leaf 32" in capsys.readouterr().out
+    assert json.loads((tmp_path / "ck.json").read_text())["size"] == 32
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_append_leaves_no_leaf_behind(tmp_path):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    log = AuditLog()
+    await log.append_events([{"action": "a", "actor_id": "u", "scope": "s", "payload": {"i": i}} for i in range(3)])
+    written = asyncio.Event()
+
+    async def doomed() -> None:
+        async with get_session() as session:
+            await log.append_events(
+                [{"action": "doomed", "actor_id": "u", "scope": "s", "payload": {"i": i}} for i in range(4)],
+                session=session,
+            )
+            written.set()
+            await asyncio.sleep(0.2)
+            raise RuntimeError("caller failed after appending")
+
+    async def appending() -> int:
+        await written.wait()
+        return await log.append_event(action="b", actor_id="u", scope="s", payload={})
+
+    failed, event_id = await asyncio.gather(doomed(), appending(), return_exceptions=True)
+    assert isinstance(failed, RuntimeError)
+    last = await log.append_event(action="c", actor_id="u", scope="s", payload={})
+
+    async with engine.connect() as conn:
+        rows = (await conn.execute(text("SELECT action, leaf_index FROM audit_events ORDER BY leaf_index"))).all()
+        assert (await conn.execute(text("SELECT count(*) FROM audit_pending_leaves"))).scalar() == 0
+    assert rows == [("a", 0), ("a", 1), ("a", 2), ("b", 3), ("c", 4)]
+    args = argparse.Namespace(workers=1, chunk=8, checkpoint=str(tmp_path / "ck.json"), restart=False)
+    assert await verify_chain(args) == 0
+    for event in (event_id, last):
+        proof = await log.get_inclusion_proof(event)
+        assert proof is not None
+        assert verify_inclusion(proof["leaf_index"], 5, proof["leaf_hash"], proof["proof"], proof["root_hash"])
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+import redis.asyncio as aioredis
+from httpx import AsyncClient
+
+from backend.app.api.deps import app_services
+from backend.app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from backend.app.core.consent_service import ConsentCache, principal_index_key
+from backend.app.main import app
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_rejects_and_recovers_through_half_open():
+    clock = _Clock()
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=5, timeout=0.05, clock=clock)
+    calls = 0
+
+    async def failing() -> None:
+        nonlocal calls
+        calls += 1
+        raise ConnectionError("down")
+
+    async def slow() -> None:
+        await asyncio.sleep(1)
+
+    async def ok() -> str:
+        return "ok"
+
+    with pytest.raises(ConnectionError):
+        await breaker.call(failing)
+    with pytest.raises(asyncio.TimeoutError):
+        await breaker.call(slow)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(failing)
+    assert calls == 1
+
+    clock.now = 5
+    assert breaker.state == "half_open"
+    with pytest.raises(ConnectionError):
+        await breaker.call(failing)
+    assert breaker.state == "open"
+
+    clock.now = 10
+    assert await breaker.call(ok) == "ok"
+    assert breaker.snapshot() == {"state": "closed", "consecutive_failures": 0}
+
+
+def test_explicit_zero_settings_override_the_environment(monkeypatch):
+    monkeypatch.setenv("TEST_BREAKER_RESET_SECONDS", "30")
+    monkeypatch.setenv("TEST_CALL_TIMEOUT_SECONDS", "1")
+    assert CircuitBreaker("test").reset_seconds == 30
+    breaker = CircuitBreaker("test", reset_seconds=0, timeout=0)
+    assert (breaker.reset_seconds, breaker.timeout) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_bulk_cache_calls_have_their_own_breaker():
+    cache = ConsentCache()
+    cache.allow_fallback = True
+    cache.breaker = CircuitBreaker("redis", failure_threshold=1, reset_seconds=60)
+    cache.bulk_breaker = CircuitBreaker("redis_bulk", failure_threshold=1, reset_seconds=60)
+    cache.redis = aioredis.Redis(host="127.0.0.1", port=1)
+    # A failing warm-up pipeline opens only the bulk circuit; per-request calls still try Redis
+    await cache.set_many({f"k{i}": b"v" for i in range(3)}, principals={"k0": "p"})
+    assert (cache.bulk_breaker.state, cache.breaker.state) == ("open", "closed")
+    assert cache.memory_cache == {"k0": b"v", "k1": b"v", "k2": b"v"}
+    assert cache.memory_index == {principal_index_key("p"): {"k0"}}
+    assert await cache.purge_principal("p") == 1
+    assert cache.breaker.state == "closed"
+    await cache.redis.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cache_bypasses_unreachable_redis_and_readiness_reports_it(monkeypatch):
+    cache = ConsentCache()
+    cache.allow_fallback = True
+    cache.breaker = CircuitBreaker("redis", failure_threshold=2, reset_seconds=60)
+    # Nothing listens on port 1, so every command fails with a connection error
+    cache.redis = aioredis.Redis(host="127.0.0.1", port=1)
+    await cache.set("k", b"v")
+    await cache.set("k", b"v")
+    assert cache.breaker.state == "open"
+    assert await cache.get("k") == b"v"
+
+    services = app_services(app)
+    monkeypatch.setattr(services.cache, "redis", cache.redis)
+    monkeypatch.setattr(services.cache, "breaker", cache.breaker)
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        body = (await ac.get("/api/health/ready")).json()
+    assert body["status"] == "degraded"
+    assert body["dependencies"]["redis"]["state"] == "open"
+    await cache.redis.aclose()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from backend.app.api.deps import app_services
+from backend.app.main import app
+from backend.app.auth.security import issue_dev_token
+from backend.app.db.base import Base
+from backend.app.db.session import engine, get_session
+from backend.app.models.orm import AuditEvent
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_and_withdraw():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    headers = {"Authorization": f"Bearer {issue_dev_token('system', 'test')}"}
+    ndjson = "\n".join(
+        json.dumps({"data_principal_id": f"n{i}", "purpose": "research", "scope": ["email"]}) for i in range(3)
+    )
+    csv_body = "data_principal_id,purpose,scope,expires_at\nc0,marketing,email;age,\nc1,marketing,email,\n"
+    service = app_services(app).consents
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        resp = await ac.post(
+            "/api/consents/bulk", headers={**headers, "Content-Type": "application/x-ndjson"}, content=ndjson
+        )
+        assert resp.json() == {"created": 3}
+        resp = await ac.post("/api/consents/bulk", headers={**headers, "Content-Type": "text/csv"}, content=csv_body)
+        assert resp.json() == {"created": 2}
+
+        listed = (await ac.get("/api/consents", headers=headers, params={"dpid": "c0"})).json()
+        assert listed[0]["scope"] == ["email", "age"]
+        assert await service.has_valid_consent("n1", "research") is True
+
+        resp = await ac.post(
+            "/api/consents/bulk-withdraw",
+            headers={**headers, "Content-Type": "text/csv"},
+            content="consent_id\n1\n2\n2\n",
+        )
+        assert resp.json() == {"withdrawn": 2}
+        assert await service.has_valid_consent("n1", "research") is False
+
+        resp = await ac.post(
+            "/api/consents/bulk", headers={**headers, "Content-Type": "application/x-ndjson"}, content="{bad"
+        )
+        assert resp.status_code == 422
+
+    async with get_session() as session:
+        events = await session.scalar(select(func.count()).select_from(AuditEvent))
+    assert events == 7
@@ -1,12 +1,22 @@
 from __future__ import annotations
 
+import json
 
 import pytest
+from sqlalchemy import select
 
-from backend.app.core.consent_service import ConsentService
-from backend.app.models.schemas import ConsentCreate
+from backend.app.core.consent_service import (
+    CachedConsent,
+    ConsentCache,
+    ConsentService,
+    cached_consent_active,
+    decode_cached_consent,
+    encode_cached_consent,
+)
+from backend.app.models.schemas import ConsentCreate, ConsentUpdate
 from backend.app.db.base import Base
-from backend.app.db.session import engine
+from backend.app.db.session import engine, get_session
+from backend.app.models.orm import Consent
 
 
 @pytest.mark.asyncio
@@ -25,3 +35,82 @@ async def test_consent_cache_flow(monkeypatch):
     assert await svc.has_valid_consent("c1", "research") is False
 
 
+class _CommitCheckingCache(ConsentCache):
+    """Records, at each cache write, whether the consent is already committed as seen from another session."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.seen: list[tuple[str, object]] = []
+
+    async def _committed_active(self) -> object:
+        async with get_session() as session:
+            return await session.scalar(select(Consent.active).where(Consent.data_principal_id == "c2"))
+
+    async def set(self, key, value, ttl_seconds=300, *, principal=None):
+        self.seen.append(("set", await self._committed_active()))
+        await super().set(key, value, ttl_seconds, principal=principal)
+
+    async def delete(self, key):
+        self.seen.append(("delete", await self._committed_active()))
+        await super().delete(key)
+
+
+@pytest.mark.asyncio
+async def test_cache_is_written_after_the_consent_commits():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    cache = _CommitCheckingCache()
+    svc = ConsentService(cache=cache)
+    created = await svc.create_consent(ConsentCreate(data_principal_id="c2", purpose="research", scope=["email"]))
+    assert await svc.withdraw_consent(created.id) is True
+    assert cache.seen == [("set", True), ("delete", False)]
+
+
+def test_cached_consent_encoding_roundtrip_and_legacy_json():
+    raw = encode_cached_consent(True, ["email", "age"])
+    assert len(raw) < len(json.dumps({"active": True, "scope": ["email", "age"]}))
+    assert decode_cached_consent(raw) == CachedConsent(active=True, scope=("email", "age"))
+    assert cached_consent_active(raw) is True
+    assert cached_consent_active(encode_cached_consent(False, [])) is False
+    assert decode_cached_consent(encode_cached_consent(True, [])) == CachedConsent(active=True, scope=())
+    legacy = json.dumps({"active": True, "scope": ["email"]})
+    assert decode_cached_consent(legacy) == CachedConsent(active=True, scope=("email",))
+    assert cached_consent_active(legacy) is True
+
+
+@pytest.mark.asyncio
+async def test_consent_cache_multi_key_ops():
+    cache = ConsentCache()
+    await cache.set_many({"k1": b"\x01\x01a", "k2": b"\x01\x00"})
+    assert await cache.get_many(["k1", "missing", "k2"]) == [b"\x01\x01a", None, b"\x01\x00"]
+    await cache.delete_many(["k1", "k2"])
+    assert await cache.get_many(["k1", "k2"]) == [None, None]
+
+
+@pytest.mark.asyncio
+async def test_update_writes_through_and_warm_up_respects_budget():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    svc = ConsentService()
+    svc.cache.allow_fallback = True
+    created = await svc.create_consent(ConsentCreate(data_principal_id="w1", purpose="research", scope=["email"]))
+    await svc.update_consent(created.id, ConsentUpdate(scope=["email", "age"]))
+    cached = await svc.cache.get(svc._cache_key("w1", "research"))
+    assert cached is not None and decode_cached_consent(cached) == CachedConsent(True, ("email", "age"))
+
+    await svc.update_consent(created.id, ConsentUpdate(purpose="marketing"))
+    assert await svc.cache.get(svc._cache_key("w1", "research")) is None
+    assert await svc.cache.get(svc._cache_key("w1", "marketing")) is not None
+
+    await svc.bulk_create([ConsentCreate(data_principal_id=f"w{i}", purpose="p", scope=["email"]) for i in range(10)])
+    cold = ConsentService()
+    cold.cache.allow_fallback = True
+    report = await cold.warm_cache(max_bytes=300, chunk_size=4)
+    assert 0 < report["entries"] < 11 and report["bytes"] <= 300
+    assert len(cold.cache.memory_cache) == report["entries"]
+    # Newest consents are loaded first
+    assert cold.cache.memory_cache.get(svc._cache_key("w9", "p")) is not None
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from backend.app.api.deps import app_services
+from backend.app.auth.security import issue_dev_token
+from backend.app.core.consent_feed import parse_cursor
+from backend.app.core.consent_service import ConsentCache, ConsentService
+from backend.app.core.erasure import ErasureService
+from backend.app.db.base import Base
+from backend.app.db.session import engine
+from backend.app.main import app
+from backend.app.models.schemas import ConsentChangeBatch, ConsentCreate, ConsentUpdate
+
+
+async def _reset_db() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+@pytest.mark.asyncio
+async def test_feed_serves_every_write_in_version_order_and_erasure_leaves_one_change():
+    await _reset_db()
+    svc = ConsentService()
+    a = await svc.create_consent(ConsentCreate(data_principal_id="p1", purpose="research", scope=["email"]))
+    await svc.update_consent(a.id, ConsentUpdate(purpose="marketing"))
+    await svc.withdraw_consent(a.id)
+    ids = await svc.bulk_create(
+        [ConsentCreate(data_principal_id=f"b{i}", purpose="research", scope=["phone"]) for i in range(3)]
+    )
+    await svc.bulk_withdraw(ids[:2])
+
+    batch = await svc.changes.read([0], limit=4)
+    assert [c.change for c in batch.changes] == ["create", "update", "withdraw", "create"]
+    assert batch.changes[1].purpose == "marketing" and batch.changes[1].previous_purpose == "research"
+    assert batch.cursor == str(batch.changes[-1].version)
+    rest = await svc.changes.read(parse_cursor(batch.cursor, 1))
+    assert [c.change for c in rest.changes] == ["create", "create", "withdraw", "withdraw"]
+    assert {c.consent_id for c in rest.changes[-2:]} == set(ids[:2])
+    versions = [c.version for c in batch.changes + rest.changes]
+    assert versions == sorted(versions)
+
+    head = await svc.changes.head()
+    empty = await svc.changes.read(parse_cursor(head, 1))
+    assert empty.changes == [] and empty.cursor == head
+
+    erasure = ErasureService(cache=svc.cache, audit=svc.audit, consents=svc)
+    await erasure.start("p1", requested_by="test")
+    await erasure.wait()
+    # The erased versions leave a gap, which readers read straight past
+    p1 = [c for c in (await svc.changes.read([0])).changes if c.data_principal_id == "p1"]
+    assert [(c.change, c.purpose, c.scope) for c in p1] == [("erase", None, None)]
+    after_head = await svc.changes.read(parse_cursor(head, 1))
+    assert [c.change for c in after_head.changes] == ["erase"]
+
+
+@pytest.mark.asyncio
+async def test_erasure_in_chunks_emits_one_erase_with_a_fresh_version():
+    await _reset_db()
+    svc = ConsentService()
+    await svc.create_consent(ConsentCreate(data_principal_id="keep", purpose="research", scope=["email"]))
+    for purpose in ("research", "marketing", "analytics"):
+        await svc.create_consent(ConsentCreate(data_principal_id="gone", purpose=purpose, scope=["email"]))
+    head = int(await svc.changes.head())
+
+    erasure = ErasureService(cache=svc.cache, chunk_size=2, audit=svc.audit, consents=svc)
+    await erasure.start("gone", requested_by="test")
+    await erasure.wait()
+    feed = svc.changes
+    changes = (await feed.read([0])).changes
+    assert [(c.data_principal_id, c.change) for c in changes] == [("keep", "create"), ("gone", "erase")]
+    # The erased versions, the newest among them, are not handed out again
+    assert changes[-1].version == head + 1
+
+    await svc.create_consent(ConsentCreate(data_principal_id="next", purpose="research", scope=["email"]))
+    assert [c.version for c in (await feed.read([head + 1])).changes] == [head + 2]
+
+
+@pytest.mark.asyncio
+async def test_slow_write_is_served_once_it_commits_and_staged_changes_go_out_in_order(monkeypatch):
+    await _reset_db()
+    svc = ConsentService()
+    append_event = svc.audit.append_event
+    in_transaction = asyncio.Event()
+
+    async def slow_append_event(**kwargs):
+        in_transaction.set()
+        # Far longer than the transactions around it; the change must still not be skipped
+        await asyncio.sleep(0.5)
+        return await append_event(**kwargs)
+
+    monkeypatch.setattr(svc.audit, "append_event", slow_append_event)
+    slow = asyncio.create_task(
+        svc.create_consent(ConsentCreate(data_principal_id="slow", purpose="research", scope=["email"]))
+    )
+    await in_transaction.wait()
+    during = await svc.changes.read([0])
+    assert during.changes == [] and during.cursor == "0"
+    await slow
+    monkeypatch.setattr(svc.audit, "append_event", append_event)
+    batch = await svc.changes.read([0])
+    assert [c.data_principal_id for c in batch.changes] == ["slow"]
+
+    # A write whose process stalls between commit and sequencing goes out with the next write, first
+    sequence = svc.changes.sequence
+
+    async def stalled(*shards: int) -> int:
+        return 0
+
+    monkeypatch.setattr(svc.changes, "sequence", stalled)
+    await svc.create_consent(ConsentCreate(data_principal_id="late", purpose="research", scope=["email"]))
+    assert (await svc.changes.read(parse_cursor(batch.cursor, 1))).changes == []
+    monkeypatch.setattr(svc.changes, "sequence", sequence)
+    await svc.create_consent(ConsentCreate(data_principal_id="next", purpose="research", scope=["email"]))
+    rest = await svc.changes.read(parse_cursor(batch.cursor, 1))
+    assert [c.data_principal_id for c in rest.changes] == ["late", "next"]
+    assert [c.version for c in rest.changes] == [batch.changes[0].version + 1, batch.changes[0].version + 2]
+
+
+@pytest.mark.asyncio
+async def test_long_poll_wakes_on_write_and_cache_follower_invalidates():
+    await _reset_db()
+    services = app_services(app)
+    headers = {"Authorization": f"Bearer {issue_dev_token('system', 'test')}"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        resp = await ac.get("/api/consents/changes/head", headers=headers)
+        cursor = resp.json()["cursor"]
+
+        async def write_later() -> None:
+            await asyncio.sleep(0.2)
+            await services.consents.create_consent(
+                ConsentCreate(data_principal_id="lp", purpose="research", scope=["email"])
+            )
+
+        start = time.perf_counter()
+        writer = asyncio.create_task(write_later())
+        resp = await ac.get("/api/consents/changes", headers=headers, params={"since": cursor, "wait": 10})
+        await writer
+        assert resp.status_code == 200
+        assert time.perf_counter() - start < 5
+        body = resp.json()
+        assert [c["data_principal_id"] for c in body["changes"]] == ["lp"]
+
+        resp = await ac.get("/api/consents/changes", headers=headers, params={"since": body["cursor"]})
+        assert resp.json() == {"changes": [], "cursor": body["cursor"]}
+        resp = await ac.get("/api/consents/changes", headers=headers, params={"since": "1.2"})
+        assert resp.status_code == 400
+
+    # Another process's cache holds a stale entry until the change reaches it through the feed
+    holder = ConsentService(cache=ConsentCache())
+    holder.cache.allow_fallback = True
+    key = holder._cache_key("lp", "research")
+    holder.cache.memory_cache[key] = b"stale"
+    await holder.invalidate_cached(ConsentChangeBatch.model_validate(body).changes)
+    assert key not in holder.cache.memory_cache
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient
+
+from backend.app.api.deps import app_services
+from backend.app.core.consent_service import consent_json
+from backend.app.main import app
+from backend.app.auth.security import issue_dev_token
+from backend.app.db.base import Base
+from backend.app.db.session import engine
+from backend.app.models.schemas import ConsentCreate, ConsentRead
+
+
+@pytest.mark.asyncio
+async def test_list_consents_keyset_pages_and_export():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    headers = {"Authorization": f"Bearer {issue_dev_token('system', 'test')}"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        for i in range(5):
+            resp = await ac.post(
+                "/api/consents",
+                headers=headers,
+                json={"data_principal_id": f"p{i}", "purpose": "research", "scope": ["email"]},
+            )
+            assert resp.status_code == 200
+
+        seen: list[int] = []
+        cursor = None
+        while True:
+            params: dict[str, str | int] = {"limit": 2}
+            if cursor is not None:
+                params["after"] = cursor
+            resp = await ac.get("/api/consents", headers=headers, params=params)
+            assert resp.status_code == 200
+            seen.extend(c["id"] for c in resp.json())
+            cursor = resp.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+        assert seen == sorted(seen) and len(seen) == 5
+
+        resp = await ac.get("/api/consents/export", headers=headers, params={"purpose": "research"})
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in resp.text.splitlines()]
+        assert [r["id"] for r in rows] == seen
+
+        resp = await ac.get("/api/consents/export", headers=headers, params={"format": "json"})
+        assert [r["data_principal_id"] for r in resp.json()] == [f"p{i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_list_consents_filters_by_scope_in_the_database():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    headers = {"Authorization": f"Bearer {issue_dev_token('system', 'test')}"}
+    scopes = [["email"], ["email", "age"], ["age"], ["phone", "email", "age"]]
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        for i, scope in enumerate(scopes):
+            resp = await ac.post(
+                "/api/consents",
+                headers=headers,
+                json={"data_principal_id": f"s{i}", "purpose": "research", "scope": scope},
+            )
+            assert resp.json()["scope"] == scope
+
+        resp = await ac.get("/api/consents", headers=headers, params={"scope": "email"})
+        assert [c["data_principal_id"] for c in resp.json()] == ["s0", "s1", "s3"]
+
+        resp = await ac.get("/api/consents", headers=headers, params=[("scope", "email"), ("scope", "age")])
+        assert [c["data_principal_id"] for c in resp.json()] == ["s1", "s3"]
+
+        resp = await ac.get("/api/consents/export", headers=headers, params={"scope": "phone"})
+        assert [json.loads(line)["scope"] for line in resp.text.splitlines()] == [["phone", "email", "age"]]
+
+
+@pytest.mark.asyncio
+async def test_rendered_consent_json_matches_the_response_model():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    headers = {"Authorization": f"Bearer {issue_dev_token('system', 'test')}"}
+    svc = app_services(app).consents
+    first = await svc.create_consent(
+        ConsentCreate(data_principal_id='Zoë "q"', purpose="research", scope=["email", "ünï"])
+    )
+    await svc.create_consent(
+        ConsentCreate(data_principal_id="p2", purpose="ads", scope=[], expires_at=datetime(2030, 1, 2, 3, 4, 5, 6))
+    )
+    await svc.withdraw_consent(first.id)
+    consents = await svc.list_consents(data_principal_id=None, purpose=None)
+    expected = [c.model_dump(mode="json") for c in consents]
+    assert [c["active"] for c in expected] == [False, True]
+
+    body, next_cursor = await svc.list_consents_json(data_principal_id=None, purpose=None, limit=2)
+    assert body.decode() == "[" + ",".join(c.model_dump_json() for c in consents) + "]"
+    assert next_cursor == expected[-1]["id"]
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        resp = await ac.get("/api/consents", headers=headers)
+        assert resp.json() == expected and resp.headers["content-type"] == "application/json"
+        assert "X-Next-Cursor" not in resp.headers
+        resp = await ac.get("/api/consents/export", headers=headers)
+        assert [json.loads(line) for line in resp.text.splitlines()] == expected
+        resp = await ac.get(f"/api/consents/{expected[1]['id']}", headers=headers)
+        assert resp.json() == expected[1]
+
+
+@pytest.mark.parametrize(
+    "expires_at",
+    [
+        None,
+        datetime(2030, 1, 2, 3, 4, 5),
+        datetime(2030, 1, 2, 3, 4, 5, 6, tzinfo=timezone.utc),
+        datetime(2030, 1, 2, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+    ],
+)
+def test_consent_json_is_byte_identical_to_the_model(expires_at):
+    row = SimpleNamespace(
+        id=3, data_principal_id='Zoë "q"\t', purpose="récherche", scope=["émail", "电话"], expires_at=expires_at, active=True
+    )
+    model = ConsentRead.model_validate({**vars(row), "id": 7})
+    assert consent_json(row, 7) == model.model_dump_json()
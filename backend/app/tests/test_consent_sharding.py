@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from typing import cast
+
+import pytest
+from sqlalchemy import Table, func, select
+
+from backend.app.core.consent_feed import ConsentChangeFeed, parse_cursor
+from backend.app.core.consent_service import ConsentService
+from backend.app.core.erasure import ErasureService
+from backend.app.db.base import Base
+from backend.app.db.routing import ShardRouter, session_key, shard_for
+from backend.app.db.session import engine, get_session
+from backend.app.models.orm import AuditEvent, Consent, ConsentChange, PendingConsentChange
+from backend.app.models.schemas import ConsentCreate
+
+
+async def _create_tables(router: ShardRouter) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    for _, shard_engine in router.engines():
+        async with shard_engine.begin() as conn:
+            tables = [cast(Table, model.__table__) for model in (Consent, ConsentChange, PendingConsentChange)]
+            await conn.run_sync(Base.metadata.create_all, tables=tables)
+
+
+@pytest.mark.asyncio
+async def test_consents_are_sharded_by_principal_with_global_ids(tmp_path):
+    router = ShardRouter([f"sqlite+aiosqlite:///{tmp_path}/shard{i}.db" for i in range(2)], replica_urls=[])
+    await _create_tables(router)
+    svc = ConsentService(router=router)
+
+    created = [
+        await svc.create_consent(ConsentCreate(data_principal_id=f"p{i}", purpose="research", scope=["email"]))
+        for i in range(10)
+    ]
+    assert {c.id % 2 for c in created} == {0, 1}
+    for consent in created:
+        assert consent.id % 2 == shard_for(consent.data_principal_id, 2)
+        fetched = await svc.get_consent(consent.id)
+        assert fetched is not None and fetched.data_principal_id == consent.data_principal_id
+
+    seen: list[int] = []
+    after = None
+    while True:
+        page = await svc.list_consents(data_principal_id=None, purpose=None, after_id=after, limit=3)
+        seen.extend(c.id for c in page)
+        if len(page) < 3:
+            break
+        after = page[-1].id
+    assert seen == sorted(c.id for c in created)
+
+    assert await svc.bulk_withdraw([c.id for c in created[:4]]) == 4
+    streamed = [c async for c in svc.stream_consents(data_principal_id=None, purpose=None)]
+    assert sum(not c.active for c in streamed) == 4 and len(streamed) == 10
+
+    erasure = ErasureService(cache=svc.cache, audit=svc.audit, consents=svc)
+    await erasure.start("p5", requested_by="test")
+    await erasure.wait()
+    assert await svc.count_principal_consents("p5") == 0
+    assert await svc.list_consents(data_principal_id="p6", purpose=None) != []
+
+    async with get_session() as session:
+        actions = (await session.execute(select(AuditEvent.action, func.count()).group_by(AuditEvent.action))).all()
+    assert dict(actions)["consent_create"] == 10 and dict(actions)["consent_withdraw"] == 4
+
+    # The feed cursor tracks each shard's versions; erasure left one change for p5
+    batch = await ConsentChangeFeed(router).read(parse_cursor(None, 2))
+    assert len(batch.cursor.split(".")) == 2
+    changes = [(c.change, c.data_principal_id) for c in batch.changes]
+    assert changes.count(("erase", "p5")) == 1 and not any(p == "p5" and c != "erase" for c, p in changes)
+    assert sum(c == "create" for c, _ in changes) == 9 and sum(c == "withdraw" for c, _ in changes) == 4
+    await router.dispose()
+
+
+@pytest.mark.asyncio
+async def test_reads_use_replicas_except_after_own_writes(tmp_path):
+    now = [0.0]
+    router = ShardRouter(
+        [f"sqlite+aiosqlite:///{tmp_path}/primary.db"],
+        replica_urls=[[f"sqlite+aiosqlite:///{tmp_path}/replica.db"]],
+        pin_seconds=5,
+        clock=lambda: now[0],
+    )
+    await _create_tables(router)
+    svc = ConsentService(router=router)
+
+    # Nothing replicates into the replica file, so a read that finds the row came from the primary
+    consent = await svc.create_consent(ConsentCreate(data_principal_id="r1", purpose="research", scope=[]))
+    assert [c.id for c in await svc.list_consents(data_principal_id="r1", purpose=None)] == [consent.id]
+    now[0] = 6
+    assert await svc.list_consents(data_principal_id="r1", purpose=None) == []
+    assert await svc.get_consent(consent.id) is None
+
+    token = session_key.set("sub:admin")
+    try:
+        other = await svc.create_consent(ConsentCreate(data_principal_id="r2", purpose="research", scope=[]))
+        assert await svc.get_consent(other.id) is not None
+        now[0] = 12
+        assert await svc.get_consent(other.id) is None
+    finally:
+        session_key.reset(token)
+    await router.dispose()
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import io
+import json
+import zipfile
+
+import pytest
+from httpx import AsyncClient
+
+from backend.app.api.deps import app_services
+from backend.app.auth.security import issue_dev_token
+from backend.app.core.consent_service import ConsentService
+from backend.app.core.dsar import DsarExporter
+from backend.app.core.ingest_pipeline import store_records
+from backend.app.core.merkle_audit import AuditLog
+from backend.app.core.payload_codec import PayloadCodec, serialize, train_dictionary
+from backend.app.db.base import Base
+from backend.app.db.session import engine, get_session
+from backend.app.main import app
+from backend.app.models.schemas import ConsentCreate
+
+
+def _payload(i: int) -> dict:
+    return {"email_hash": f"{i:064x}", "aadhar": "[REDACTED]", "city": "Pune", "n": i}
+
+
+async def _seed() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    svc = ConsentService()
+    await svc.create_consent(ConsentCreate(data_principal_id="d1", purpose="research", scope=["email"]))
+    await svc.create_consent(ConsentCreate(data_principal_id="d2", purpose="research", scope=["email"]))
+    codec = PayloadCodec()
+    async with get_session() as session:
+        await codec.add_dictionary(session, "dsar", train_dictionary([serialize(_payload(i)) for i in range(20)]))
+        records = [{"data_principal_id": "d1", "purpose": "dsar", "payload": _payload(i)} for i in range(5)]
+        records.append({"data_principal_id": "d2", "purpose": "dsar", "payload": _payload(99)})
+        await store_records(session, AuditLog(), codec, records)
+
+
+@pytest.mark.asyncio
+async def test_dsar_export_streams_ndjson_and_zip():
+    await _seed()
+    headers = {"Authorization": f"Bearer {issue_dev_token('dpo', 'officer-1')}"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        resp = await ac.get("/api/rights/export", headers=headers, params={"dpid": "d1"})
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in resp.text.splitlines()]
+        assert [line["type"] for line in lines] == ["consents"] + ["ingest_records"] * 5 + ["audit_events"] * 5
+        assert [line["record"]["payload"] for line in lines[1:6]] == [_payload(i) for i in range(5)]
+        assert {line["record"]["actor_id"] for line in lines[6:]} == {"d1"}
+
+        resp = await ac.get("/api/rights/export", headers=headers, params={"dpid": "d1", "format": "zip"})
+        archive = zipfile.ZipFile(io.BytesIO(resp.content))
+        assert archive.namelist() == ["consents.ndjson", "ingest_records.ndjson", "audit_events.ndjson"]
+        records = [json.loads(line) for line in archive.read("ingest_records.ndjson").splitlines()]
+        assert [r["payload"] for r in records] == [_payload(i) for i in range(5)]
+        assert len(archive.read("audit_events.ndjson").splitlines()) == 5
+
+        own = {"Authorization": f"Bearer {issue_dev_token('data_principal', 'd2')}"}
+        assert (await ac.get("/api/rights/export", headers=own, params={"dpid": "d1"})).status_code == 403
+        resp = await ac.get("/api/rights/export", headers=own, params={"dpid": "d2"})
+        assert [json.loads(line)["type"] for line in resp.text.splitlines()].count("ingest_records") == 1
+
+        # While every slot is streaming, new exports are turned away instead of queueing on the pool
+        stream = app_services(app).exporter.ndjson("d1")
+        second = app_services(app).exporter.ndjson("d1")
+        await stream.__anext__()
+        await second.__anext__()
+        resp = await ac.get("/api/rights/export", headers=headers, params={"dpid": "d1"})
+        assert resp.status_code == 503 and resp.headers["Retry-After"]
+        await stream.aclose()
+        await second.aclose()
+        assert not app_services(app).exporter.busy
+
+
+@pytest.mark.asyncio
+async def test_dsar_export_flushes_in_bounded_pieces(monkeypatch):
+    await _seed()
+    monkeypatch.setenv("DSAR_FLUSH_BYTES", "200")
+    pieces = [piece async for piece in DsarExporter(chunk_size=2).ndjson("d1")]
+    assert len(pieces) > 3
+    assert all(len(piece) < 200 + 400 for piece in pieces)
+    assert len(b"".join(pieces).splitlines()) == 11
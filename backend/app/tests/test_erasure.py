@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from backend.app.api.deps import app_services
+from backend.app.auth.security import issue_dev_token
+from backend.app.core.consent_service import ConsentService, principal_index_key
+from backend.app.core.erasure import ErasureService
+from backend.app.core.ingest_pipeline import store_records
+from backend.app.core.merkle_audit import AuditLog
+from backend.app.core.payload_codec import PayloadCodec
+from backend.app.db.base import Base
+from backend.app.db.session import engine, get_session
+from backend.app.main import app
+from backend.app.models.orm import AuditEvent, Consent, ErasureJob, IngestRecord
+from backend.app.models.schemas import ConsentCreate
+
+
+async def _seed(svc: ConsentService) -> None:
+    for purpose in ("research", "marketing"):
+        await svc.create_consent(ConsentCreate(data_principal_id="e1", purpose=purpose, scope=["email"]))
+    await svc.create_consent(ConsentCreate(data_principal_id="e2", purpose="research", scope=["email"]))
+    records = [{"data_principal_id": "e1", "purpose": "research", "payload": {"i": i}} for i in range(7)]
+    records += [{"data_principal_id": "e2", "purpose": "research", "payload": {"i": i}} for i in range(2)]
+    async with get_session() as session:
+        await store_records(session, AuditLog(), PayloadCodec(), records)
+
+
+@pytest.mark.asyncio
+async def test_erasure_deletes_in_chunks_purges_cache_and_audits_per_table():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    svc = ConsentService()
+    await _seed(svc)
+    assert len(svc.cache.memory_index[principal_index_key("e1")]) == 2
+
+    erasure = ErasureService(cache=svc.cache, chunk_size=3)
+    job = await erasure.start("e1", requested_by="dpo")
+    await erasure.wait()
+    done = await erasure.get(job.id)
+    assert done is not None and done.status == "completed" and done.progress == 1.0
+    assert (done.ingest_records_total, done.ingest_records_deleted) == (7, 7)
+    assert (done.consents_total, done.consents_deleted, done.cache_keys_deleted) == (2, 2, 2)
+
+    assert not await svc.cache.get("consent:e1:research")
+    assert await svc.cache.get("consent:e2:research")
+    async with get_session() as session:
+        remaining = (await session.execute(select(IngestRecord.data_principal_id))).scalars().all()
+        consents = (await session.execute(select(Consent.data_principal_id))).scalars().all()
+        summaries = (
+            await session.execute(select(AuditEvent).where(AuditEvent.action == "erasure").order_by(AuditEvent.id))
+        ).scalars().all()
+    assert remaining == ["e2", "e2"] and consents == ["e2"]
+    assert [(e.scope, e.actor_id) for e in summaries] == [
+        ("ingest_records", "dpo"),
+        ("consents", "dpo"),
+        ("consent_cache", "dpo"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_erasure_api_and_resuming_an_interrupted_job():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await _seed(ConsentService())
+
+    headers = {"Authorization": f"Bearer {issue_dev_token('dpo', 'officer-1')}"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        resp = await ac.post("/api/rights/erasure", headers=headers, json={"data_principal_id": "e1"})
+        assert resp.status_code == 202
+        assert resp.json()["status"] == "pending"
+        location = resp.headers["Location"]
+        await app_services(app).erasure.wait()
+        resp = await ac.get(location, headers=headers)
+        body = resp.json()
+        assert body["status"] == "completed"
+        assert body["ingest_records_deleted"] == 7 and body["consents_deleted"] == 2
+
+        assert (await ac.get("/api/rights/erasure/999", headers=headers)).status_code == 404
+
+        other_officer = {"Authorization": f"Bearer {issue_dev_token('dpo', 'officer-2')}"}
+        assert (await ac.get(location, headers=other_officer)).status_code == 403
+        subject = {"Authorization": f"Bearer {issue_dev_token('data_principal', 'e1')}"}
+        resp = await ac.post("/api/rights/erasure", headers=subject, json={"data_principal_id": "e2"})
+        assert resp.status_code == 403
+        resp = await ac.post("/api/rights/erasure", headers=subject, json={"data_principal_id": "e1"})
+        assert resp.status_code == 202 and resp.json()["requested_by"] == "e1"
+        await app_services(app).erasure.wait()
+
+    async with get_session() as session:
+        assert await session.scalar(select(func.count()).select_from(IngestRecord)) == 2
+        # As if the process died after deleting a first chunk of e2's records
+        session.add(
+            ErasureJob(
+                data_principal_id="e2",
+                requested_by="dpo",
+                status="running",
+                ingest_records_total=3,
+                ingest_records_deleted=1,
+                consents_total=1,
+            )
+        )
+    assert await app_services(app).erasure.resume() == 1
+    await app_services(app).erasure.wait()
+    async with get_session() as session:
+        job = (await session.execute(select(ErasureJob).where(ErasureJob.data_principal_id == "e2"))).scalar_one()
+        assert await session.scalar(select(func.count()).select_from(IngestRecord)) == 0
+    assert (job.status, job.ingest_records_deleted, job.consents_deleted) == ("completed", 3, 1)
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from backend.app.core.executor import CpuExecutor
+from backend.app.core.merkle_audit import leaf_hash, leaf_hashes
+
+
+@pytest.mark.asyncio
+async def test_small_inputs_run_inline_and_large_ones_in_threads():
+    executor = CpuExecutor()
+    executor.inline_threshold = 100
+    loop_thread = threading.get_ident()
+    assert await executor.run(threading.get_ident, size=10) == loop_thread
+    assert await executor.run(threading.get_ident, size=1000) != loop_thread
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_map_batch_process_pool_matches_inline():
+    executor = CpuExecutor()
+    executor.batch_min_items = 10
+    executor.process_workers = 2
+    leaves = [{"action": "a", "i": i} for i in range(50)]
+    assert await executor.map_batch(leaf_hashes, leaves) == [leaf_hash(leaf) for leaf in leaves]
+    executor.shutdown()
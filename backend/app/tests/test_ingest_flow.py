@@ -4,10 +4,15 @@ from __future__ import annotations
 import pytest
 from httpx import AsyncClient
 
+from sqlalchemy import select
+
+from backend.app.api.deps import app_services
 from backend.app.main import app
 from backend.app.auth.security import issue_dev_token
+from backend.app.core.consent_service import encode_cached_consent
 from backend.app.db.base import Base
-from backend.app.db.session import engine
+from backend.app.db.session import engine, get_session
+from backend.app.models.orm import IngestRecord
 
 
 @pytest.mark.asyncio
@@ -69,3 +74,37 @@ async def test_ingest_blocked_without_consent(monkeypatch):
         assert resp.status_code == 403
 
 
+@pytest.mark.asyncio
+async def test_ingest_drops_or_rejects_fields_outside_consented_scope(monkeypatch):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    headers = {"Authorization": f"Bearer {issue_dev_token('system', 'test')}"}
+    pipeline = app_services(app).pipeline
+    body = {
+        "data_principal_id": "user-scope",
+        "purpose": "research",
+        "date_of_birth": "1990-01-01",
+        "payload": {"email": "z@example.com", "city": "Pune", "phone": "123"},
+    }
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        await ac.post(
+            "/api/consents",
+            headers=headers,
+            json={"data_principal_id": "user-scope", "purpose": "research", "scope": ["email", "city"]},
+        )
+        monkeypatch.setattr(pipeline, "scope_mode", "drop")
+        stored = await ac.post("/api/ingest", headers=headers, json=body)
+        monkeypatch.setattr(pipeline, "scope_mode", "reject")
+        rejected = await ac.post("/api/ingest", headers=headers, json=body)
+
+    assert stored.json()["status"] == "stored"
+    async with get_session() as session:
+        payloads = [pipeline.codec.decode(p) for p in (await session.execute(select(IngestRecord.payload))).scalars()]
+    assert payloads == [{"email": "z@example.com", "city": "Pune"}]
+    assert rejected.status_code == 403 and "phone" in rejected.json()["detail"]
+    # Consents with the same scope share one compiled field set
+    compiled_scope = pipeline.consent.compiled_scope
+    assert compiled_scope(encode_cached_consent(True, ["email", "city"])) is compiled_scope(
+        encode_cached_consent(True, ["email", "city"])
+    )
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import hashlib
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from backend.app.api.deps import app_services
+from backend.app.auth.security import issue_dev_token
+from backend.app.core.idempotency import BloomFilter, IdempotencyIndex, idempotency_key
+from backend.app.core.ingest_pipeline import store_records
+from backend.app.core.merkle_audit import AuditLog
+from backend.app.core.payload_codec import PayloadCodec
+from backend.app.db.base import Base
+from backend.app.db.session import engine, get_session
+from backend.app.models.orm import AuditEvent, IngestRecord
+from backend.app.main import app
+
+
+async def _counts() -> tuple[int, int]:
+    async with get_session() as session:
+        records = await session.scalar(select(func.count()).select_from(IngestRecord))
+        events = await session.scalar(
+            select(func.count()).select_from(AuditEvent).where(AuditEvent.action == "ingest_store")
+        )
+    return records or 0, events or 0
+
+
+@pytest.mark.asyncio
+async def test_retried_ingest_returns_the_original_record(monkeypatch):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    headers = {"Authorization": f"Bearer {issue_dev_token('system', 'test')}"}
+    body = {"data_principal_id": "idem-1", "purpose": "research", "date_of_birth": "1990-01-01", "payload": {"v": 1}}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        await ac.post(
+            "/api/consents",
+            headers=headers,
+            json={"data_principal_id": "idem-1", "purpose": "research", "scope": ["email"]},
+        )
+        first = await ac.post("/api/ingest", headers={**headers, "Idempotency-Key": "req-42"}, json=body)
+        retry = await ac.post("/api/ingest", headers={**headers, "Idempotency-Key": "req-42"}, json=body)
+        other = await ac.post("/api/ingest", headers={**headers, "Idempotency-Key": "req-43"}, json=body)
+    assert first.json()["status"] == "stored"
+    assert retry.status_code == 200
+    assert retry.json() == {"status": "duplicate", "record_id": first.json()["record_id"]}
+    assert other.json()["record_id"] != first.json()["record_id"]
+    assert await _counts() == (2, 2)
+
+    # A process that never saw the key (empty filter) still finds the duplicate via the unique index
+    monkeypatch.setattr(app_services(app).pipeline, "idempotency", IdempotencyIndex())
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        again = await ac.post("/api/ingest", headers={**headers, "Idempotency-Key": "req-42"}, json=body)
+    assert again.json() == {"status": "duplicate", "record_id": first.json()["record_id"]}
+    assert await _counts() == (2, 2)
+
+
+@pytest.mark.asyncio
+async def test_duplicate_keys_in_one_batch_and_filter_rebuild():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    key = idempotency_key("p", "research", "k1", {})
+    assert key is not None
+    records = [
+        {"data_principal_id": "p", "purpose": "research", "payload": {"i": i}, "idempotency_key": key} for i in range(3)
+    ]
+    records.append({"data_principal_id": "p", "purpose": "research", "payload": {"i": 9}})
+    async with get_session() as session:
+        stored = await store_records(session, AuditLog(), PayloadCodec(), records)
+    assert len(stored) == 2
+    assert await _counts() == (2, 2)
+
+    index = IdempotencyIndex()
+    assert await index.find(key) is None
+    report = await index.rebuild()
+    assert report["keys"] == 1
+    assert await index.find(key) == min(stored)
+
+
+def test_bloom_filter_false_positive_rate_and_budget():
+    def key(i: int) -> str:
+        return hashlib.sha256(str(i).encode()).hexdigest()
+
+    bloom = BloomFilter(10_000, 0.01, max_bytes=1 << 20)
+    for i in range(10_000):
+        bloom.add(key(i))
+    assert all(key(i) in bloom for i in range(10_000))
+    false_positives = sum(key(i) in bloom for i in range(10_000, 30_000))
+    assert false_positives / 20_000 < 0.02
+    assert 0.005 < bloom.expected_fp_rate < 0.02
+
+    capped = BloomFilter(10_000_000, 0.001, max_bytes=4096)
+    assert len(capped.bits) == 4096
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from backend.app.api.deps import app_services
+from backend.app.auth.security import issue_dev_token
+from backend.app.core.ingest_pipeline import store_records
+from backend.app.core.ingest_wal import IngestWAL, _read_frames
+from backend.app.core.merkle_audit import AuditLog
+from backend.app.core.payload_codec import PayloadCodec
+from backend.app.db.base import Base
+from backend.app.db.session import engine, get_session
+from backend.app.main import app
+from backend.app.models.orm import AuditEvent, IngestRecord
+
+
+async def _counts() -> tuple[int, int]:
+    async with get_session() as session:
+        records = await session.scalar(select(func.count()).select_from(IngestRecord))
+        events = await session.scalar(select(func.count()).select_from(AuditEvent))
+    return records or 0, events or 0
+
+
+@pytest.mark.asyncio
+async def test_wal_replays_undrained_entries_exactly_once(tmp_path):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    audit = AuditLog()
+    codec = PayloadCodec()
+
+    async def store(session, records):
+        return await store_records(session, audit, codec, records)
+
+    async def failing_store(session, records):
+        await store(session, records)
+        raise RuntimeError("database went away")
+
+    wal = IngestWAL(str(tmp_path), wal_id="test")
+    wal.drain_batch = 4
+    await wal.open()
+    records = [{"data_principal_id": f"p{i}", "purpose": "research", "payload": {"i": i}} for i in range(10)]
+    assert await asyncio.gather(*(wal.append(r) for r in records)) == list(range(1, 11))
+    assert await wal.drain_once(store) == 4
+    with pytest.raises(RuntimeError):
+        await wal.drain_once(failing_store)
+    assert await _counts() == (4, 4)
+    await wal.close()
+
+    # Crash mid-write: a torn frame at the end of the segment
+    (segment,) = tmp_path.glob("*.wal")
+    with open(segment, "ab") as fh:
+        fh.write(b"\x01\x02\x03torn")
+
+    wal = IngestWAL(str(tmp_path), wal_id="test")
+    wal.drain_batch = 4
+    await wal.open()
+    assert (wal.drained_seq, wal.next_seq) == (4, 11)
+    while await wal.drain_once(store):
+        pass
+    assert await _counts() == (10, 10)
+    assert await wal.append(records[0]) == 11
+    await wal.close()
+
+    wal = IngestWAL(str(tmp_path), wal_id="test")
+    await wal.open()
+    assert await wal.drain_once(store) == 1
+    assert await wal.drain_once(store) == 0
+    assert await _counts() == (11, 11)
+    await wal.close()
+
+
+@pytest.mark.asyncio
+async def test_poisoned_entry_is_dead_lettered_and_drain_moves_past_it(tmp_path):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    audit = AuditLog()
+    codec = PayloadCodec()
+
+    async def store(session, records):
+        if any(record["data_principal_id"] == "poison" for record in records):
+            raise ValueError("value too long for type character varying(255)")
+        return await store_records(session, audit, codec, records)
+
+    wal = IngestWAL(str(tmp_path), wal_id="poison")
+    wal.max_attempts = 2
+    await wal.open()
+    records = [{"data_principal_id": f"p{i}", "purpose": "research", "payload": {"i": i}} for i in range(5)]
+    records[2]["data_principal_id"] = "poison"
+    await asyncio.gather(*(wal.append(r) for r in records))
+
+    # The batch fails, then entries go one at a time: two stored, the poisoned one fails until dead-lettered
+    with pytest.raises(ValueError):
+        await wal.drain_once(store)
+    assert await wal.drain_once(store) == 1
+    assert await wal.drain_once(store) == 1
+    with pytest.raises(ValueError):
+        await wal.drain_once(store)
+    assert await wal.drain_once(store) == 1
+    assert wal.drained_seq == 3
+    # The rest of the failed batch is still drained singly, then full batches resume
+    assert [await wal.drain_once(store) for _ in range(3)] == [1, 1, 0]
+    assert await _counts() == (4, 4)
+    assert await wal.append(records[0]) == 6 and await wal.append(records[1]) == 7
+    assert await wal.drain_once(store) == 2
+    await wal.close()
+
+    frames, _ = _read_frames((tmp_path / "dead-letter.log").read_bytes())
+    assert [seq for seq, _ in frames] == [3]
+    wal = IngestWAL(str(tmp_path), wal_id="poison")
+    await wal.open()
+    assert wal.drained_seq == 7
+    assert await wal.drain_once(store) == 0
+    await wal.close()
+
+
+@pytest.mark.asyncio
+async def test_ingest_in_wal_mode_accepts_then_persists(tmp_path, monkeypatch):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    wal = IngestWAL(str(tmp_path), wal_id="api")
+    await wal.open()
+    monkeypatch.setattr(app_services(app).pipeline, "wal", wal)
+    headers = {"Authorization": f"Bearer {issue_dev_token('system', 'test')}"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        resp = await ac.post(
+            "/api/consents",
+            headers=headers,
+            json={"data_principal_id": "user-wal", "purpose": "research", "scope": ["email"]},
+        )
+        assert resp.status_code == 200
+        resp = await ac.post(
+            "/api/ingest",
+            headers=headers,
+            json={
+                "data_principal_id": "user-wal",
+                "purpose": "research",
+                "date_of_birth": "1990-01-01",
+                "payload": {"email": "w@example.com"},
+            },
+        )
+        assert resp.status_code == 202
+        assert resp.json() == {"status": "accepted", "record_id": None}
+        # Values the columns cannot hold are refused before the 202, not left to fail in the drainer
+        resp = await ac.post(
+            "/api/ingest",
+            headers=headers,
+            json={
+                "data_principal_id": "x" * 256,
+                "purpose": "research",
+                "date_of_birth": "1990-01-01",
+                "payload": {},
+            },
+        )
+        assert resp.status_code == 422
+    assert (await _counts())[0] == 0
+    assert await wal.drain_once(app_services(app).pipeline.store_batch) == 1
+    async with get_session() as session:
+        record = (await session.execute(select(IngestRecord))).scalar_one()
+    assert record.data_principal_id == "user-wal"
+    await wal.close()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import io
+import json
+import logging
+import queue
+import sys
+
+from backend.app.core.logging_setup import (
+    DebugSampler,
+    NonBlockingQueueHandler,
+    configure_logging,
+    shutdown_logging,
+)
+
+
+def test_queued_json_logging_writes_records_with_extras(monkeypatch):
+    root = logging.getLogger()
+    handlers, level = root.handlers, root.level
+    monkeypatch.setenv("DEBUG", "true")
+    stream = io.StringIO()
+    try:
+        configure_logging(stream)
+        log = logging.getLogger("backend.app.test")
+        log.info("stored %s", "r1", extra={"record_id": 7})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            log.exception("failed")
+        shutdown_logging()
+    finally:
+        root.handlers, root.level = handlers, level
+
+    first, second = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert first["message"] == "stored r1" and first["record_id"] == 7
+    assert first["levelname"] == "INFO" and first["name"] == "backend.app.test"
+    assert "ValueError: boom" in second["exc_info"]
+
+
+def test_debug_sampler_samples_and_rate_limits_per_logger():
+    sampler = DebugSampler(rate_limit=2, sample_rates="hot=0.5")
+
+    def record(name: str, level: int, created: float) -> logging.LogRecord:
+        rec = logging.makeLogRecord({"name": name, "levelno": level})
+        rec.created = created
+        return rec
+
+    assert [sampler.filter(record("hot", logging.DEBUG, 0.0)) for _ in range(4)] == [True, False, True, False]
+    assert [sampler.filter(record("cold", logging.DEBUG, 0.0)) for _ in range(3)] == [True, True, False]
+    assert sampler.filter(record("cold", logging.DEBUG, 1.0))
+    assert sampler.filter(record("cold", logging.INFO, 1.0))
+
+
+def test_queue_handler_leaves_the_logged_record_unchanged():
+    handler = NonBlockingQueueHandler(queue.Queue())
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        exc_info = sys.exc_info()
+    record = logging.makeLogRecord({"msg": "stored %s", "args": ("r1",), "exc_info": exc_info})
+    handler.handle(record)
+
+    queued = handler.queue.get_nowait()
+    assert queued is not record
+    assert queued.msg == "stored r1" and queued.args is None and queued.exc_info is None
+    assert "ValueError: boom" in queued.exc_text
+    # Handlers after this one, e.g. Sentry's, still get the arguments and the exception
+    assert (record.msg, record.args, record.exc_info) == ("stored %s", ("r1",), exc_info)
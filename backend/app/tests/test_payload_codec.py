@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from sqlalchemy import select
+
+from backend.app.core.executor import CpuExecutor
+from backend.app.core.ingest_pipeline import store_records
+from backend.app.core.merkle_audit import AuditLog
+from backend.app.core.payload_codec import (
+    FORMAT_RAW,
+    FORMAT_ZLIB,
+    FORMAT_ZLIB_DICT,
+    PayloadCodec,
+    serialize,
+    train_dictionary,
+)
+from backend.app.db.base import Base
+from backend.app.db.session import engine, get_session
+from backend.app.models.orm import IngestRecord
+
+
+def _payload(i: int) -> dict:
+    return {"email_hash": f"{i:064x}", "aadhar": "[REDACTED]", "city": "Pune", "channels": ["email", "sms"], "n": i}
+
+
+def test_codec_formats_and_legacy_rows():
+    codec = PayloadCodec()
+    small = {"a": 1}
+    assert codec.encode("research", small)[0] == FORMAT_RAW
+    assert codec.decode(codec.encode("research", small)) == small
+
+    large = _payload(1)
+    assert codec.encode("research", large)[0] == FORMAT_ZLIB
+    assert codec.decode(codec.encode("research", large)) == large
+
+    zdict = train_dictionary([serialize(_payload(i)) for i in range(50)])
+    assert b'"aadhar":"[REDACTED]"' in zdict
+    codec.register(7, "research", zdict)
+    encoded = codec.encode("research", large)
+    assert encoded[0] == FORMAT_ZLIB_DICT
+    assert len(encoded) < len(PayloadCodec().encode("research", large))
+    assert codec.decode(encoded) == large
+    with pytest.raises(LookupError):
+        PayloadCodec().decode(encoded)
+
+    # Rows written before the codec: TEXT values, or their bytes after the BYTEA migration
+    legacy = json.dumps(large)
+    assert codec.decode(legacy) == large
+    assert codec.decode(legacy.encode()) == large
+
+
+class _RecordingExecutor(CpuExecutor):
+    def __init__(self) -> None:
+        super().__init__()
+        self.inline_threshold = 0
+        self.calls: list[str] = []
+
+    async def run(self, fn, *args, size):
+        self.calls.append(fn.__name__)
+        return await super().run(fn, *args, size=size)
+
+
+@pytest.mark.asyncio
+async def test_stored_payloads_decode_with_dictionaries_from_the_database():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    writer = PayloadCodec()
+    async with get_session() as session:
+        zdict = train_dictionary([serialize(_payload(i)) for i in range(50)])
+        dict_id = await writer.add_dictionary(session, "research", zdict)
+        records = [{"data_principal_id": f"p{i}", "purpose": "research", "payload": _payload(i)} for i in range(5)]
+        executor = _RecordingExecutor()
+        await store_records(session, AuditLog(), writer, records, executor)
+        executor.shutdown()
+    # Compression went through the executor, here to its thread pool
+    assert "_encode_payloads" in executor.calls
+
+    reader = PayloadCodec()
+    async with get_session() as session:
+        stored = (await session.execute(select(IngestRecord.payload).order_by(IngestRecord.id))).scalars().all()
+        assert all(value[0] == FORMAT_ZLIB_DICT for value in stored)
+        assert int.from_bytes(stored[0][1:5], "little") == dict_id
+        decoded = [await reader.decode_async(session, value) for value in stored]
+    assert decoded == [_payload(i) for i in range(5)]
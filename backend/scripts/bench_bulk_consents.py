@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from backend.app.core.consent_service import ConsentService
+from backend.app.db.base import Base
+from backend.app.db.session import engine
+from backend.app.models.schemas import ConsentCreate
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark bulk consent import/withdrawal against DATABASE_URL")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, help="rows per batch (default CONSENT_BULK_BATCH_SIZE)")
+    args = parser.parse_args()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    service = ConsentService()
+    batch_size = args.batch or service.bulk_batch_size
+    items = [
+        ConsentCreate(data_principal_id=f"bench-{i}", purpose="research", scope=["email", "age"])
+        for i in range(args.rows)
+    ]
+
+    start = time.perf_counter()
+    ids: list[int] = []
+    for offset in range(0, len(items), batch_size):
+        ids.extend(await service.bulk_create(items[offset : offset + batch_size]))
+    elapsed = time.perf_counter() - start
+    print(f"bulk_create: {len(ids)} consents in {elapsed:.2f}s ({len(ids) / elapsed:,.0f}/s) [{engine.dialect.name}]")
+
+    start = time.perf_counter()
+    withdrawn = 0
+    for offset in range(0, len(ids), batch_size):
+        withdrawn += await service.bulk_withdraw(ids[offset : offset + batch_size])
+    elapsed = time.perf_counter() - start
+    print(f"bulk_withdraw: {withdrawn} consents in {elapsed:.2f}s ({withdrawn / elapsed:,.0f}/s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
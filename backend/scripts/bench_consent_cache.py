@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable
+
+from backend.app.core.consent_service import ConsentCache, cached_consent_active, encode_cached_consent
+
+SCOPE = ["email", "age", "city"]
+
+
+def _redis_client() -> Any:
+    """Prefer a real Redis from REDIS_URL, then fakeredis (``pip install fakeredis``)."""
+    url = os.getenv("REDIS_URL")
+    if url:
+        import redis.asyncio as aioredis
+
+        return aioredis.from_url(url)
+    try:
+        import fakeredis
+    except ImportError:
+        return None
+    return fakeredis.FakeAsyncRedis()
+
+
+async def _rate(label: str, n: int, fn: Callable[[int], Awaitable[None]]) -> None:
+    start = time.perf_counter()
+    for i in range(n):
+        await fn(i)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<32} {n / elapsed:>12,.0f} ops/s")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare JSON vs binary ConsentCache entries")
+    parser.add_argument("--keys", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+
+    legacy = json.dumps({"active": True, "scope": SCOPE}).encode()
+    compact = encode_cached_consent(True, SCOPE)
+    print(f"value bytes per entry: json={len(legacy)} binary={len(compact)}")
+
+    cache = ConsentCache()
+    cache.allow_fallback = True
+    cache.redis = _redis_client()
+    print(f"backend: {type(cache.redis).__name__ if cache.redis is not None else 'in-memory fallback'}")
+    keys = [f"consent:bench-{i}:research" for i in range(args.keys)]
+
+    for label, value in (("json", legacy), ("binary", compact)):
+        await cache.set_many({key: value for key in keys})
+        if cache.redis is not None:
+            try:
+                usage = await cache.redis.memory_usage(keys[0])
+                print(f"{label}: redis MEMORY USAGE per key = {usage} bytes")
+            except Exception:  # noqa: BLE001
+                pass
+
+        async def single(i: int) -> None:
+            raw = await cache.get(keys[i])
+            if label == "json":
+                assert raw is not None and json.loads(raw).get("active")
+            else:
+                assert raw is not None and cached_consent_active(raw)
+
+        async def batched(i: int) -> None:
+            chunk = keys[(i * args.batch) % args.keys :][: args.batch]
+            for raw in await cache.get_many(chunk):
+                assert raw is not None and cached_consent_active(raw)
+
+        print(label)
+        await _rate("GET + decode (1 key/round-trip)", args.keys, single)
+        if label == "binary":
+            n_batches = args.keys // args.batch
+            start = time.perf_counter()
+            for i in range(n_batches):
+                await batched(i)
+            elapsed = time.perf_counter() - start
+            print(f"  {'MGET x' + str(args.batch) + ' + flags check':<32} {n_batches * args.batch / elapsed:>12,.0f} hits/s")
+        await cache.delete_many(keys)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
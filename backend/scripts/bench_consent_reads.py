@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional, cast
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import Table, insert, select
+
+from backend.app.api import consent
+from backend.app.api.deps import get_consent_service
+from backend.app.core.consent_service import MAX_PAGE_SIZE, ConsentService
+from backend.app.db.base import Base
+from backend.app.db.session import dispose_engine, get_engine, get_session
+from backend.app.models.orm import Consent
+from backend.app.models.schemas import ConsentRead
+
+
+def _app() -> FastAPI:
+    """The consent router (lean path) next to the previous list endpoint, without auth."""
+    app = FastAPI()
+    app.include_router(consent.router, prefix="/api")
+
+    @app.get("/before", response_model=List[ConsentRead])
+    async def list_before(limit: int, after: int = 0) -> List[ConsentRead]:
+        # Full ORM entities, validated models, then FastAPI validates and serialises the list again
+        async with get_session() as session:
+            stmt = select(Consent).where(Consent.id > after).order_by(Consent.id).limit(limit)
+            rows = (await session.execute(stmt)).scalars().all()
+            return [
+                ConsentRead(
+                    id=row.id,
+                    data_principal_id=row.data_principal_id,
+                    purpose=row.purpose,
+                    scope=row.scope,
+                    expires_at=row.expires_at,
+                    active=row.active,
+                )
+                for row in rows
+            ]
+
+    return app
+
+
+async def _per_row(label: str, rows: int, repeat: int, fn: Callable[[], Awaitable[object]]) -> float:
+    best: Optional[float] = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    assert best is not None
+    per_row = best / rows * 1e6
+    print(f"  {label:<58} {per_row:6.2f} us/row ({best * 1000:6.1f} ms)")
+    return per_row
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-row cost of listing consents before and after the lean read path")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(cast(Table, Consent.__table__)),
+            [
+                {
+                    "data_principal_id": f"principal-{i}",
+                    "purpose": "research",
+                    "scope": ["email", "phone", "city"],
+                    "expires_at": datetime(2030, 1, 1) if i % 2 else None,
+                    "active": True,
+                    "created_at": datetime.utcnow(),
+                }
+                for i in range(args.rows)
+            ],
+        )
+
+    app = _app()
+    service = ConsentService()
+    app.dependency_overrides[get_consent_service] = lambda: service
+    page_size = min(args.rows, MAX_PAGE_SIZE)
+    print(f"{args.rows:,} rows on {get_engine().dialect.name}, best of {args.repeat}")
+    async with AsyncClient(app=app, base_url="http://bench") as ac:
+
+        async def read_all(path: str) -> List[dict]:
+            # Keyset pages of the API's maximum size until the whole table has been read
+            rows: List[dict] = []
+            while len(rows) < args.rows:
+                params = {"limit": page_size, "after": rows[-1]["id"] if rows else 0}
+                rows.extend((await ac.get(path, params=params)).json())
+            return rows
+
+        assert await read_all("/before") == await read_all("/api/consents"), "lean path returned a different body"
+        label = f"in {page_size:,}-row pages over HTTP"
+        before = await _per_row(f"ORM + validated models, {label}", args.rows, args.repeat, lambda: read_all("/before"))
+        after = await _per_row(f"rendered JSON, {label}", args.rows, args.repeat, lambda: read_all("/api/consents"))
+    print(f"  per-row overhead over HTTP cut by {1 - after / before:.0%}")
+    await _per_row(
+        f"list_consents, one {args.rows:,}-row page: validated models",
+        args.rows,
+        args.repeat,
+        lambda: service.list_consents(data_principal_id=None, purpose=None, limit=args.rows),
+    )
+    await _per_row(
+        f"list_consents_json, one {args.rows:,}-row page: rendered body",
+        args.rows,
+        args.repeat,
+        lambda: service.list_consents_json(data_principal_id=None, purpose=None, limit=args.rows),
+    )
+    await dispose_engine()
+
+
+if __name__ == "__main__":
+    # A throwaway SQLite file unless DATABASE_URL points somewhere else
+    if not os.getenv("DATABASE_URL"):
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench_reads.db"
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from backend.app.auth.security import issue_dev_token, verify_token
+from backend.app.core.deid import Deidentifier
+from backend.app.core.executor import CpuExecutor
+from backend.app.core.merkle_audit import leaf_hashes
+
+INTERVAL = 0.001
+
+
+async def _sample_lag(samples: List[float], stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        scheduled = loop.time()
+        await asyncio.sleep(INTERVAL)
+        samples.append(max(0.0, loop.time() - scheduled - INTERVAL))
+
+
+async def _workload(executor: CpuExecutor, offload_jwt: bool, requests: int, leaves: int) -> None:
+    token = issue_dev_token("system", "bench")
+    deid = Deidentifier(executor)
+    payload = {f"field{i}_hash": "x" * 4096 for i in range(16)}
+    batch = [{"action": "bench", "actor_id": "a", "scope": "s", "payload": {"i": i}} for i in range(leaves)]
+
+    async def one_request() -> None:
+        await verify_token(token, executor if offload_jwt else None)
+        await deid.process_async(payload)
+
+    for offset in range(0, requests, 50):
+        await asyncio.gather(*(one_request() for _ in range(min(50, requests - offset))))
+    await executor.map_batch(leaf_hashes, batch)
+
+
+async def _run(label: str, executor: CpuExecutor, offload_jwt: bool, requests: int, leaves: int) -> None:
+    samples: List[float] = []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(_sample_lag(samples, stop))
+    start = time.perf_counter()
+    await _workload(executor, offload_jwt, requests, leaves)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await sampler
+    samples.sort()
+    p99 = samples[int(len(samples) * 0.99) - 1] if samples else 0.0
+    print(
+        f"{label:<8} wall={elapsed:.2f}s lag p50={statistics.median(samples) * 1e3:.2f}ms "
+        f"p99={p99 * 1e3:.2f}ms max={samples[-1] * 1e3:.2f}ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Event-loop lag with CPU work inline vs offloaded")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--leaves", type=int, default=200_000)
+    args = parser.parse_args()
+
+    inline = CpuExecutor()
+    inline.thread_workers = inline.process_workers = 0
+    await _run("inline", inline, False, args.requests, args.leaves)
+
+    executor = CpuExecutor()
+    await _run("offload", executor, True, args.requests, args.leaves)
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from typing import Awaitable, Callable, List
+
+from backend.app.core.ingest_pipeline import store_records
+from backend.app.core.ingest_wal import IngestWAL
+from backend.app.core.merkle_audit import AuditLog
+from backend.app.core.payload_codec import PayloadCodec
+from backend.app.db.base import Base
+from backend.app.db.session import engine, get_session
+
+
+async def _measure(label: str, n: int, concurrency: int, op: Callable[[int], Awaitable[object]]) -> None:
+    latencies: List[float] = []
+
+    async def one(i: int) -> None:
+        start = time.perf_counter()
+        await op(i)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for offset in range(0, n, concurrency):
+        await asyncio.gather(*(one(i) for i in range(offset, min(n, offset + concurrency))))
+    elapsed = time.perf_counter() - start
+    q = statistics.quantiles(latencies, n=100)
+    print(f"{label:<22} {n / elapsed:>9,.0f}/s  p50 {q[49] * 1000:6.2f} ms  p99 {q[98] * 1000:6.2f} ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Ingest acknowledgement latency: synchronous store vs WAL append")
+    parser.add_argument("--records", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    audit = AuditLog()
+    codec = PayloadCodec()
+
+    def record(i: int) -> dict:
+        return {"data_principal_id": f"bench-{i}", "purpose": "research", "payload": {"email_hash": "x" * 64, "i": i}}
+
+    async def sync_store(i: int) -> None:
+        async with get_session() as session:
+            await store_records(session, audit, codec, [record(i)])
+
+    await _measure("sync store", args.records, args.concurrency, sync_store)
+
+    with tempfile.TemporaryDirectory() as directory:
+        wal = IngestWAL(directory, wal_id="bench")
+        await wal.open()
+        await _measure("wal append (ack)", args.records, args.concurrency, lambda i: wal.append(record(i)))
+
+        async def store(session, records):
+            return await store_records(session, audit, codec, records)
+
+        start = time.perf_counter()
+        drained = 0
+        while batch := await wal.drain_once(store):
+            drained += batch
+        elapsed = time.perf_counter() - start
+        print(f"{'wal drain':<22} {drained / elapsed:>9,.0f}/s  ({drained} records, batches of {wal.drain_batch})")
+        await wal.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
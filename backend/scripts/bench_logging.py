@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+from pythonjsonlogger import jsonlogger
+
+from backend.app.core import logging_setup
+
+logger = logging.getLogger("backend.app.bench")
+
+
+async def _handle(i: int, debug_lines: int) -> None:
+    # Stands in for a request handler that logs its hot path at DEBUG
+    for step in range(debug_lines):
+        logger.debug("ingest step", extra={"request": i, "step": step, "purpose": "research"})
+    logger.info("request served", extra={"request": i, "status": 200})
+    await asyncio.sleep(0)
+
+
+async def _latencies(requests: int, debug_lines: int) -> List[float]:
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        await _handle(i, debug_lines)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def _report(label: str, latencies: List[float]) -> None:
+    ordered = sorted(latencies)
+    p50 = statistics.median(ordered) * 1e6
+    p99 = ordered[int(len(ordered) * 0.99)] * 1e6
+    print(f"  {label:<34} p50 {p50:8.1f} us  p99 {p99:8.1f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Request latency with DEBUG logging: synchronous vs queued handler")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--debug-lines", type=int, default=10, help="DEBUG records per request")
+    args = parser.parse_args()
+    os.environ["DEBUG"] = "true"
+    root = logging.getLogger()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{args.requests} requests, {args.debug_lines} DEBUG + 1 INFO record each, written to a file")
+
+        # Before: python-json-logger on a StreamHandler, formatting and writing on the event loop thread
+        with open(os.path.join(tmp, "sync.log"), "w") as stream:
+            handler = logging.StreamHandler(stream)
+            handler.setFormatter(jsonlogger.JsonFormatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+            root.handlers = [handler]
+            root.setLevel(logging.DEBUG)
+            _report("StreamHandler + JsonFormatter", asyncio.run(_latencies(args.requests, args.debug_lines)))
+
+        with open(os.path.join(tmp, "queued.log"), "w") as stream:
+            os.environ["LOG_DEBUG_RATE_LIMIT"] = "0"
+            logging_setup.configure_logging(stream)
+            _report("queue + batch writer", asyncio.run(_latencies(args.requests, args.debug_lines)))
+            logging_setup.shutdown_logging()
+            dropped = logging_setup.LOG_DROPPED._value.get()
+
+        with open(os.path.join(tmp, "sampled.log"), "w") as stream:
+            os.environ["LOG_DEBUG_RATE_LIMIT"] = "100"
+            logging_setup.configure_logging(stream)
+            _report("queue + batch writer, 100 DEBUG/s", asyncio.run(_latencies(args.requests, args.debug_lines)))
+            logging_setup.shutdown_logging()
+        print(f"  records dropped on a full queue: {dropped:.0f}")
+    root.handlers = [logging.StreamHandler(sys.stderr)]
+
+
+if __name__ == "__main__":
+    main()
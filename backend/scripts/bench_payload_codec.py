@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import random
+import time
+import zlib
+from typing import Any, Callable, Dict, List
+
+from backend.app.core.payload_codec import PayloadCodec, serialize, train_dictionary
+
+
+def _payload(rng: random.Random, i: int) -> Dict[str, Any]:
+    # Shaped like de-identified ingest output: hashed identifiers, redactions and small attributes
+    return {
+        "email_hash": hashlib.sha256(f"user{i}@example.com".encode()).hexdigest(),
+        "phone_hash": hashlib.sha256(f"+91{rng.randrange(10**9)}".encode()).hexdigest(),
+        "aadhar": "[REDACTED]",
+        "pan": "[REDACTED]",
+        "age_band": rng.choice(["18-24", "25-34", "35-44", "45-54", "55+"]),
+        "city": rng.choice(["Mumbai", "Delhi", "Bengaluru", "Chennai", "Kolkata", "Pune"]),
+        "device": {"os": rng.choice(["android", "ios", "web"]), "app_version": f"4.{rng.randrange(20)}.0"},
+        "consented_channels": rng.sample(["email", "sms", "push", "whatsapp"], 2),
+        "visits_30d": rng.randrange(60),
+    }
+
+
+def _throughput(label: str, raw_bytes: int, fn: Callable[[], object], repeat: int) -> None:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<8} {raw_bytes * repeat / elapsed / 1e6:7.1f} MB/s of JSON")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stored size and encode/decode throughput of ingest payload formats")
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    payloads = [_payload(rng, i) for i in range(args.records)]
+    raw_bytes = sum(len(serialize(p)) for p in payloads)
+    zdict = train_dictionary([serialize(p) for p in payloads[: args.records // 4]])
+
+    plain = PayloadCodec()
+    trained = PayloadCodec()
+    trained.register(1, "research", zdict)
+    print(f"{args.records:,} payloads, {raw_bytes / args.records:.0f} B of JSON each; dictionary {len(zdict):,} B")
+    print(f"  {'json text':<16} {raw_bytes / args.records:7.1f} B/record")
+    for label, codec in (("zlib", plain), ("zlib + dict", trained)):
+        encoded: List[bytes] = [codec.encode("research", p) for p in payloads]
+        size = sum(len(e) for e in encoded)
+        print(f"  {label:<16} {size / args.records:7.1f} B/record ({size / raw_bytes:.0%} of JSON)")
+        _throughput("encode", raw_bytes, lambda: [codec.encode("research", p) for p in payloads], args.repeat)
+        _throughput("decode", raw_bytes, lambda: [codec.decode(e) for e in encoded], args.repeat)
+    texts = [serialize(p) for p in payloads]
+    print("  zlib.compress alone (no JSON serialisation)")
+    _throughput("encode", raw_bytes, lambda: [zlib.compress(t, 6) for t in texts], args.repeat)
+
+
+if __name__ == "__main__":
+    main()
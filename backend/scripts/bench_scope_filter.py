@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple
+
+from backend.app.core.consent_service import compile_scope, decode_cached_consent, encode_cached_consent
+from backend.app.core.ingest_pipeline import restrict_to_scope
+
+
+compiled_scope = lru_cache(maxsize=4096)(compile_scope)
+
+
+def _naive(raw: bytes, payload: Dict[str, Any]) -> Dict[str, Any]:
+    # What filtering costs without compiled scopes: decode the entry, then test every field against the list
+    entry = decode_cached_consent(raw)
+    assert entry is not None
+    return {key: value for key, value in payload.items() if key in entry.scope}
+
+
+def _per_request_set(raw: bytes, payload: Dict[str, Any]) -> Dict[str, Any]:
+    entry = decode_cached_consent(raw)
+    assert entry is not None
+    return restrict_to_scope(payload, frozenset(entry.scope))[0]
+
+
+def _compiled(raw: bytes, payload: Dict[str, Any]) -> Dict[str, Any]:
+    scope = compiled_scope(raw)
+    assert scope is not None
+    return restrict_to_scope(payload, scope)[0]
+
+
+def _time(fn: Callable[[bytes, Dict[str, Any]], Dict[str, Any]], work: List[Tuple[bytes, Dict[str, Any]]]) -> float:
+    start = time.perf_counter()
+    for raw, payload in work:
+        fn(raw, payload)
+    return (time.perf_counter() - start) / len(work) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-record cost of restricting ingest payloads to the consented scope")
+    parser.add_argument("--fields", type=int, default=250, help="fields per payload")
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument("--scopes", type=int, default=20, help="distinct consent scopes the records share")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    vocabulary = [f"field_{i:03d}" for i in range(args.fields)]
+    print(f"{args.records:,} records of {args.fields} fields over {args.scopes} distinct scopes (us/record)")
+    print(f"  {'scope covers':<14} {'no filter':>10} {'naive':>10} {'set/req':>10} {'compiled':>10}")
+    for covered in (1.0, 0.9, 0.5):
+        scopes = [
+            encode_cached_consent(True, rng.sample(vocabulary, int(args.fields * covered))) for _ in range(args.scopes)
+        ]
+        work = [
+            (rng.choice(scopes), {name: rng.randrange(1000) for name in vocabulary}) for _ in range(args.records)
+        ]
+        compiled_scope.cache_clear()
+        results = [_time(lambda raw, payload: payload, work)]
+        results.extend(_time(fn, work) for fn in (_naive, _per_request_set, _compiled))
+        print(f"  {covered:<14.0%} " + " ".join(f"{value:10.2f}" for value in results))
+
+
+if __name__ == "__main__":
+    main()
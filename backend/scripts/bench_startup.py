@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PHASES = ("import", "startup", "first_request")
+
+# Cold import + lifespan startup + first served request, in seconds; what a new replica costs before it is useful
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "2.0"))
+
+
+async def _measure_in_process() -> dict[str, float]:
+    start = time.perf_counter()
+    from backend.app.main import app
+
+    imported = time.perf_counter()
+    from httpx import AsyncClient
+
+    async with app.router.lifespan_context(app):
+        started = time.perf_counter()
+        async with AsyncClient(app=app, base_url="http://bench") as client:
+            request_start = time.perf_counter()
+            resp = await client.get("/api/health/ready")
+            resp.raise_for_status()
+            served = time.perf_counter()
+    return {
+        "import": imported - start,
+        "startup": started - imported,
+        "first_request": served - request_start,
+    }
+
+
+def _child() -> None:
+    print(json.dumps(asyncio.run(_measure_in_process())))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold start of the API process against STARTUP_BUDGET_SECONDS")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_SECONDS)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child()
+        return
+
+    runs = []
+    for _ in range(args.runs):
+        # A fresh interpreter per run, so every import is cold
+        out = subprocess.run(
+            [sys.executable, "-m", "backend.scripts.bench_startup", "--child"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    medians = {phase: statistics.median(run[phase] for run in runs) for phase in PHASES}
+    total = statistics.median(sum(run[phase] for phase in PHASES) for run in runs)
+    print(f"{args.runs} cold starts, medians:")
+    for phase in PHASES:
+        print(f"  {phase:<14} {medians[phase] * 1000:8.1f} ms")
+    print(f"  {'total':<14} {total * 1000:8.1f} ms (budget {args.budget * 1000:.0f} ms)")
+    if total > args.budget:
+        print("over budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,27 @@ from __future__ import annotations
 
 import asyncio
 
+from typing import cast
+
+from sqlalchemy import Table
+
 from backend.app.db.base import Base
+from backend.app.db.routing import ShardRouter
 from backend.app.db.session import engine
+from backend.app.models.orm import Consent, ConsentChange, PendingConsentChange
 
 
 async def main() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    router = ShardRouter()
+    # Consent shards and their replicas (CONSENT_SHARD_URLS / CONSENT_REPLICA_URLS) only hold consents
+    # and their change feed
+    for _, shard_engine in router.engines():
+        async with shard_engine.begin() as conn:
+            tables = [cast(Table, model.__table__) for model in (Consent, ConsentChange, PendingConsentChange)]
+            await conn.run_sync(Base.metadata.create_all, tables=tables)
+    await router.dispose()
     print("Database tables created.")
 
 
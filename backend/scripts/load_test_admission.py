@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Dict, List, Tuple
+
+from backend.app.core.admission import AdaptiveLimit, AdmissionController
+
+
+class _Backend:
+    """ASGI app with fixed capacity: ``workers`` requests at a time, each taking ``service_ms``."""
+
+    def __init__(self, workers: int, service_ms: float) -> None:
+        self.slots = asyncio.Semaphore(workers)
+        self.service = service_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        async with self.slots:
+            await asyncio.sleep(self.service)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _request(app, method: str, path: str) -> Tuple[int, float]:
+    status = 0
+    start = time.perf_counter()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app({"type": "http", "method": method, "path": path, "headers": []}, receive, send)
+    return status, time.perf_counter() - start
+
+
+async def _run(app, rate: float, seconds: float, priority_share: float) -> Dict[str, List[Tuple[int, float]]]:
+    """Open-loop Poisson arrivals: requests keep coming whether or not earlier ones have finished."""
+    rng = random.Random(1)
+    tasks: Dict[str, List[asyncio.Task[Tuple[int, float]]]] = {"ingest": [], "withdraw": []}
+    start = time.perf_counter()
+    next_at = start
+    while next_at < start + seconds:
+        # Arrival times are fixed in advance; when the loop falls behind it catches up with a burst
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if rng.random() < priority_share:
+            tasks["withdraw"].append(asyncio.create_task(_request(app, "DELETE", "/api/consents/1")))
+        else:
+            tasks["ingest"].append(asyncio.create_task(_request(app, "POST", "/api/ingest")))
+        next_at += rng.expovariate(rate)
+    return {kind: list(await asyncio.gather(*group)) for kind, group in tasks.items()}
+
+
+def _report(label: str, results: Dict[str, List[Tuple[int, float]]]) -> None:
+    print(label)
+    for kind, rows in results.items():
+        ok = sorted(latency for status, latency in rows if status == 200)
+        shed = sum(1 for status, _ in rows if status == 503)
+        if not ok:
+            print(f"  {kind:<9} {len(rows):6d} sent, none served")
+            continue
+        p50 = statistics.median(ok) * 1000
+        p99 = ok[min(len(ok) - 1, int(len(ok) * 0.99))] * 1000
+        print(
+            f"  {kind:<9} {len(rows):6d} sent  {len(ok):6d} served  {shed:6d} shed  "
+            f"p50 {p50:7.1f} ms  p99 {p99:7.1f} ms"
+        )
+
+
+async def _main(args: argparse.Namespace) -> None:
+    capacity = args.workers / (args.service_ms / 1000)
+    rate = capacity * args.overload
+    print(f"capacity {capacity:.0f} req/s, offered {rate:.0f} req/s ({args.overload:.1f}x) for {args.seconds:.0f} s")
+
+    baseline = _Backend(args.workers, args.service_ms)
+    _report("without admission control", await _run(baseline, rate, args.seconds, args.priority_share))
+
+    limit = AdaptiveLimit(
+        "ingest",
+        target_latency=args.target_ms / 1000,
+        initial=args.workers,
+        max_queue=args.workers * 2,
+        queue_timeout=args.target_ms / 2000,
+    )
+    controlled = AdmissionController(_Backend(args.workers, args.service_ms), limits={"ingest": limit})
+    controlled.enabled = True
+    results = await _run(controlled, rate, args.seconds, args.priority_share)
+    _report(f"with admission control (final limit {limit.limit:.1f})", results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Ingest latency and shedding under overload, with and without admission control"
+    )
+    parser.add_argument("--workers", type=int, default=8, help="requests the simulated backend serves at once")
+    parser.add_argument("--service-ms", type=float, default=20.0)
+    parser.add_argument("--overload", type=float, default=3.0, help="offered load as a multiple of capacity")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--target-ms", type=float, default=100.0)
+    parser.add_argument("--priority-share", type=float, default=0.05, help="fraction of requests that are withdrawals")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Callable, List, Tuple
+
+from sqlalchemy import LargeBinary, inspect, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Connection
+
+from backend.app.db.base import Base
+from backend.app.db.session import engine
+
+
+def _has_column(table: str, column: str) -> Callable[[Connection], bool]:
+    def check(conn: Connection) -> bool:
+        return column in {c["name"] for c in inspect(conn).get_columns(table)}
+
+    return check
+
+
+def _has_index(table: str, index: str) -> Callable[[Connection], bool]:
+    def check(conn: Connection) -> bool:
+        return index in {i["name"] for i in inspect(conn).get_indexes(table)}
+
+    return check
+
+
+def _is_binary(table: str, column: str) -> Callable[[Connection], bool]:
+    def check(conn: Connection) -> bool:
+        if conn.dialect.name != "postgresql":
+            # SQLite keeps whatever type each value was written with; the codec reads both
+            return True
+        columns = {c["name"]: c["type"] for c in inspect(conn).get_columns(table)}
+        return isinstance(columns[column], LargeBinary)
+
+    return check
+
+
+def _is_jsonb(table: str, column: str) -> Callable[[Connection], bool]:
+    def check(conn: Connection) -> bool:
+        if conn.dialect.name != "postgresql":
+            # SQLite's JSON type is stored as text already
+            return True
+        columns = {c["name"]: c["type"] for c in inspect(conn).get_columns(table)}
+        return isinstance(columns[column], JSONB)
+
+    return check
+
+
+# (description, already-applied check, statements); every step is idempotent
+STEPS: List[Tuple[str, Callable[[Connection], bool], List[str]]] = [
+    (
+        "audit_events.leaf_index",
+        _has_column("audit_events", "leaf_index"),
+        [
+            "ALTER TABLE audit_events ADD COLUMN leaf_index BIGINT",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_audit_events_leaf_index ON audit_events (leaf_index)",
+        ],
+    ),
+    (
+        "audit_events search indexes",
+        _has_index("audit_events", "ix_audit_events_created"),
+        [
+            "CREATE INDEX IF NOT EXISTS ix_audit_events_actor_created ON audit_events (actor_id, created_at, id)",
+            "CREATE INDEX IF NOT EXISTS ix_audit_events_action_created ON audit_events (action, created_at, id)",
+            "CREATE INDEX IF NOT EXISTS ix_audit_events_scope_created ON audit_events (scope, created_at, id)",
+            "CREATE INDEX IF NOT EXISTS ix_audit_events_created ON audit_events (created_at, id)",
+        ],
+    ),
+    (
+        "ingest_records.payload as bytes",
+        _is_binary("ingest_records", "payload"),
+        # Existing JSON text stays readable: the codec decodes bytes starting with "{" or "[" as JSON
+        ["ALTER TABLE ingest_records ALTER COLUMN payload TYPE BYTEA USING convert_to(payload, 'UTF8')"],
+    ),
+    (
+        "ingest_records.idempotency_key",
+        _has_column("ingest_records", "idempotency_key"),
+        [
+            "ALTER TABLE ingest_records ADD COLUMN idempotency_key VARCHAR(64)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_ingest_records_idempotency_key ON ingest_records (idempotency_key)",
+        ],
+    ),
+    (
+        "consents.scope as jsonb",
+        _is_jsonb("consents", "scope"),
+        [
+            "ALTER TABLE consents ALTER COLUMN scope TYPE JSONB USING scope::jsonb",
+            "CREATE INDEX IF NOT EXISTS ix_consents_scope_gin ON consents USING gin (scope jsonb_path_ops)",
+        ],
+    ),
+]
+
+
+async def main() -> None:
+    async with engine.begin() as conn:
+        # New tables are created outright; existing ones only get the missing pieces below
+        await conn.run_sync(Base.metadata.create_all)
+        for description, applied, statements in STEPS:
+            if await conn.run_sync(applied):
+                continue
+            for statement in statements:
+                await conn.execute(text(statement))
+            print(f"Applied: {description}")
+    print("Database schema is up to date.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
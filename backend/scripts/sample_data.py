@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import asyncio
-import json
 
 from backend.app.db.session import get_session
 from backend.app.models.orm import Consent
@@ -12,7 +11,7 @@ async def main() -> None:
         c = Consent(
             data_principal_id="user-123",
             purpose="research",
-            scope=json.dumps(["email", "age"]),
+            scope=["email", "age"],
             active=True,
         )
         session.add(c)
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import zlib
+from typing import List
+
+from sqlalchemy import select
+
+from backend.app.core.payload_codec import PayloadCodec, serialize, train_dictionary
+from backend.app.db.session import get_session
+from backend.app.models.orm import IngestRecord
+
+
+def _compressed_size(samples: List[bytes], level: int, zdict: bytes = b"") -> int:
+    total = 0
+    for sample in samples:
+        compressor = zlib.compressobj(level, zdict=zdict) if zdict else zlib.compressobj(level)
+        total += len(compressor.compress(sample) + compressor.flush())
+    return total
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Train a zlib dictionary per purpose from recent ingest payloads")
+    parser.add_argument("--samples", type=int, default=5_000, help="most recent records sampled per purpose")
+    parser.add_argument("--min-gain", type=float, default=0.05, help="required saving over plain zlib on held-out records")
+    args = parser.parse_args()
+
+    payload_codec = PayloadCodec()
+    async with get_session() as session:
+        await payload_codec.refresh(session, force=True)
+        purposes = (await session.execute(select(IngestRecord.purpose).distinct())).scalars().all()
+        for purpose in purposes:
+            stored = (
+                await session.execute(
+                    select(IngestRecord.payload)
+                    .where(IngestRecord.purpose == purpose)
+                    .order_by(IngestRecord.id.desc())
+                    .limit(args.samples)
+                )
+            ).scalars().all()
+            samples = [serialize(payload_codec.decode(value)) for value in stored]
+            # Every fifth record is held out to check the dictionary generalises
+            held_out, training = samples[::5], [s for i, s in enumerate(samples) if i % 5]
+            if len(training) < 20:
+                print(f"{purpose}: only {len(samples)} records, skipped")
+                continue
+            zdict = train_dictionary(training)
+            level = payload_codec.compress_level
+            plain, with_dict = _compressed_size(held_out, level), _compressed_size(held_out, level, zdict)
+            gain = 1 - with_dict / plain if plain else 0.0
+            if gain < args.min_gain:
+                print(f"{purpose}: dictionary saves {gain:.1%} over zlib, kept current encoding")
+                continue
+            dict_id = await payload_codec.add_dictionary(session, purpose, zdict)
+            print(f"{purpose}: dictionary {dict_id} ({len(zdict)} bytes) saves {gain:.1%} over zlib")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, select
+
+from backend.app.core.merkle_audit import AuditLog, MerkleTree, leaf_hash
+from backend.app.db.session import get_session
+from backend.app.models.orm import AuditEvent, AuditPendingLeaf, MerkleNode
+
+DEFAULT_CHECKPOINT = "audit_verify.checkpoint.json"
+
+
+def hash_rows(rows: Sequence[Tuple[str, str, str, str]]) -> List[str]:
+    """Leaf hashes of (action, actor_id, scope, stored payload) rows; runs in worker processes."""
+    return [
+        leaf_hash({"action": action, "actor_id": actor_id, "scope": scope, "payload": json.loads(payload)})
+        for action, actor_id, scope, payload in rows
+    ]
+
+
+def check_roots(
+    size: int, frontier: Dict[int, str], digests: Sequence[str], expected: Sequence[Tuple[int, str]]
+) -> Optional[Tuple[int, str]]:
+    """Replay ``digests`` onto a tree of ``size`` leaves and compare roots at the given offsets.
+
+    Returns (offset, recomputed root) of the first mismatch. Runs in worker processes, so the
+    O(log n) root folds for many chunks proceed in parallel while the parent only extends the frontier.
+    """
+    tree = MerkleTree(keep_nodes=False)
+    tree.size, tree.frontier = size, dict(frontier)
+    checks = iter(expected)
+    pending = next(checks, None)
+    for offset, digest in enumerate(digests):
+        tree.append_hash(digest)
+        if pending is not None and pending[0] == offset:
+            root = tree.root()
+            if root != pending[1]:
+                return offset, root or ""
+            pending = next(checks, None)
+    return None
+
+
+@dataclass
+class Progress:
+    started: float = field(default_factory=time.perf_counter)
+    verified: int = 0
+    last_report: float = 0.0
+
+    def report(self, leaf_index: int, *, force: bool = False, every: float = 5.0) -> None:
+        now = time.perf_counter()
+        if force or now - self.last_report >= every:
+            rate = self.verified / max(now - self.started, 1e-9)
+            print(f"verified {self.verified:,} events (next leaf {leaf_index:,}) at {rate:,.0f}/s", file=sys.stderr)
+            self.last_report = now
+
+
+def load_checkpoint(path: Path) -> Optional[Tuple[int, Dict[int, str]]]:
+    if not path.exists():
+        return None
+    state = json.loads(path.read_text())
+    return state["size"], {int(level): node for level, node in state["frontier"].items()}
+
+
+def save_checkpoint(path: Path, size: int, frontier: Dict[int, str]) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"size": size, "frontier": frontier}))
+    os.replace(tmp, path)
+
+
+async def verify(args: argparse.Namespace) -> int:
+    checkpoint_path = Path(args.checkpoint)
+    if args.restart and checkpoint_path.exists():
+        checkpoint_path.unlink()
+    resumed = load_checkpoint(checkpoint_path)
+    # Give committed events still waiting for a leaf index theirs, so they are verified too
+    await AuditLog().sequence()
+    async with get_session() as session:
+        first = await session.scalar(select(func.min(AuditEvent.leaf_index)))
+        legacy = await session.scalar(
+            select(func.count()).where(
+                AuditEvent.leaf_index.is_(None), AuditEvent.id.not_in(select(AuditPendingLeaf.event_id))
+            )
+        )
+    if legacy:
+        print(f"skipping {legacy} events written before leaf indexes existed", file=sys.stderr)
+    if first is None:
+        print("No audit events with leaf indexes.")
+        return 0
+    if resumed is not None:
+        tree = MerkleTree(keep_nodes=False)
+        tree.size, tree.frontier = resumed
+        print(f"resuming at leaf {tree.size:,}", file=sys.stderr)
+    elif first > 0:
+        # Earlier leaves are archived; start from the stored frontier (segments have their own verifier)
+        tree = await AuditLog().tree_at(first)
+        print(f"leaves below {first:,} are archived; starting from the stored frontier", file=sys.stderr)
+    else:
+        tree = MerkleTree(keep_nodes=False)
+
+    stmt = (
+        select(
+            AuditEvent.id,
+            AuditEvent.leaf_index,
+            AuditEvent.action,
+            AuditEvent.actor_id,
+            AuditEvent.scope,
+            AuditEvent.payload,
+            AuditEvent.merkle_root,
+            MerkleNode.hash.label("stored_leaf"),
+        )
+        .outerjoin(MerkleNode, and_(MerkleNode.level == 0, MerkleNode.idx == AuditEvent.leaf_index))
+        .where(AuditEvent.leaf_index >= tree.size)
+        .order_by(AuditEvent.leaf_index)
+        .execution_options(yield_per=args.chunk)
+    )
+
+    loop = asyncio.get_running_loop()
+    pool = ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn"))
+    progress = Progress()
+    hashing: Deque[Tuple[Sequence[Any], "asyncio.Future[List[str]]"]] = deque()
+    checking: Deque[Tuple[Sequence[Any], int, Dict[int, str], "asyncio.Future[Optional[Tuple[int, str]]]"]] = deque()
+    failure: Optional[Tuple[int, int, str]] = None
+    window = args.workers * 2
+
+    async def finish_check() -> None:
+        nonlocal failure
+        part, size, frontier, future = checking.popleft()
+        mismatch = await future
+        if mismatch is not None:
+            offset, root = mismatch
+            row = part[offset]
+            found = (row.leaf_index, row.id, f"stored merkle_root {row.merkle_root} != recomputed {root}")
+            failure = min(failure, found) if failure else found
+        elif failure is None or failure[0] >= size:
+            progress.verified += len(part)
+            save_checkpoint(checkpoint_path, size, frontier)
+            progress.report(size)
+
+    async def finish_hash() -> None:
+        nonlocal failure
+        part, future = hashing.popleft()
+        digests = await future
+        if failure is not None:
+            return
+        for offset, (row, digest) in enumerate(zip(part, digests)):
+            if row.leaf_index != tree.size + offset:
+                failure = (tree.size + offset, row.id, f"leaf {tree.size + offset} is missing its event")
+            elif row.stored_leaf is not None and row.stored_leaf != digest:
+                failure = (row.leaf_index, row.id, f"stored leaf hash {row.stored_leaf} != recomputed {digest}")
+            if failure is not None:
+                # Roots before the bad leaf are still checked, so an earlier divergence wins
+                part, digests = part[:offset], digests[:offset]
+                break
+        if not part:
+            return
+        start, frontier = tree.size, dict(tree.frontier)
+        for digest in digests:
+            tree.append_hash(digest)
+        expected = [(offset, row.merkle_root) for offset, row in enumerate(part) if row.merkle_root]
+        check = loop.run_in_executor(pool, check_roots, start, frontier, digests, expected)
+        checking.append((part, tree.size, dict(tree.frontier), check))
+        while len(checking) > window:
+            await finish_check()
+
+    try:
+        async with get_session() as session:
+            result = await session.stream(stmt)
+            async for part in result.partitions():
+                rows = [(row.action, row.actor_id, row.scope, row.payload) for row in part]
+                hashing.append((part, loop.run_in_executor(pool, hash_rows, rows)))
+                while len(hashing) > window:
+                    await finish_hash()
+                if failure is not None:
+                    break
+        while hashing:
+            await finish_hash()
+        while checking:
+            await finish_check()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+    progress.report(tree.size, force=True)
+    if failure is not None:
+        leaf_index, event_id, reason = failure
+        print(f"DIVERGENCE at leaf {leaf_index} (event {event_id}): {reason}")
+        return 1
+    print(f"OK: {progress.verified:,} events verified up to tree size {tree.size:,}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Recompute audit leaf hashes and Merkle roots from DATABASE_URL")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk", type=int, default=20_000, help="events per server-side fetch and worker task")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="resume file, rewritten after each chunk")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    return asyncio.run(verify(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
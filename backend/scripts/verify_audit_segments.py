@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+
+from backend.app.core.audit_archive import DEFAULT_ARCHIVE_DIR, Segment
+from backend.app.core.merkle_audit import leaf_hash, subtree_levels
+from backend.app.db.session import get_session
+from backend.app.models.orm import AuditSegment, MerkleNode
+
+
+class CatalogEntry(NamedTuple):
+    """What the database records for a segment: its placement and the two copies of its root."""
+
+    first_leaf: int
+    level: int
+    root_hash: str
+    anchor: Optional[str]
+
+
+async def load_catalog() -> Dict[str, CatalogEntry]:
+    """``audit_segments`` rows by file name, with the anchor node kept in ``merkle_nodes`` for each."""
+    async with get_session() as session:
+        rows = (await session.execute(select(AuditSegment).order_by(AuditSegment.first_leaf))).scalars().all()
+        keys = [(row.level, row.first_leaf >> row.level) for row in rows]
+        anchors: Dict[Tuple[int, int], str] = {}
+        if keys:
+            result = await session.execute(
+                select(MerkleNode.level, MerkleNode.idx, MerkleNode.hash).where(
+                    tuple_(MerkleNode.level, MerkleNode.idx).in_(keys)
+                )
+            )
+            anchors = {(node.level, node.idx): node.hash for node in result}
+    return {
+        row.path: CatalogEntry(row.first_leaf, row.level, row.root_hash, anchors.get(key))
+        for row, key in zip(rows, keys)
+    }
+
+
+def verify_segment(path: str, entry: CatalogEntry) -> Tuple[str, int, str]:
+    """Recompute a segment's leaves from its events and every level above, and check the root against
+    the database's copies in ``entry``; returns (path, events, error)."""
+    segment = Segment(Path(path))
+    try:
+        if (segment.first_leaf, segment.level) != (entry.first_leaf, entry.level):
+            return path, 0, f"header places it at ({segment.level}, {segment.first_leaf}), catalog does not"
+        digests = []
+        for offset, record in enumerate(segment.records()):
+            if record["leaf_index"] != segment.first_leaf + offset:
+                return path, offset, f"event {record['id']} is stored at the wrong leaf"
+            leaf = {key: record[key] for key in ("action", "actor_id", "scope", "payload")}
+            digests.append(leaf_hash(leaf))
+        if len(digests) != segment.size:
+            return path, len(digests), f"expected {segment.size} events"
+        levels = subtree_levels(digests)
+        for level, nodes in enumerate(levels):
+            stored = segment.level_hashes(level)
+            if nodes != stored:
+                first = next(i for i, (a, b) in enumerate(zip(nodes, stored)) if a != b)
+                return path, segment.size, f"node ({level}, {(segment.first_leaf >> level) + first}) differs"
+        root = levels[-1][0]
+        if root != segment.root:
+            return path, segment.size, "root in header differs"
+        # A file rewritten consistently passes the checks above; only the database's copies can catch it
+        if root != entry.root_hash:
+            return path, segment.size, "root differs from audit_segments.root_hash"
+        if root != entry.anchor:
+            node = (segment.level, segment.first_leaf >> segment.level)
+            return path, segment.size, f"root differs from merkle_nodes {node}"
+        return path, segment.size, ""
+    finally:
+        segment.close()
+
+
+async def verify(args: argparse.Namespace) -> int:
+    catalog = await load_catalog()
+    directory = Path(args.directory)
+    paths = sorted(str(path) for path in directory.glob("*.seg"))
+    if not paths and not catalog:
+        print(f"No segments in {args.directory}")
+        return 0
+    started = time.perf_counter()
+    events = failures = 0
+    for name in sorted(set(catalog) - {Path(path).name for path in paths}):
+        failures += 1
+        print(f"FAIL {directory / name}: listed in audit_segments but missing")
+    listed = []
+    for path in paths:
+        if Path(path).name in catalog:
+            listed.append(path)
+        else:
+            failures += 1
+            print(f"FAIL {path}: not listed in audit_segments")
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        results = await asyncio.gather(
+            *(loop.run_in_executor(pool, verify_segment, path, catalog[Path(path).name]) for path in listed)
+        )
+    for path, count, error in results:
+        events += count
+        if error:
+            failures += 1
+            print(f"FAIL {path}: {error}")
+    elapsed = time.perf_counter() - started
+    total = len(set(catalog) | {Path(path).name for path in paths})
+    print(f"{total - failures}/{total} segments ok, {events} events in {elapsed:.1f}s")
+    return 1 if failures else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Recompute Merkle roots of archived audit segments and check them against DATABASE_URL"
+    )
+    parser.add_argument("directory", nargs="?", default=os.getenv("AUDIT_ARCHIVE_DIR") or DEFAULT_ARCHIVE_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    return asyncio.run(verify(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())